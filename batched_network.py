@@ -0,0 +1,224 @@
+from collections import OrderedDict
+import numpy as np
+import neat
+
+# Compiled networks kept across generations (see NetworkCache)
+NETWORK_CACHE_SIZE = 1024
+
+# NumPy versions of neat.activations, with the same clamping and scaling
+ACTIVATIONS = {
+    'sigmoid': lambda z: 1.0 / (1.0 + np.exp(-np.clip(5.0 * z, -60.0, 60.0))),
+    'tanh': lambda z: np.tanh(np.clip(2.5 * z, -60.0, 60.0)),
+    'sin': lambda z: np.sin(np.clip(5.0 * z, -60.0, 60.0)),
+    'gauss': lambda z: np.exp(-5.0 * np.clip(z, -3.4, 3.4) ** 2),
+    'relu': lambda z: np.where(z > 0.0, z, 0.0),
+    'softplus': lambda z: 0.2 * np.log(1 + np.exp(np.clip(5.0 * z, -60.0, 60.0))),
+    'identity': lambda z: z,
+    'clamped': lambda z: np.clip(z, -1.0, 1.0),
+    'inv': lambda z: np.divide(1.0, z, out=np.zeros_like(z), where=z != 0.0),
+    'log': lambda z: np.log(np.maximum(1e-7, z)),
+    'exp': lambda z: np.exp(np.clip(z, -60.0, 60.0)),
+    'abs': np.abs,
+    'hat': lambda z: np.maximum(0.0, 1 - np.abs(z)),
+    'square': lambda z: z ** 2,
+    'cube': lambda z: z ** 3,
+}
+ACTIVATION_NAMES = list(ACTIVATIONS)
+IDENTITY = ACTIVATION_NAMES.index('identity')
+
+
+def genome_key(genome, config):
+    """
+    Everything FeedForwardNetwork.create reads from a genome: its nodes'
+    parameters and its enabled connections with their weights, in dict order
+    since the order of a node's links decides the order its inputs are summed
+    """
+    genome_config = config.genome_config
+    nodes = tuple([(k, n.bias, n.response, n.activation, n.aggregation) for k, n in genome.nodes.items()])
+    links = tuple([(k, c.weight) for k, c in genome.connections.items() if c.enabled])
+    return tuple(genome_config.input_keys), tuple(genome_config.output_keys), nodes, links
+
+
+class NetworkCache:
+    """
+    LRU cache of the networks built from genomes, so elites and other genomes
+    that survive a generation unchanged are not built again.
+
+    Entries are found by the hash of genome_key and checked against the key
+    itself, so two genomes with the same structure and weights share one
+    entry; at most `size` entries are kept. `hits` and `misses` count the
+    lookups.
+    """
+
+    def __init__(self, size=NETWORK_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()  # hash -> [genome_key, FeedForwardNetwork, compile_genome tuples or None]
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, genome, config):
+        key = genome_key(genome, config)
+        digest = hash(key)
+        entry = self.entries.get(digest)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            self.entries.move_to_end(digest)
+            return entry
+        self.misses += 1
+        entry = [key, neat.nn.FeedForwardNetwork.create(genome, config), None]
+        self.entries[digest] = entry
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+        return entry
+
+    def network(self, genome, config):
+        """FeedForwardNetwork.create(genome, config), shared by equal genomes"""
+        return self._entry(genome, config)[1]
+
+    def compiled(self, genome, config):
+        """compile_genome(genome, config), shared by equal genomes"""
+        entry = self._entry(genome, config)
+        if entry[2] is None:
+            entry[2] = compile_genome(genome, config, entry[1])
+        return entry[2]
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0
+        return "%d hits, %d misses (%.0f%% hit rate), %d networks cached" % (self.hits, self.misses, rate,
+                                                                             len(self.entries))
+
+
+NETWORK_CACHE = NetworkCache()
+
+
+def compile_genome(genome, config, net=None):
+    """
+    Flatten a genome into (node, depth, activation, bias, response, links) tuples,
+    using the same node selection and link order as FeedForwardNetwork.create.
+    `net` is the genome's FeedForwardNetwork if it was already built.
+    """
+    if net is None:
+        net = neat.nn.FeedForwardNetwork.create(genome, config)
+    depth = dict((k, 0) for k in net.input_nodes)
+    nodes = []
+    for node, act_func, agg_func, bias, response, links in net.node_evals:
+        ng = genome.nodes[node]
+        if ng.aggregation != 'sum':
+            raise ValueError("Batched networks only support sum aggregation, got {!r}".format(ng.aggregation))
+        if ng.activation not in ACTIVATIONS:
+            raise ValueError("Unsupported activation for batched networks: {!r}".format(ng.activation))
+        depth[node] = 1 + max(depth[i] for i, w in links)
+        nodes.append((node, depth[node], ACTIVATION_NAMES.index(ng.activation), bias, response, links))
+    return nodes
+
+
+class PopulationNetwork:
+    """
+    Every feed-forward network of a generation packed into padded arrays.
+
+    All networks share one value buffer per bird: the inputs, a constant zero
+    column used for padding, then one block of columns per depth. A depth is
+    evaluated for the whole population at once, accumulating each node's links
+    in the same order as FeedForwardNetwork.activate, so outputs match it up
+    to NumPy's elementwise activation functions.
+    """
+
+    def __init__(self, layers, outputs, num_inputs):
+        self.layers = layers      # per depth: (src, weight, bias, response, act, codes)
+        self.outputs = outputs    # output column of each network, shape (size, num_outputs)
+        self.num_inputs = num_inputs
+        self.size = len(outputs)
+        self.width = num_inputs + 1 + sum(layer[1].shape[1] for layer in layers)
+        self._rows = None
+        self._subset = None
+
+    @classmethod
+    def from_genomes(cls, genomes, config):
+        genome_config = config.genome_config
+        num_inputs = len(genome_config.input_keys)
+        zero_col = num_inputs
+        compiled = [NETWORK_CACHE.compiled(genome, config) for genome in genomes]
+        size = len(compiled)
+
+        max_depth = max([n[1] for nodes in compiled for n in nodes] or [0])
+        layer_nodes = [[[] for _ in range(size)] for _ in range(max_depth)]
+        for g, nodes in enumerate(compiled):
+            for n in nodes:
+                layer_nodes[n[1] - 1][g].append(n)
+
+        # Assign a column to every node, depth block by depth block
+        columns = [dict((k, i) for i, k in enumerate(genome_config.input_keys)) for _ in range(size)]
+        offset = num_inputs + 1
+        layers = []
+        for per_genome in layer_nodes:
+            nodes_wide = max(len(nodes) for nodes in per_genome)
+            links_wide = max(len(n[5]) for nodes in per_genome for n in nodes)
+            src = np.full((size, nodes_wide, links_wide), zero_col, dtype=np.intp)
+            weight = np.zeros((size, nodes_wide, links_wide))
+            bias = np.zeros((size, nodes_wide))
+            response = np.ones((size, nodes_wide))
+            act = np.full((size, nodes_wide), IDENTITY, dtype=np.intp)
+            for g, nodes in enumerate(per_genome):
+                for j, (node, depth, code, b, r, links) in enumerate(nodes):
+                    columns[g][node] = offset + j
+                    bias[g, j] = b
+                    response[g, j] = r
+                    act[g, j] = code
+                    for l, (i, w) in enumerate(links):
+                        src[g, j, l] = columns[g][i]
+                        weight[g, j, l] = w
+            codes = np.unique(act)
+            layers.append((src, weight, bias, response, act, codes))
+            offset += nodes_wide
+
+        outputs = np.array([[columns[g].get(k, zero_col) for k in genome_config.output_keys]
+                            for g in range(size)], dtype=np.intp).reshape(size, -1)
+        return cls(layers, outputs, num_inputs)
+
+    def take(self, rows):
+        """A PopulationNetwork holding only the networks at `rows`"""
+        layers = []
+        for src, weight, bias, response, act, codes in self.layers:
+            act = act[rows]
+            layers.append((src[rows], weight[rows], bias[rows], response[rows], act, np.unique(act)))
+        return PopulationNetwork(layers, self.outputs[rows], self.num_inputs)
+
+    def activate(self, inputs, rows=None):
+        """
+        Outputs for one input row per network, shape (rows, num_outputs).
+        If `rows` is given only those networks are run; the compacted subset is
+        cached until a different rows array is passed.
+        """
+        if rows is not None and len(rows) != self.size:
+            if rows is not self._rows:
+                self._rows = rows
+                self._subset = self.take(rows)
+            return self._subset.activate(inputs)
+
+        n = len(inputs)
+        values = np.zeros((n, self.width))
+        values[:, :self.num_inputs] = inputs
+        offset = self.num_inputs + 1
+        for src, weight, bias, response, act, codes in self.layers:
+            nodes_wide = src.shape[1]
+            linked = np.take_along_axis(values, src.reshape(n, -1), axis=1).reshape(src.shape) * weight
+            s = np.zeros((n, nodes_wide))
+            for l in range(linked.shape[2]):
+                s += linked[:, :, l]
+            z = bias + response * s
+            if len(codes) == 1:
+                out = ACTIVATIONS[ACTIVATION_NAMES[codes[0]]](z)
+            else:
+                out = np.empty_like(z)
+                for code in codes:
+                    mask = act == code
+                    out[mask] = ACTIVATIONS[ACTIVATION_NAMES[code]](z[mask])
+            values[:, offset:offset + nodes_wide] = out
+            offset += nodes_wide
+        return np.take_along_axis(values, self.outputs, axis=1)
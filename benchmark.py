@@ -0,0 +1,289 @@
+# Throughput benchmarks for training: simulation speed, generations per minute,
+# a small sweep and startup time. Results can be saved as a baseline and later
+# runs are compared against it.
+#
+#   python benchmark.py --save-baseline     # record benchmark_baseline.json
+#   python benchmark.py                     # compare, exit code 1 on a regression
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import neat
+import numpy as np
+
+import research_study as rs
+from batched_network import NETWORK_CACHE
+
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(LOCAL_DIR, 'config-feedforward.txt')
+BASELINE_FILE = os.path.join(LOCAL_DIR, 'benchmark_baseline.json')
+
+SEED = 1234                 # seeds both the initial population and the pipe course
+WARMUP_GENERATIONS = 5      # evolve a little first, so the networks are not all trivial
+POPULATION_SIZES = [50, 150, 500]
+WINDOW_SIZE = 150
+PIPE_DISTANCE = 400
+FRAME_LIMIT = 3000
+SWEEP_GENERATIONS = 20      # per sweep experiment, also with --quick, so the sweep lasts long enough to time
+MIN_SECONDS = 2.0           # keep repeating an evaluation for at least this long
+TOLERANCE = 0.15            # relative slowdown that counts as a regression
+MIN_SLOWDOWN_S = 0.1        # ... and, for metrics in seconds, the least absolute slowdown that does
+
+# Whether a larger value of a metric is better, by unit suffix
+HIGHER_IS_BETTER = {'per_s': True, 'per_min': True, 's': False}
+# Metrics with these unit suffixes describe a run but are never regressions
+INFORMATIONAL = ('pct',)
+
+
+def benchmark_config_dict(**overrides):
+    """RESEARCH_CONFIG with everything that writes files or prints switched off"""
+    config_dict = dict(rs.RESEARCH_CONFIG, frame_limit=FRAME_LIMIT, course_seed=SEED, show_graphics=False,
+                       print_progress=False, use_multiprocessing=False, eval_processes=1,
+                       checkpoint_dir=None, study_dir=None, telemetry_dir=None, replay_dir=None,
+                       results_db=None, profile_phases=False)
+    config_dict.update(overrides)
+    return config_dict
+
+
+@contextlib.contextmanager
+def neat_config_file(pop_size):
+    """config-feedforward.txt with its pop_size replaced"""
+    with open(CONFIG_FILE) as f:
+        lines = [f'pop_size              = {pop_size}\n' if line.startswith('pop_size') else line for line in f]
+    fd, path = tempfile.mkstemp(suffix='.txt')
+    with os.fdopen(fd, 'w') as f:
+        f.writelines(lines)
+    try:
+        yield path
+    finally:
+        os.remove(path)
+
+
+def load_neat_config(path):
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
+                              neat.DefaultSpeciesSet, neat.DefaultStagnation, path)
+
+
+def seeded_population(config, config_dict):
+    """The same population every time: seeded, then evolved for WARMUP_GENERATIONS"""
+    random.seed(SEED)
+    p = neat.Population(config)
+    for _ in range(WARMUP_GENERATIONS):
+        p.run(lambda genomes, config: rs.eval_genomes(genomes, config, None, config_dict), 1)
+    return list(p.population.items())
+
+
+def best_of(repeats, fn, min_seconds=0.0):
+    """
+    Wall times of at least `repeats` calls of fn, repeating until min_seconds
+    have passed; the minimum is the least noisy estimate
+    """
+    times = []
+    while len(times) < repeats or sum(times) < min_seconds:
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_evaluation(pop_size, repeats):
+    """Frames, bird-frames and genomes per second for one generation of a fixed population"""
+    # The repeats evaluate the same genomes on the same course, which the fitness cache would answer
+    config_dict = benchmark_config_dict(fitness_cache_size=0)
+    rs.Pipes.WINDOW = WINDOW_SIZE
+    rs.Pipes.PIPE_DISTANCE = PIPE_DISTANCE
+    with neat_config_file(pop_size) as path:
+        config = load_neat_config(path)
+    genomes = seeded_population(config, config_dict)
+
+    rs.eval_genomes(genomes, config, None, config_dict)
+    death_frame = rs.Game.generation_death_frames
+    frames = FRAME_LIMIT if (death_frame < 0).any() else int(death_frame.max())
+    bird_frames = int(np.where(death_frame < 0, frames, death_frame).sum())
+
+    # Every repeat builds its networks again, as a generation of new genomes would
+    def evaluate():
+        NETWORK_CACHE.clear()
+        rs.eval_genomes(genomes, config, None, config_dict)
+
+    seconds = min(best_of(repeats, evaluate, MIN_SECONDS))
+    rs.Game.generation_scores = []
+    return {
+        f'frames_per_s[pop={pop_size}]': frames / seconds,
+        f'bird_frames_per_s[pop={pop_size}]': bird_frames / seconds,
+        f'genomes_per_s[pop={pop_size}]': len(genomes) / seconds,
+    }
+
+
+def bench_generations(pop_size, generations, repeats):
+    """Generations per minute of run_experiment_core, including reproduction"""
+    config_dict = benchmark_config_dict(max_generations=generations, target_scores=[10 ** 9])
+
+    # Every repeat evolves the same population from scratch
+    def evolve():
+        random.seed(SEED)
+        NETWORK_CACHE.clear()
+        rs.Game.fitness_cache = None
+        rs.run_experiment_core(WINDOW_SIZE, PIPE_DISTANCE, path, config_dict)
+
+    with neat_config_file(pop_size) as path:
+        seconds = min(best_of(repeats, evolve, MIN_SECONDS))
+    # Genomes the fitness cache answers never reach the network cache, so this
+    # is informational: it moves with the fitness cache's hit rate
+    lookups = NETWORK_CACHE.hits + NETWORK_CACHE.misses
+    return {f'generations_per_min[pop={pop_size}, {generations} generations]': 60 * generations / seconds,
+            f'network_cache_hit_pct[pop={pop_size}, {generations} generations]':
+                100 * NETWORK_CACHE.hits / lookups if lookups else 0.0}
+
+
+def bench_sweep(processes, generations, repeats):
+    """Wall time of run_research_study over a small grid"""
+    saved = dict(rs.RESEARCH_CONFIG)
+    with tempfile.TemporaryDirectory() as tmp:
+        rs.RESEARCH_CONFIG.update(benchmark_config_dict(
+            window_sizes=[150, 200], pipe_distances=[300, 500], runs_per_config=1,
+            max_generations=generations, target_scores=[10, 20, 10 ** 9],
+            use_multiprocessing=processes > 1, num_processes=processes,
+            results_file=os.path.join(tmp, 'results.csv')))
+
+        def sweep():
+            random.seed(SEED)
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                rs.run_research_study()
+
+        try:
+            seconds = min(best_of(repeats, sweep, MIN_SECONDS))
+        finally:
+            rs.RESEARCH_CONFIG.clear()
+            rs.RESEARCH_CONFIG.update(saved)
+    return {f'sweep_s[4 cells, {generations} generations, {processes} processes]': seconds}
+
+
+def bench_startup(repeats):
+    """Time for a fresh interpreter to import research_study"""
+    command = [sys.executable, '-c', 'import research_study']
+    times = best_of(repeats, lambda: subprocess.run(command, cwd=LOCAL_DIR, check=True,
+                                                    stdout=subprocess.DEVNULL), MIN_SECONDS)
+    return {'startup_s': min(times)}
+
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def higher_is_better(metric):
+    unit = metric.split('[')[0]
+    for suffix, higher in HIGHER_IS_BETTER.items():
+        if unit.endswith(suffix):
+            return higher
+    return True
+
+
+def best_metrics(metrics, other):
+    """The better value of each metric of two runs"""
+    return dict((metric, (max if higher_is_better(metric) else min)(value, other[metric]))
+                for metric, value in metrics.items())
+
+
+def compare(metrics, baseline, tolerance):
+    """Lines comparing each metric with the baseline, and the metrics that regressed"""
+    lines = []
+    regressions = []
+    for metric, value in metrics.items():
+        base = baseline.get(metric)
+        if base is None:
+            lines.append(f"  {metric:50s} {value:14.2f}   (no baseline)")
+            continue
+        if base == 0 or metric.split('[')[0].endswith(INFORMATIONAL):
+            lines.append(f"  {metric:50s} {value:14.2f}   baseline {base:14.2f}")
+            continue
+        # Positive change is always an improvement
+        change = (value - base) / base if higher_is_better(metric) else (base - value) / base
+        # Timer noise alone is a large share of a short time
+        noise = not higher_is_better(metric) and value - base < MIN_SLOWDOWN_S
+        flag = ''
+        if change < -tolerance and not noise:
+            flag = '  REGRESSION'
+            regressions.append(metric)
+        lines.append(f"  {metric:50s} {value:14.2f}   baseline {base:14.2f}   {100 * change:+6.1f}%{flag}")
+    return lines, regressions
+
+
+def run_benchmarks(population_sizes, repeats, generations, processes):
+    metrics = {}
+    for pop_size in population_sizes:
+        print(f"Evaluation, population {pop_size}...")
+        metrics.update(bench_evaluation(pop_size, repeats))
+        print(f"Evolution, population {pop_size}...")
+        metrics.update(bench_generations(pop_size, generations, repeats))
+    print("Sweep...")
+    metrics.update(bench_sweep(processes, SWEEP_GENERATIONS, repeats))
+    print("Startup...")
+    metrics.update(bench_startup(repeats))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Training throughput benchmarks")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="allowed relative slowdown")
+    parser.add_argument('--quick', action='store_true', help="one small population and fewer repeats")
+    parser.add_argument('--processes', type=int, default=1, help="processes for the sweep benchmark")
+    parser.add_argument('--output', help="also write this run's results to a JSON file")
+    args = parser.parse_args()
+
+    population_sizes = POPULATION_SIZES[:1] if args.quick else POPULATION_SIZES
+    repeats = 3 if args.quick else 5
+    generations = 5 if args.quick else 20
+
+    baseline = None
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    metrics = run_benchmarks(population_sizes, repeats, generations, args.processes)
+    regressions = []
+    if baseline is not None and compare(metrics, baseline['metrics'], args.tolerance)[1]:
+        # A busy machine slows a whole run down; a regression has to show up in a second run too
+        print("\nSlower than the baseline, running again to confirm...")
+        metrics = best_metrics(metrics, run_benchmarks(population_sizes, repeats, generations, args.processes))
+    results = {'machine': machine_info(), 'seed': SEED, 'frame_limit': FRAME_LIMIT, 'metrics': metrics}
+
+    print()
+    if baseline is None:
+        for metric, value in metrics.items():
+            print(f"  {metric:50s} {value:14.2f}")
+    else:
+        if baseline.get('machine') != results['machine']:
+            print("Note: the baseline was recorded on a different machine or environment")
+        lines, regressions = compare(metrics, baseline['metrics'], args.tolerance)
+        print('\n'.join(lines))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {100 * args.tolerance:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import itertools
+import copy
+import neat
+
+from storage import atomic_save
+
+# Settings that decide what a sweep computes; a rerun with the same values
+# resumes the sweep, any change starts a new one
+SWEEP_KEYS = ('window_sizes', 'pipe_distances', 'target_scores', 'max_generations', 'runs_per_config',
+              'frame_limit', 'fitness_reward_alive', 'fitness_reward_pipe', 'fitness_penalty_collision',
+              'course_seed', 'decision_interval', 'decision_hold', 'eval_courses', 'fitness_aggregate',
+              'sweep_mode', 'halving_eta', 'halving_min_generations')
+
+
+def decode_result(result):
+    """An experiment's result as run_single_experiment_mp returned it, from its JSON form"""
+    results = result['results']
+    if results is not None:
+        # JSON object keys are strings, the tracker uses the target scores themselves
+        results['generations_to_reach'] = {int(score): gens for score, gens
+                                           in results['generations_to_reach'].items()}
+    return result
+
+
+def _peek_counter(counter):
+    """Next value of an itertools.count, and a fresh counter that will still produce it"""
+    value = next(counter)
+    return value, itertools.count(value)
+
+
+def population_state(p):
+    """
+    Picklable snapshot of a neat.Population between generations.
+
+    Counters are saved as plain integers and reporters are left out, so the
+    snapshot does not depend on pickling itertools.count or on our own classes.
+    """
+    genome_key, p.reproduction.genome_indexer = _peek_counter(p.reproduction.genome_indexer)
+    species_key, p.species.indexer = _peek_counter(p.species.indexer)
+    # New hidden nodes are numbered by a counter on the shared genome config
+    genome_config = p.config.genome_config
+    node_key = None
+    if genome_config.node_indexer is not None:
+        node_key, genome_config.node_indexer = _peek_counter(genome_config.node_indexer)
+    species = copy.copy(p.species)
+    species.reporters = None
+    species.indexer = None
+    return {
+        'population': p.population,
+        'species': species,
+        'generation': p.generation,
+        'best_genome': p.best_genome,
+        'ancestors': p.reproduction.ancestors,
+        'genome_key': genome_key,
+        'species_key': species_key,
+        'node_key': node_key,
+    }
+
+
+def restore_population(config, state):
+    """Rebuild the neat.Population saved by population_state"""
+    species = state['species']
+    p = neat.Population(config, (state['population'], species, state['generation']))
+    species.reporters = p.reporters
+    species.indexer = itertools.count(state['species_key'])
+    p.reproduction.genome_indexer = itertools.count(state['genome_key'])
+    p.reproduction.ancestors = state['ancestors']
+    p.best_genome = state['best_genome']
+    if state['node_key'] is not None:
+        config.genome_config.node_indexer = itertools.count(state['node_key'])
+    return p
+
+
+def save_state(path, state):
+    """Pickle state to path atomically: a crash leaves either the old or the new file"""
+    with atomic_save(path) as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_state(path):
+    """The state saved at path, or None if there is none"""
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+def experiment_path(study_dir, window_size, pipe_distance, run_number):
+    """Checkpoint file of one experiment in a sweep, or None when checkpointing is off"""
+    if study_dir is None:
+        return None
+    return os.path.join(study_dir, 'experiment_W%d_D%d_R%d.pkl' % (window_size, pipe_distance, run_number))
+
+
+def sweep_id(config_dict, config_file):
+    """Short hash of the sweep settings and the NEAT config file"""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([config_dict.get(key) for key in SWEEP_KEYS]).encode())
+    with open(config_file, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class SweepCheckpoint:
+    """
+    Crash-safe progress of one research sweep, kept in checkpoint_dir/study_<id>.
+
+    Every finished experiment is appended to completed.jsonl and synced to disk
+    before the sweep moves on, and experiments in flight save their population
+    every few generations next to it. Rerunning the same sweep picks up the
+    finished results and the saved populations instead of starting over.
+    """
+
+    def __init__(self, checkpoint_dir, config_dict, config_file):
+        self.path = os.path.join(checkpoint_dir, 'study_' + sweep_id(config_dict, config_file))
+        self.journal_path = os.path.join(self.path, 'completed.jsonl')
+        meta_path = os.path.join(self.path, 'sweep.json')
+
+        self.resumed = os.path.exists(meta_path)
+        if self.resumed:
+            with open(meta_path) as f:
+                self.results_file = json.load(f)['results_file']
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            self.results_file = config_dict['results_file']
+            meta = {'results_file': self.results_file}
+            meta.update((key, config_dict.get(key)) for key in SWEEP_KEYS)
+            with atomic_save(meta_path, 'w') as f:
+                json.dump(meta, f, indent=2)
+        self._trim_journal()
+
+    def _trim_journal(self):
+        """Drop a last line left unfinished by a crash, so new entries start on a line of their own"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def experiment_path(self, window_size, pipe_distance, run_number):
+        return experiment_path(self.path, window_size, pipe_distance, run_number)
+
+    def results(self):
+        """Yield the finished experiments in the order they were recorded"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # an entry cut short by a crash; that experiment simply runs again
+                yield decode_result(result)
+
+    def completed(self):
+        """Keys (window_size, pipe_distance, run_number) of the finished experiments"""
+        return set((r['window_size'], r['pipe_distance'], r['run_number']) for r in self.results())
+
+    def record(self, result):
+        """Durably mark an experiment as finished and drop its population checkpoint"""
+        entry = dict((key, result[key]) for key in ('window_size', 'pipe_distance', 'run_number', 'results'))
+        with open(self.journal_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        path = self.experiment_path(result['window_size'], result['pipe_distance'], result['run_number'])
+        if os.path.exists(path):
+            os.remove(path)
+
+    def finish(self):
+        """The sweep is done and its results are saved; nothing is left to resume"""
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,93 @@
+import functools
+import numpy as np
+
+
+def overlap_table(bird, pipe):
+    """
+    For every integer offset (dx, dy) of the pipe mask relative to the bird mask,
+    whether the two masks share a set pixel. Indexed [dy + pipe_h - 1, dx + pipe_w - 1].
+    """
+    bird_h, bird_w = bird.shape
+    pipe_h, pipe_w = pipe.shape
+    shape = (bird_h + pipe_h - 1, bird_w + pipe_w - 1)
+    # Cross-correlation through the FFT; the overlap counts are integers so a 0.5
+    # threshold is exact
+    counts = np.fft.irfft2(np.fft.rfft2(bird, shape) * np.conj(np.fft.rfft2(pipe, shape)), shape)
+    counts = np.roll(counts, (pipe_h - 1, pipe_w - 1), axis=(0, 1))
+    return counts > 0.5
+
+
+def mask_array(surface):
+    """Pixel mask of a pygame surface as a boolean array, same threshold as pygame.mask.from_surface"""
+    import pygame
+    mask = pygame.mask.from_surface(surface)
+    width, height = mask.get_size()
+    return np.array([[mask.get_at((x, y)) for x in range(width)] for y in range(height)], dtype=bool)
+
+
+class CollisionGeometry:
+    """
+    Precomputed bird-vs-pipe collision geometry.
+
+    Overlap tables for every (bird frame, pipe image) pair are built once from
+    the sprite masks, so a collision test is a table lookup that gives the same
+    answer as bird_mask.overlap(pipe_mask, offset) in Game.collision_detected.
+    """
+
+    def __init__(self, bird_masks, pipe_top_mask, pipe_bottom_mask):
+        self.bird_height, self.bird_width = bird_masks[0].shape
+        self.pipe_height, self.pipe_width = pipe_bottom_mask.shape
+        self.top_tables = np.array([overlap_table(m, pipe_top_mask) for m in bird_masks])
+        self.bottom_tables = np.array([overlap_table(m, pipe_bottom_mask) for m in bird_masks])
+
+    @classmethod
+    def from_surfaces(cls, bird_imgs, pipe_top_img, pipe_bottom_img):
+        return cls([mask_array(img) for img in bird_imgs], mask_array(pipe_top_img), mask_array(pipe_bottom_img))
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def from_rects(cls, bird_size, pipe_size):
+        """Geometry for fully opaque rectangular sprites, e.g. the headless dummy surfaces"""
+        bird = np.ones(bird_size[::-1], dtype=bool)
+        pipe = np.ones(pipe_size[::-1], dtype=bool)
+        return cls([bird], pipe, pipe)
+
+    def pipe_offset(self, pipe_x, bird_x):
+        """Integer x offset of a pipe relative to the bird column, truncated like pygame does"""
+        return int(pipe_x - bird_x)
+
+    def in_column(self, pipe_x, bird_x):
+        """Broadphase: can a pipe at pipe_x overlap birds at bird_x at all"""
+        dx = self.pipe_offset(pipe_x, bird_x)
+        return -self.pipe_width < dx < self.bird_width
+
+    def hits(self, frames, y, pipe_x, pipe_top, pipe_bottom, bird_x):
+        """
+        Which birds hit the pipe. `frames` is the bird image index of each bird
+        (or one index for all) and `y` the bird heights; all birds share bird_x.
+        """
+        y = np.asarray(y)
+        dx = self.pipe_offset(pipe_x, bird_x)
+        if not -self.pipe_width < dx < self.bird_width:
+            return np.zeros(y.shape, dtype=bool)
+        col = dx + self.pipe_width - 1
+        ry = np.round(y).astype(np.int64)
+        return (self._lookup(self.top_tables, frames, pipe_top - ry, col) |
+                self._lookup(self.bottom_tables, frames, pipe_bottom - ry, col))
+
+    def hits_columns(self, frames, y, pipe_x, pipe_top, pipe_bottom, bird_x):
+        """
+        hits() for several pipe positions at once: column j of the 2-D `y` is
+        tested against the pipe at pipe_x[j], pipe_top[j], pipe_bottom[j].
+        Every pipe must be in the bird column (see in_column).
+        """
+        dx = np.asarray(pipe_x, dtype=float) - bird_x
+        col = dx.astype(np.int64) + self.pipe_width - 1  # astype truncates toward zero like int()
+        ry = np.round(y).astype(np.int64)
+        return (self._lookup(self.top_tables, frames, np.asarray(pipe_top) - ry, col) |
+                self._lookup(self.bottom_tables, frames, np.asarray(pipe_bottom) - ry, col))
+
+    def _lookup(self, tables, frames, dy, col):
+        row = dy + self.pipe_height - 1
+        valid = (row >= 0) & (row < tables.shape[1])
+        return valid & tables[frames, np.where(valid, row, 0), col]
@@ -0,0 +1,132 @@
+import os
+import random
+from collections import OrderedDict
+import numpy as np
+
+from storage import atomic_save
+from game_core import CONCURRENT_PIPES, FIRST_PIPE_X, PIPE_VEL, PIPE_MIN_HEIGHT, PIPE_MAX_HEIGHT, PIPE_SIZE
+
+COURSE_CACHE_DIR = '.course_cache'
+MEMORY_CACHE_SIZE = 64
+
+_memory_cache = OrderedDict()
+
+
+class Course:
+    """
+    A precomputed pipe course: pipe k has height heights[k] and starts at x0[k].
+
+    Pipes move at a constant PIPE_VEL, so every position is a closed-form
+    function of the pipe index and the frame; no per-pipe objects are needed.
+    The course grows on demand, and since heights are drawn in order from one
+    seeded generator, a longer course always starts with the shorter one.
+    """
+
+    def __init__(self, seed, pipe_distance, heights, cache_dir=None):
+        self.seed = seed
+        self.pipe_distance = pipe_distance
+        self.heights = heights
+        self.cache_dir = cache_dir
+
+    def __len__(self):
+        return len(self.heights)
+
+    @property
+    def x0(self):
+        return FIRST_PIPE_X + np.arange(len(self.heights), dtype=np.int64) * self.pipe_distance
+
+    def height(self, k):
+        if k >= len(self.heights):
+            longer = get_course(self.seed, self.pipe_distance, max(k + 1, 2 * len(self.heights)), self.cache_dir)
+            self.heights = longer.heights
+        return int(self.heights[k])
+
+    def pipe_x(self, k, frame):
+        """x position of pipe k after `frame` moves"""
+        return FIRST_PIPE_X + k * self.pipe_distance - PIPE_VEL * frame
+
+    def active_pipe(self, frame, bird_x, pipe_width):
+        """Index of the first pipe whose right edge is still ahead of bird_x after `frame` moves"""
+        # pipe_x(k) + pipe_width > bird_x, solved for k in half pixels so it stays exact
+        behind = 2 * (bird_x - pipe_width - FIRST_PIPE_X) + int(2 * PIPE_VEL) * frame
+        if behind < 0:
+            return 0
+        return behind // (2 * self.pipe_distance) + 1
+
+    def pass_frame(self, k, bird_x, pipe_width):
+        """First frame after which the right edge of pipe k is behind bird_x"""
+        # pipe_x(k) + pipe_width < bird_x, solved for the frame in half pixels
+        ahead = 2 * (FIRST_PIPE_X + k * self.pipe_distance + pipe_width - bird_x)
+        return ahead // int(2 * PIPE_VEL) + 1
+
+    def passes(self, frames, bird_x, pipe_width):
+        """Pipes passed in the first `frames` frames, counted like PopulationSimulator.step: one per frame at most"""
+        count = 0
+        frame = 0
+        while True:
+            frame = max(self.pass_frame(count, bird_x, pipe_width), frame + 1)
+            if frame > frames:
+                return count
+            count += 1
+
+    def column_frames(self, k, bird_x, bird_width, pipe_width):
+        """
+        First and last frame at which pipe k overlaps the bird column, i.e.
+        -pipe_width < int(pipe_x(k) - bird_x) < bird_width
+        """
+        offset = 2 * (FIRST_PIPE_X + k * self.pipe_distance - bird_x)
+        step = int(2 * PIPE_VEL)
+        first = (offset - 2 * bird_width) // step + 1
+        last = -((-offset - 2 * pipe_width) // step) - 1  # ceil((offset + 2 * pipe_width) / step) - 1
+        return first, last
+
+
+def course_length(pipe_distance, frame_limit, pipe_width=PIPE_SIZE[0]):
+    """Number of pipe heights a course needs to last frame_limit frames"""
+    removed = (PIPE_VEL * frame_limit - FIRST_PIPE_X - pipe_width) / pipe_distance
+    return CONCURRENT_PIPES + max(0, int(removed) + 1)
+
+
+def generate_heights(seed, length):
+    rng = random.Random(seed)
+    return np.array([rng.randrange(PIPE_MIN_HEIGHT, PIPE_MAX_HEIGHT) for _ in range(length)], dtype=np.int16)
+
+
+def get_course(seed, pipe_distance, length, cache_dir=None):
+    """
+    The course for (seed, pipe_distance) with at least `length` pipes.
+
+    Courses are kept in a small in-memory LRU cache and, when cache_dir is
+    given, in .npy files that later runs and other processes map read-only.
+    """
+    key = (seed, pipe_distance)
+    course = _memory_cache.get(key)
+    if course is not None and len(course) >= length:
+        _memory_cache.move_to_end(key)
+        return course
+
+    heights = None
+    path = None
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, 'course_%s_%d.npy' % (seed, pipe_distance))
+        if os.path.exists(path):
+            heights = np.load(path, mmap_mode='r')
+            if len(heights) < length:
+                heights = None
+
+    if heights is None:
+        heights = generate_heights(seed, length)
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            with atomic_save(path) as f:
+                np.save(f, heights)
+            heights = np.load(path, mmap_mode='r')
+        else:
+            heights.setflags(write=False)
+
+    course = Course(seed, pipe_distance, heights, cache_dir)
+    _memory_cache[key] = course
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+    return course
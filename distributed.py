@@ -0,0 +1,280 @@
+# Distributed sweeps: a coordinator hands the sweep's experiments to worker
+# processes over TCP and collects their results. Workers can run on any
+# machine that has this repository and can reach the coordinator.
+#
+#   python research_study.py                       # with DISTRIBUTED = True, runs the coordinator
+#   python distributed.py COORDINATOR_HOST 5757    # on each node, one per core to use
+#
+# The protocol is one JSON object per line. A worker says hello and gets the
+# sweep's config, then asks for experiments one at a time, sends a heartbeat
+# while it runs one and sends back the result. Each experiment handed out is
+# leased to its worker: when the worker disconnects, or sends no heartbeat for
+# LEASE_SECONDS, the experiment goes back to the queue for another worker.
+# Only the first result of an experiment counts, so an experiment run twice
+# after a reassignment still gives one result. A failure only counts when no
+# other worker is still to run the experiment.
+#
+# Workers write checkpoints, telemetry and replays themselves, to the
+# coordinator's directories as absolute paths, so workers on other machines
+# need them on shared storage mounted at the same path.
+import os
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+import multiprocessing as mp
+from collections import deque
+
+from checkpoint import decode_result
+
+DEFAULT_PORT = 5757
+WAIT_SECONDS = 1.0  # how long a worker waits before asking again while every experiment is leased
+
+
+def _send(stream, message):
+    stream.write(json.dumps(message) + '\n')
+    stream.flush()
+
+
+def _receive(stream):
+    line = stream.readline()
+    if not line:
+        raise ConnectionError('connection closed')
+    return json.loads(line)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One worker connection"""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = '%s:%d' % self.client_address
+        try:
+            for line in self.rfile:
+                message = json.loads(line)
+                kind = message['type']
+                if kind == 'hello':
+                    worker = '%s (%s:%d)' % ((message.get('worker'),) + self.client_address)
+                    self.reply({'type': 'config', 'config': coordinator.worker_config,
+                                'heartbeat': coordinator.lease_seconds / 3})
+                elif kind == 'request':
+                    experiment = coordinator.lease(worker)
+                    if experiment is None:
+                        self.reply({'type': 'done'})
+                    elif experiment == 'wait':
+                        self.reply({'type': 'wait', 'seconds': WAIT_SECONDS})
+                    else:
+                        self.reply({'type': 'experiment', 'experiment': list(experiment)})
+                elif kind == 'heartbeat':
+                    coordinator.renew(worker, tuple(message['experiment']))
+                elif kind == 'result':
+                    duplicate = not coordinator.complete(worker, decode_result(message['result']))
+                    self.reply({'type': 'ack', 'duplicate': duplicate})
+        except (ConnectionError, ValueError, KeyError):
+            pass  # a worker that disconnects or talks nonsense is dropped; its experiments are released below
+        finally:
+            coordinator.release(worker)
+
+    def reply(self, message):
+        self.wfile.write((json.dumps(message) + '\n').encode())
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator:
+    """
+    Serves `experiments`, (window_size, pipe_distance, run_number) tuples
+    handed out in order, to workers connecting on (host, port), and sends each
+    worker `worker_config` as the config_dict to run them with. Iterating over
+    the coordinator yields one result per experiment, in the form
+    run_single_experiment_mp returns, as they come in.
+    """
+
+    def __init__(self, experiments, worker_config, host='127.0.0.1', port=DEFAULT_PORT, lease_seconds=120):
+        self.pending = deque(experiments)
+        self.total = len(self.pending)
+        self.worker_config = worker_config
+        self.lease_seconds = lease_seconds
+        self.leases = {}  # experiment -> (worker, deadline)
+        self.finished = set()
+        self.reassigned = 0
+        self.duplicates = 0
+        self.results = queue.Queue()
+        self.lock = threading.Lock()
+        self.server = _Server((host, port), _Handler)
+        self.server.coordinator = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def _requeue(self, experiment):
+        del self.leases[experiment]
+        self.pending.appendleft(experiment)
+        self.reassigned += 1
+
+    def _expire(self):
+        now = time.monotonic()
+        for experiment, (worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                self._requeue(experiment)
+
+    def lease(self, worker):
+        """The next experiment for `worker`; 'wait' while all are leased, None when all are finished"""
+        with self.lock:
+            self._expire()
+            while self.pending:
+                experiment = self.pending.popleft()
+                if experiment not in self.finished and experiment not in self.leases:
+                    self.leases[experiment] = (worker, time.monotonic() + self.lease_seconds)
+                    return experiment
+            return 'wait' if len(self.finished) < self.total else None
+
+    def renew(self, worker, experiment):
+        with self.lock:
+            if self.leases.get(experiment, (None,))[0] == worker:
+                self.leases[experiment] = (worker, time.monotonic() + self.lease_seconds)
+
+    def complete(self, worker, result):
+        """
+        Take a worker's result; returns False if it is dropped: the experiment
+        already has a result, or the result is a failure while the experiment
+        is leased to or queued for another worker, whose run decides instead
+        """
+        experiment = (result['window_size'], result['pipe_distance'], result['run_number'])
+        with self.lock:
+            if experiment in self.finished:
+                self.duplicates += 1
+                return False
+            if not result['success']:
+                owner = self.leases.get(experiment, (None,))[0]
+                if owner not in (None, worker) or (owner is None and experiment in self.pending):
+                    self.duplicates += 1
+                    return False
+            self.finished.add(experiment)
+            self.leases.pop(experiment, None)
+        self.results.put(result)
+        return True
+
+    def release(self, worker):
+        """A worker is gone: its experiments go back to the queue"""
+        with self.lock:
+            for experiment, (owner, deadline) in list(self.leases.items()):
+                if owner == worker:
+                    self._requeue(experiment)
+
+    def __iter__(self):
+        received = 0
+        while received < self.total:
+            try:
+                result = self.results.get(timeout=1.0)
+            except queue.Empty:
+                # Leases of silent workers expire even when no one asks for work
+                with self.lock:
+                    self._expire()
+                continue
+            received += 1
+            yield result
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _heartbeat(stream, send_lock, experiment, interval, stop):
+    while not stop.wait(interval):
+        with send_lock:
+            try:
+                _send(stream, {'type': 'heartbeat', 'experiment': list(experiment)})
+            except (OSError, ValueError):
+                return
+
+
+def run_worker(host, port=DEFAULT_PORT, name=None, linger=30.0):
+    """
+    Run experiments for the coordinator at (host, port) until it has none
+    left. A worker keeps trying to reach a coordinator for `linger` seconds,
+    so one started early or kept between successive-halving rounds waits for
+    the next sweep instead of exiting.
+    """
+    import research_study
+
+    name = name or '%s-%d' % (socket.gethostname(), os.getpid())
+    research_study.init_worker()
+    deadline = time.monotonic() + linger
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+        except OSError:
+            if time.monotonic() >= deadline:
+                return
+            time.sleep(1.0)
+            continue
+        with connection, connection.makefile('rw') as stream:
+            send_lock = threading.Lock()
+            try:
+                with send_lock:
+                    _send(stream, {'type': 'hello', 'worker': name})
+                hello = _receive(stream)
+                config_dict = hello['config']
+                while True:
+                    with send_lock:
+                        _send(stream, {'type': 'request'})
+                    reply = _receive(stream)
+                    if reply['type'] == 'done':
+                        break
+                    if reply['type'] == 'wait':
+                        time.sleep(reply['seconds'])
+                        continue
+                    experiment = tuple(reply['experiment'])
+                    stop = threading.Event()
+                    beat = threading.Thread(target=_heartbeat, daemon=True,
+                                            args=(stream, send_lock, experiment, hello['heartbeat'], stop))
+                    beat.start()
+                    try:
+                        result = research_study.run_single_experiment_mp(experiment + (config_dict,))
+                    finally:
+                        stop.set()
+                        beat.join()
+                    with send_lock:
+                        _send(stream, {'type': 'result', 'result': result})
+                    _receive(stream)
+            except (OSError, ConnectionError, ValueError):
+                pass  # the coordinator went away; any experiment in flight is reassigned by it
+        deadline = time.monotonic() + linger
+        if linger <= 0:
+            return
+
+
+def start_local_workers(count, host, port):
+    """Start `count` worker processes on this machine; they exit once the coordinator is done"""
+    ctx = mp.get_context('spawn')
+    workers = []
+    for i in range(count):
+        worker = ctx.Process(target=run_worker, args=(host, port, 'local-%d' % (i + 1), 0), daemon=True)
+        worker.start()
+        workers.append(worker)
+    return workers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run research sweep experiments for a distributed coordinator')
+    parser.add_argument('host', help='address of the coordinator')
+    parser.add_argument('port', nargs='?', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--name', help='name the coordinator knows this worker by (default host-pid)')
+    parser.add_argument('--linger', type=float, default=30.0,
+                        help='seconds to keep trying to reach a coordinator before exiting')
+    args = parser.parse_args()
+    run_worker(args.host, args.port, args.name, args.linger)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+class Flock:
+    """
+    The birds of one evaluation with their networks, genomes and last flap
+    decisions, kept in parallel lists.
+
+    kill() only clears the bird's entry in the alive mask; compact() then drops
+    every dead bird from the lists in a single pass. A frame costs one pass over
+    the flock however many birds died in it, instead of one list.pop per death.
+    Until compact() runs, dead birds are still in the lists, masked out by alive.
+    """
+
+    def __init__(self, birds, nets, ge):
+        self.birds = birds
+        self.nets = nets
+        self.ge = ge
+        self.jumps = [False] * len(birds)  # last decision of every bird
+        self.alive = np.ones(len(birds), dtype=bool)
+        self.deaths = 0  # dead birds not compacted yet
+
+    def __len__(self):
+        """Number of birds still alive"""
+        return len(self.birds) - self.deaths
+
+    def kill(self, x):
+        if self.alive[x]:
+            self.alive[x] = False
+            self.deaths += 1
+
+    def compact(self):
+        """Drop the dead birds from the lists"""
+        if not self.deaths:
+            return
+        keep = np.flatnonzero(self.alive).tolist()
+        self.birds = [self.birds[x] for x in keep]
+        self.nets = [self.nets[x] for x in keep]
+        self.ge = [self.ge[x] for x in keep]
+        self.jumps = [self.jumps[x] for x in keep]
+        self.alive = np.ones(len(keep), dtype=bool)
+        self.deaths = 0
+
+
+class PipeRing:
+    """
+    The pipes on screen in a fixed-size ring buffer, ordered by x from the
+    `first` slot.
+
+    A pipe that leaves the screen is not removed but recycled behind the last
+    one, and the pipe the birds fly towards is kept as a cursor that only moves
+    forward, so neither needs a scan over the pipes.
+    """
+
+    def __init__(self, pipes):
+        self.pipes = list(pipes)
+        self.first = 0   # slot of the leftmost pipe
+        self.active = 0  # slot of the next pipe whose right edge is ahead of the birds
+        self.width = self.pipes[0].PIPELOW.get_width()
+
+    def __len__(self):
+        return len(self.pipes)
+
+    def __iter__(self):
+        """The pipes from left to right"""
+        size = len(self.pipes)
+        for i in range(size):
+            yield self.pipes[(self.first + i) % size]
+
+    @property
+    def last(self):
+        return self.pipes[(self.first - 1) % len(self.pipes)]
+
+    def next_pipe(self, bird_x):
+        """The leftmost pipe whose right edge is still ahead of bird_x (the leftmost pipe if there is none)"""
+        size = len(self.pipes)
+        for _ in range(size):
+            if self.pipes[self.active].x + self.width > bird_x:
+                return self.pipes[self.active]
+            self.active = (self.active + 1) % size
+        self.active = self.first
+        return self.pipes[self.first]
+
+    def recycle(self, height=None):
+        """
+        Move the leftmost pipe behind the last one, PIPE_DISTANCE further on,
+        with a new height (a random one if height is None)
+        """
+        pipe = self.pipes[self.first]
+        pipe.x = self.last.x + pipe.PIPE_DISTANCE
+        pipe.passed = False
+        if height is None:
+            pipe.set_height()
+        else:
+            pipe.set_height(height)
+        if self.active == self.first:
+            self.active = (self.first + 1) % len(self.pipes)
+        self.first = (self.first + 1) % len(self.pipes)
+
+    def offscreen(self):
+        """Whether the leftmost pipe has left the screen"""
+        return self.pipes[self.first].x + self.width < 0
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+import numpy as np
+
+from batched_network import genome_key
+from collision import CollisionGeometry
+from simulation import FlapRecord
+from game_core import BIRD_X, BIRD_SIZE, PIPE_SIZE
+
+
+def evaluation_context(course, settings, frame_limit):
+    """Everything besides the network that decides a bird's fitness: the course and the simulator settings"""
+    return (course.seed, course.pipe_distance, settings['window'], settings['reward_alive'], settings['reward_pipe'],
+            settings['penalty_collision'], settings['decision_interval'], settings['decision_hold'],
+            settings.get('record_flaps', False), frame_limit)
+
+
+class FitnessCache:
+    """
+    LRU cache of simulated birds: fitness, death frame and, when flaps are
+    recorded, decisions, keyed by the genome's network (genome_key) and the
+    evaluation_context it was simulated in.
+
+    Birds never interact, so a bird's results only depend on its network and
+    the context; a genome evaluated again on the same course (an elite on a
+    fixed COURSE_SEED) or a clone of another genome in the same generation
+    gets exactly the results a simulation would give it. At most `size`
+    birds are kept.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()  # (genome_key, context) -> (fitness, death_frame, decided or None)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.entries[key] = entry
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def evaluation(self, genomes, config, course, settings, frame_limit):
+        return MemoizedEvaluation(self, genomes, config, course, settings, frame_limit)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+class MemoizedEvaluation:
+    """
+    One generation evaluated through a FitnessCache: `todo` are the
+    (genome_id, genome) pairs that still need simulating, one per distinct
+    network that is not cached. Simulate them (in that order) and pass the
+    results to complete().
+    """
+
+    def __init__(self, cache, genomes, config, course, settings, frame_limit):
+        self.cache = cache
+        self.genomes = list(genomes)
+        self.course = course
+        self.settings = settings
+        self.frame_limit = frame_limit
+        context = evaluation_context(course, settings, frame_limit)
+        self.keys = [(genome_key(genome, config), context) for genome_id, genome in self.genomes]
+
+        self.cached = [None] * len(self.genomes)  # cache entry of each genome found in the cache
+        self.source = [None] * len(self.genomes)  # otherwise the position in todo of the genome simulated for it
+        self.todo = []
+        self.todo_keys = []
+        simulated = {}
+        for i, key in enumerate(self.keys):
+            entry = cache.get(key)
+            if entry is not None:
+                self.cached[i] = entry
+            elif key in simulated:
+                self.source[i] = simulated[key]
+            else:
+                self.source[i] = simulated[key] = len(self.todo)
+                self.todo.append(self.genomes[i])
+                self.todo_keys.append(key)
+        self.hits = sum(entry is not None for entry in self.cached)
+        self.clones = len(self.genomes) - self.hits - len(self.todo)
+        cache.hits += self.hits + self.clones
+        cache.misses += len(self.todo)
+
+    @property
+    def hit_rate(self):
+        """Share of the generation that was not simulated"""
+        return (self.hits + self.clones) / len(self.genomes) if self.genomes else 0.0
+
+    def complete(self, fitness, death_frame, record=None):
+        """
+        Set the fitness of every genome from the results of simulating `todo`
+        (fitness and death frame per bird, and the FlapRecord when flaps are
+        recorded) and cache them. Returns the generation's score, death frames
+        and FlapRecord (or None), as simulating the whole generation would.
+        """
+        new = []
+        for j, key in enumerate(self.todo_keys):
+            decided = record.decided(j) if record is not None else None
+            new.append((float(fitness[j]), int(death_frame[j]), decided))
+            self.cache.put(key, new[j])
+
+        entries = []
+        for i, (genome_id, genome) in enumerate(self.genomes):
+            entry = self.cached[i] if self.cached[i] is not None else new[self.source[i]]
+            genome.fitness = entry[0]
+            entries.append(entry)
+
+        deaths = np.array([entry[1] for entry in entries], dtype=np.int64)
+        # A simulation runs until its last bird dies, or to the frame limit
+        end_frame = self.frame_limit if (deaths < 0).any() else int(deaths.max(initial=0))
+        geometry = self.settings.get('geometry') or CollisionGeometry.from_rects(BIRD_SIZE, PIPE_SIZE)
+        score = self.course.passes(end_frame, BIRD_X, geometry.pipe_width)
+
+        flaps = None
+        if self.settings.get('record_flaps', False):
+            flaps = FlapRecord.from_decided([entry[2] for entry in entries], deaths, end_frame,
+                                            self.settings['decision_interval'], self.settings['decision_hold'],
+                                            self.course.seed, self.course.pipe_distance, self.settings['window'])
+        return score, deaths, flaps
@@ -4,11 +4,26 @@ import neat
 import os
 import random
 import math
-from collections import deque
+import numpy as np
+from collision import CollisionGeometry
+from rendering import Renderer
+from entities import Flock, PipeRing
+from batched_network import NETWORK_CACHE
+
+# The decision cadence comes from research_config, so this view flies the
+# birds the way the headless evaluation does
+try:
+    from research_config import DECISION_INTERVAL, DECISION_HOLD
+except ImportError:
+    DECISION_INTERVAL = 1
+    DECISION_HOLD = False
 
 WIN_WIDTH = 600
 WIN_HEIGHT = 800
 CONCURRENT_PIPES = 3  
+TURBO = False                  # Start in turbo mode: run uncapped and draw only some frames (T switches at runtime)
+TURBO_RENDER_FRAMES = 30       # In turbo mode, draw every Nth frame (+/- double or halve it)
+TURBO_RENDER_GENERATIONS = 1   # In turbo mode, draw only every Nth generation
 
 pygame.init()
 pygame.font.init()  
@@ -23,6 +38,7 @@ BIRD_IMGS = [pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "
 PIPE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "pipe.png")))
 BASE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "base.png")))
 BG_IMG = pygame.transform.scale(pygame.image.load(os.path.join("assets", "bg.png")).convert_alpha(), (600, 900))
+RENDERER = Renderer(win, BG_IMG, STAT_FONT)
 
 gen = 0
 
@@ -30,20 +46,62 @@ class Game:
     score = 0
     max_score = 0  
 
+    @staticmethod
     def collision_detected(bird, pipe):
-        bird_mask = bird.get_mask()
-        top_mask = pygame.mask.from_surface(pipe.PIPEHIGH)
-        bottom_mask = pygame.mask.from_surface(pipe.PIPELOW)
-        top_offset = (pipe.x - bird.x, pipe.top - round(bird.y))
-        bottom_offset = (pipe.x - bird.x, pipe.bottom - round(bird.y))
-
-        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
-        t_point = bird_mask.overlap(top_mask, top_offset)
-
-        if b_point or t_point:
+        return bool(COLLISION.hits(Bird.IMGS.index(bird.img), bird.y, pipe.x, pipe.top, pipe.bottom, bird.x))
+
+    @staticmethod
+    def birds_hit(birds, pipe):
+        """Test every bird against one pipe in a single batch (all birds share the same x)"""
+        frames = [Bird.IMGS.index(bird.img) for bird in birds]
+        return COLLISION.hits(frames, [bird.y for bird in birds], pipe.x, pipe.top, pipe.bottom, birds[0].x)
+
+class View:
+    """
+    How training is shown, switched with keys while it runs:
+    T turbo/watch, B only the best bird/all birds, +/- draw more or fewer turbo frames.
+
+    Watch mode draws every frame at 60 fps. Turbo mode runs uncapped and draws
+    every turbo_frames-th frame of every turbo_generations-th generation.
+    """
+    turbo = TURBO
+    best_only = False
+    turbo_frames = TURBO_RENDER_FRAMES
+    turbo_generations = TURBO_RENDER_GENERATIONS
+    best_key = None  # genome key of the previous generation's best, carried over by elitism
+
+    @classmethod
+    def handle_key(cls, key):
+        if key == pygame.K_t:
+            cls.turbo = not cls.turbo
+        elif key == pygame.K_b:
+            cls.best_only = not cls.best_only
+        elif key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            cls.turbo_frames = max(cls.turbo_frames // 2, 1)
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            cls.turbo_frames *= 2
+        else:
+            return
+        cls.show_caption()
+
+    @classmethod
+    def show_caption(cls):
+        if cls.turbo:
+            mode = "turbo, drawing every %d frames" % cls.turbo_frames
+            if cls.turbo_generations > 1:
+                mode += " of every %d generations" % cls.turbo_generations
+        else:
+            mode = "watch"
+        if cls.best_only:
+            mode += ", best bird only"
+        pygame.display.set_caption("Flappy Bird NEAT: %s (T turbo, B best bird, +/- frames)" % mode)
+
+    @classmethod
+    def draws(cls, frame, gen):
+        """Whether frame `frame` of generation `gen` is drawn"""
+        if not cls.turbo:
             return True
-
-        return False
+        return gen % cls.turbo_generations == 0 and frame % cls.turbo_frames == 0
 
 class Pipes:
     PIPELOW = PIPE_IMG
@@ -108,7 +166,8 @@ class Bird:
         
         self.y = self.y + self.y_vel
 
-    def draw(self, win):
+    def animate(self):
+        """Advance the wing animation and the tilt by one drawn frame"""
         self.img_count += 1
 
         # For animation of bird, loop through three images
@@ -131,7 +190,9 @@ class Bird:
 
         # Calculate tilt based on velocity ratio like in base game
         self.tilt = -math.atan(self.y_vel/self.x_vel)
-        
+
+    def draw(self, win):
+        self.animate()
         rotated_image = pygame.transform.rotate(self.img, self.tilt * 180 / 3.1416)
         new_rect = rotated_image.get_rect(center = self.img.get_rect(topleft = (self.x, self.y)).center)
         win.blit(rotated_image, new_rect.topleft)
@@ -162,52 +223,16 @@ class Base:
         win.blit(self.IMG, (self.x1, self.y))
         win.blit(self.IMG, (self.x2, self.y))
 
-def draw_window(win, birds, pipes, base, score, gen):
-    win.blit(BG_IMG, (0,0))
-
-    for pipe in pipes:
-        pipe.draw(win)
-
-    base.draw(win)
-    for bird in birds:
-        # Draw lines from bird to next pipe
-        if len(pipes) > 0:
-            next_pipe = None
-            for pipe in pipes:
-                if pipe.x > bird.x:
-                    next_pipe = pipe
-                    break
-            if next_pipe:
-                # Draw line to top pipe
-                pygame.draw.line(win, (255,0,0), 
-                    (bird.x + bird.img.get_width()/2, bird.y + bird.img.get_height()/2),
-                    (next_pipe.x + next_pipe.PIPELOW.get_width()/2, next_pipe.top + next_pipe.PIPEHIGH.get_height()),
-                    2)
-                # Draw line to bottom pipe
-                pygame.draw.line(win, (255,0,0),
-                    (bird.x + bird.img.get_width()/2, bird.y + bird.img.get_height()/2),
-                    (next_pipe.x + next_pipe.PIPELOW.get_width()/2, next_pipe.bottom),
-                    2)
-        bird.draw(win)
-
-    # score
-    score_label = STAT_FONT.render("Score: " + str(score),1,(255,255,255))
-    win.blit(score_label, (WIN_WIDTH - score_label.get_width() - 15, 10))
-    
-    # max score - add these lines
-    Game.max_score = max(Game.max_score, score)
-    max_score_label = STAT_FONT.render("Max: " + str(Game.max_score),1,(255,255,255))
-    win.blit(max_score_label, (WIN_WIDTH - max_score_label.get_width() - 15, 50))
-    
-    # generations
-    gen_label = STAT_FONT.render("Gen: " + str(gen),1,(255,255,255))
-    win.blit(gen_label, (10, 10))
-
-    # alive
-    alive_label = STAT_FONT.render("Alive: " + str(len(birds)),1,(255,255,255))
-    win.blit(alive_label, (10, 50))
+# Pipe and bird-sprite masks never change, so build the collision tables once
+COLLISION = CollisionGeometry.from_surfaces(Bird.IMGS, Pipes.PIPEHIGH, Pipes.PIPELOW)
 
-    pygame.display.update()
+def draw_window(win, birds, pipes, base, score, gen, alive=None):
+    Game.max_score = max(Game.max_score, score)
+    if alive is None:
+        alive = len(birds)
+    RENDERER.draw(birds, pipes, base,
+                  ["Gen: " + str(gen), "Alive: " + str(alive)],
+                  ["Score: " + str(score), "Max: " + str(Game.max_score)])
 
 def eval_genomes(genomes, config):
     global win, gen
@@ -218,23 +243,25 @@ def eval_genomes(genomes, config):
     ge = []
     for genome_id, genome in genomes:
         genome.fitness = 0  # start with fitness level of 0
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
+        net = NETWORK_CACHE.network(genome, config)
         nets.append(net)
         birds.append(Bird(50, 200))
         ge.append(genome)
+    flock = Flock(birds, nets, ge)
 
     base = Base(730)
     # Initialize pipes with proper spacing
-    pipes = deque()
-    for i in range(CONCURRENT_PIPES):
-        pipes.append(Pipes(700 + i * Pipes.PIPE_DISTANCE))
+    pipes = PipeRing(Pipes(700 + i * Pipes.PIPE_DISTANCE) for i in range(CONCURRENT_PIPES))
     score = 0
 
     clock = pygame.time.Clock()
+    View.show_caption()
 
     run = True
-    while run and len(birds) > 0:
-        clock.tick(60)  # Match base game framerate
+    frame = 0
+    while run and len(flock) > 0:
+        if not View.turbo:
+            clock.tick(60)  # Match base game framerate
 
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -242,85 +269,90 @@ def eval_genomes(genomes, config):
                 pygame.quit()
                 quit()
                 break
+            if event.type == pygame.KEYDOWN:
+                View.handle_key(event.key)
 
         # Move the base
         base.move()  
 
-        # Determine which pipe to use for inputs
-        pipe_ind = 0
-        if len(birds) > 0:
-            # Find the closest pipe ahead of any bird
-            closest_dist = float('inf')
-            for i, pipe in enumerate(pipes):
-                # Change condition to check if bird hasn't passed the right edge of pipe
-                pipe_right_edge = pipe.x + pipe.PIPELOW.get_width()
-                if pipe_right_edge > birds[0].x:
-                    dist = pipe_right_edge - birds[0].x
-                    if dist < closest_dist:
-                        closest_dist = dist
-                        pipe_ind = i
-
-        # Move birds and get neural network decisions
-        for x, bird in enumerate(birds):
-            ge[x].fitness += 0.1  # give small reward for staying alive
-            bird.move()
+        # The closest pipe whose right edge is still ahead of the birds
+        bird_x = flock.birds[0].x
+        pipe = pipes.next_pipe(bird_x)
 
-            # Neural network inputs - bird's height, distances to pipe edges
-            output = nets[x].activate((
-                bird.y,
-                abs(bird.y - pipes[pipe_ind].height),  # distance to top pipe
-                abs(bird.y - pipes[pipe_ind].bottom),  # distance to bottom pipe
-                pipes[pipe_ind].x - bird.x,            # distance to pipe's leading edge
-                (pipes[pipe_ind].x + pipes[pipe_ind].PIPELOW.get_width()) - bird.x  # distance to pipe's trailing edge
-            ))
+        # Move birds and get neural network decisions (only every DECISION_INTERVAL frames)
+        decide = frame % DECISION_INTERVAL == 0
+        jumps = flock.jumps
+        for x, bird in enumerate(flock.birds):
+            flock.ge[x].fitness += 0.1  # give small reward for staying alive
+            bird.move()
 
-            if output[0] > 0.5:  # tanh activation function output is between -1 and 1
+            if decide:
+                # Neural network inputs - bird's height, distances to pipe edges
+                output = flock.nets[x].activate((
+                    bird.y,
+                    abs(bird.y - pipe.height),  # distance to top pipe
+                    abs(bird.y - pipe.bottom),  # distance to bottom pipe
+                    pipe.x - bird.x,            # distance to pipe's leading edge
+                    (pipe.x + pipes.width) - bird.x  # distance to pipe's trailing edge
+                ))
+
+                jumps[x] = output[0] > 0.5  # tanh activation function output is between -1 and 1
+                if jumps[x]:
+                    bird.jump()
+            elif DECISION_HOLD and jumps[x]:
                 bird.jump()
 
         # Move pipes and handle collisions
-        rem_pipes = []
         add_pipe = False
         for pipe in pipes:
             pipe.move()
 
-            # Check for collisions
-            for x, bird in enumerate(birds):
-                if Game.collision_detected(bird, pipe):
-                    ge[x].fitness -= 1  # penalize for collision
-                    birds.pop(x)
-                    nets.pop(x)
-                    ge.pop(x)
-                    continue
-
-                # Check if bird passed pipe
-                pipe_right_edge = pipe.x + pipe.PIPELOW.get_width()
-                if not pipe.passed and pipe_right_edge < bird.x:
-                    pipe.passed = True
-                    add_pipe = True
-
-            # Remove pipes that are off screen
-            if pipe.x + pipe.PIPELOW.get_width() < 0:
-                rem_pipes.append(pipe)            # Add new pipe and reward surviving birds
+            # Check for collisions; only a pipe over the bird column can be hit
+            if COLLISION.in_column(pipe.x, bird_x):
+                for x in np.flatnonzero(Game.birds_hit(flock.birds, pipe) & flock.alive).tolist():
+                    flock.ge[x].fitness -= 1  # penalize for collision
+                    flock.kill(x)
+
+            # Check if birds passed pipe
+            if len(flock) and not pipe.passed and pipe.x + pipes.width < bird_x:
+                pipe.passed = True
+                add_pipe = True
+        flock.compact()
+
+        # Add new pipe and reward surviving birds
         if add_pipe:
             score += 1
-            for g in ge:  # reward birds that made it through
+            for g in flock.ge:  # reward birds that made it through
                 g.fitness += 5
 
-        # Remove old pipes and add new ones to maintain 5 pipes
-        for r in rem_pipes:
-            pipes.remove(r)
-            # Add new pipe at a fixed distance from the last pipe
-            new_x = pipes[-1].x + Pipes.PIPE_DISTANCE
-            pipes.append(Pipes(new_x))
+        # Pipes that left the screen come back at a fixed distance behind the last pipe
+        while pipes.offscreen():
+            pipes.recycle()
 
         # Check for birds hitting ground or going too high
-        for x, bird in enumerate(birds):
+        for x, bird in enumerate(flock.birds):
             if bird.y + bird.img.get_height() >= 730 or bird.y < 0:
-                birds.pop(x)
-                nets.pop(x)
-                ge.pop(x)
-
-        draw_window(win, birds, pipes, base, score, gen)
+                flock.kill(x)
+        flock.compact()
+        birds = flock.birds
+
+        # The animation frame decides the collision mask, so birds that are
+        # not drawn still animate
+        shown = birds
+        if View.best_only and birds:
+            shown = [next((bird for bird, g in zip(birds, flock.ge) if g.key == View.best_key), birds[0])]
+        if View.draws(frame, gen):
+            if shown is not birds:
+                for bird in birds:
+                    if bird is not shown[0]:
+                        bird.animate()
+            draw_window(win, shown, pipes, base, score, gen, len(birds))
+        else:
+            for bird in birds:
+                bird.animate()
+        frame += 1
+
+    View.best_key = max(genomes, key=lambda item: item[1].fitness)[0]
 
 def run(config_file):
     config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
@@ -0,0 +1,29 @@
+# Pygame-free game constants and geometry, shared by headless training and the
+# pygame front ends. Importing this module never touches SDL.
+
+WIN_WIDTH = 600
+WIN_HEIGHT = 800
+
+BIRD_X = 50
+BIRD_START_Y = 200
+BASE_Y = 730
+CONCURRENT_PIPES = 3
+FIRST_PIPE_X = 700
+
+# Per-frame physics at 60 FPS, matching Bird.move / Bird.jump / Pipes.move / Base.move
+FRAMERATE = 60
+GRAVITY = 4500 / FRAMERATE**2
+JUMP_VEL = -960 / FRAMERATE
+MAX_FALL_VEL = 600 / FRAMERATE
+PIPE_VEL = 450 / FRAMERATE
+BASE_VEL = 450 / FRAMERATE
+
+# Pipe heights are drawn from [PIPE_MIN_HEIGHT, PIPE_MAX_HEIGHT)
+PIPE_MIN_HEIGHT = 50
+PIPE_MAX_HEIGHT = 450
+
+# Sprite sizes used for headless training: the unscaled asset sizes, treated as
+# fully opaque rectangles
+BIRD_SIZE = (34, 24)
+PIPE_SIZE = (52, 320)
+BASE_SIZE = (336, 112)
@@ -0,0 +1,149 @@
+import random
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+from batched_network import PopulationNetwork
+from course import Course, course_length, get_course
+from simulation import FlapRecord, make_simulator
+
+# Per-worker simulation settings, set once by the pool initializer
+_worker_settings = None
+
+
+def _init_worker(settings):
+    global _worker_settings
+    _worker_settings = settings
+
+
+def _pack(arrays):
+    """Copy named arrays into one shared memory block; returns the block and its layout"""
+    layout = []
+    offset = 0
+    for name, array in arrays:
+        array = np.ascontiguousarray(array)
+        layout.append((name, array.dtype.str, array.shape, offset))
+        offset += -(-array.nbytes // 8) * 8  # keep every array 8-byte aligned
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+    views = _views(shm, layout)
+    for name, array in arrays:
+        views[name][...] = array
+    return shm, layout
+
+
+def _views(shm, layout):
+    return dict((name, np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset))
+                for name, dtype, shape, offset in layout)
+
+
+def _simulate_chunk(shm, layout, num_layers, num_inputs, seed, start, end, chunk):
+    settings = _worker_settings
+    views = _views(shm, layout)
+    layers = []
+    for d in range(num_layers):
+        src, weight, bias, response, act = (views['%s%d' % (name, d)][start:end]
+                                            for name in ('src', 'weight', 'bias', 'response', 'act'))
+        layers.append((src, weight, bias, response, act, np.unique(act)))
+    network = PopulationNetwork(layers, views['outputs'][start:end], num_inputs)
+
+    course = Course(seed, settings['simulator']['pipe_distance'], views['course'])
+    sim = make_simulator(end - start, course=course, **settings['simulator'])
+
+    def policy(inputs, rows):
+        return network.activate(inputs, rows)[:, 0] > 0.5
+
+    views['scores'][chunk] = sim.run(policy, settings['frame_limit'])
+    views['fitness'][start:end] = sim.fitness
+    views['death_frame'][start:end] = sim.death_frame
+    if sim.decisions is not None:
+        decisions = np.unpackbits(sim.record().decisions, axis=1, count=end - start)
+        views['decisions'][:len(decisions), start:end] = decisions
+
+
+def _evaluate_chunk(task):
+    """Simulate birds [start, end) of the generation held in shared memory"""
+    shm_name, layout, num_layers, num_inputs, seed, start, end, chunk = task
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Every view of the block is gone once this returns, so it can be closed
+        _simulate_chunk(shm, layout, num_layers, num_inputs, seed, start, end, chunk)
+    finally:
+        shm.close()
+
+
+class ParallelEvaluator:
+    """
+    Evaluates each generation across a pool of worker processes.
+
+    The compiled networks, the pipe course and the per-bird results live in one
+    shared memory block per generation. Workers attach to it by name, simulate
+    a slice of the population on the common course and write fitness and death
+    frames back in place, so only a few small task tuples are pickled. Birds
+    never interact, so the fitness of every genome is the same as when the
+    whole population is simulated together on that course. With record_flaps
+    in the simulator settings, the workers' decisions come back as a
+    simulation.FlapRecord in `record`.
+    """
+
+    def __init__(self, num_workers, simulator_settings, frame_limit, chunks_per_worker=2):
+        self.num_workers = num_workers
+        self.simulator_settings = simulator_settings
+        self.frame_limit = frame_limit
+        self.chunks_per_worker = chunks_per_worker
+        settings = {'simulator': simulator_settings, 'frame_limit': frame_limit}
+        self.pool = mp.get_context('spawn').Pool(num_workers, initializer=_init_worker, initargs=(settings,))
+
+    def make_course(self):
+        """A freshly seeded course long enough to last the frame limit"""
+        pipe_distance = self.simulator_settings['pipe_distance']
+        return get_course(random.getrandbits(32), pipe_distance, course_length(pipe_distance, self.frame_limit))
+
+    def __call__(self, genomes, config, course=None):
+        """Set the fitness of every genome; returns the generation's score"""
+        network = PopulationNetwork.from_genomes([genome for genome_id, genome in genomes], config)
+        if course is None:
+            course = self.make_course()
+        # Workers see exactly the pipes this process would simulate
+        length = course_length(course.pipe_distance, self.frame_limit)
+        course.height(length - 1)
+        heights = course.heights[:length]
+
+        size = network.size
+        chunks = min(size, self.num_workers * self.chunks_per_worker)
+        bounds = np.linspace(0, size, chunks + 1).astype(int)
+
+        arrays = [('outputs', network.outputs), ('course', heights),
+                  ('fitness', np.zeros(size)), ('death_frame', np.zeros(size, dtype=np.int64)),
+                  ('scores', np.zeros(chunks, dtype=np.int64))]
+        record_flaps = self.simulator_settings.get('record_flaps', False)
+        if record_flaps:
+            interval = self.simulator_settings.get('decision_interval', 1)
+            arrays.append(('decisions', np.zeros((-(-self.frame_limit // interval), size), dtype=np.uint8)))
+        for d, (src, weight, bias, response, act, codes) in enumerate(network.layers):
+            arrays += [('src%d' % d, src), ('weight%d' % d, weight), ('bias%d' % d, bias),
+                       ('response%d' % d, response), ('act%d' % d, act)]
+        shm, layout = _pack(arrays)
+        try:
+            tasks = [(shm.name, layout, len(network.layers), network.num_inputs, course.seed,
+                      bounds[i], bounds[i + 1], i) for i in range(chunks)]
+            self.pool.map(_evaluate_chunk, tasks, chunksize=1)
+
+            views = _views(shm, layout)
+            for (genome_id, genome), fitness in zip(genomes, views['fitness'].tolist()):
+                genome.fitness = fitness
+            self.death_frame = views['death_frame'].copy()
+            self.record = None
+            if record_flaps:
+                self.record = FlapRecord(np.packbits(views['decisions'], axis=1), self.death_frame, self.frame_limit,
+                                         interval, self.simulator_settings.get('decision_hold', False),
+                                         course.seed, course.pipe_distance, self.simulator_settings['window'])
+            score = int(views['scores'].max())
+            del views
+        finally:
+            shm.close()
+            shm.unlink()
+        return score
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,119 @@
+import os
+import time
+import cProfile
+import pstats
+import neat
+
+from batched_network import NETWORK_CACHE
+
+PHASE_ORDER = ('setup', 'physics', 'network', 'collision', 'pipes', 'draw', 'clock', 'workers',
+               'other', 'reproduction')
+
+
+class PhaseTimer:
+    """
+    Wall time per phase of the evaluation loop.
+
+    lap(phase) charges the time since the previous lap (or mark) to `phase`,
+    so a loop that calls lap at each phase boundary is timed completely with
+    one perf_counter call per boundary.
+    """
+
+    def __init__(self):
+        self.generation = {}
+        self.total = {}
+        self.generations = 0
+        self.last = time.perf_counter()
+
+    def mark(self):
+        """Start timing from now without charging the time since the last lap"""
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.generation[phase] = self.generation.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def end_generation(self):
+        """Add the generation's phases to the totals; returns the generation's phases"""
+        generation = self.generation
+        for phase, seconds in generation.items():
+            self.total[phase] = self.total.get(phase, 0.0) + seconds
+        self.generations += 1
+        self.generation = {}
+        return generation
+
+
+class NullTimer:
+    """Stands in for PhaseTimer when profiling is off"""
+
+    def mark(self):
+        pass
+
+    def lap(self, phase):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+
+def format_phases(phases):
+    """One line breakdown, e.g. 'network 52% 0.31s | physics 20% 0.12s | ...'"""
+    total = sum(phases.values()) or 1.0
+    order = sorted(phases, key=lambda phase: PHASE_ORDER.index(phase) if phase in PHASE_ORDER else len(PHASE_ORDER))
+    return ' | '.join(f"{phase} {100 * phases[phase] / total:.0f}% {phases[phase]:.3f}s" for phase in order)
+
+
+class PhaseReporter(neat.reporting.BaseReporter):
+    """
+    Reports the phase breakdown of every generation and of the run so far,
+    and runs cProfile over the generations listed in profile_generations
+    (numbered from 1 like the progress output), dumping each to
+    profile_dir/<label>_gen<N>.prof for pstats or snakeviz. The line of each
+    generation ends with its network cache hits and misses (see NetworkCache).
+    """
+
+    def __init__(self, timer, label, print_progress=True, profile_generations=(), profile_dir='profiles'):
+        self.timer = timer
+        self.label = label
+        self.print_progress = print_progress
+        self.profile_generations = set(profile_generations)
+        self.profile_dir = profile_dir
+        self.profiler = None
+        self.generation = None
+        self.cache_counts = (0, 0)
+
+    def start_generation(self, generation):
+        self.generation = generation + 1
+        if self.generation in self.profile_generations:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.cache_counts = (NETWORK_CACHE.hits, NETWORK_CACHE.misses)
+        self.timer.mark()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.timer.lap('other')
+
+    def end_generation(self, config, population, species_set):
+        self.timer.lap('reproduction')
+        phases = self.timer.end_generation()
+        if self.print_progress:
+            hits = NETWORK_CACHE.hits - self.cache_counts[0]
+            misses = NETWORK_CACHE.misses - self.cache_counts[1]
+            print(f"    phases: {format_phases(phases)} | networks {hits} cached, {misses} built")
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.dump_profile()
+
+    def dump_profile(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{self.label}_gen{self.generation}.prof")
+        self.profiler.dump_stats(path)
+        if self.print_progress:
+            print(f"    cProfile of generation {self.generation} saved to {path}")
+            pstats.Stats(self.profiler).sort_stats('cumulative').print_stats(12)
+        self.profiler = None
+
+    def summary(self):
+        """Cumulative breakdown over every generation timed so far"""
+        return f"{self.timer.generations} generations: {format_phases(self.timer.total)}"
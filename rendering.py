@@ -0,0 +1,111 @@
+import pygame
+
+HUD_COLOR = (255, 255, 255)
+LINE_COLOR = (255, 0, 0)
+HUD_MARGIN = 10
+HUD_RIGHT_MARGIN = 15
+HUD_LINE_HEIGHT = 40
+
+
+def _round(value):
+    """Round half away from zero, like pygame does for float Rect attributes"""
+    return int(value + 0.5) if value >= 0 else -int(0.5 - value)
+
+
+class Renderer:
+    """
+    Draws the game window with cached sprites and partial display updates.
+
+    Rotated bird sprites are cached by animation frame and tilt, rounded to
+    tilt_step degrees, together with the offset that centers them the way
+    Bird.draw does. HUD labels are rendered again only when their text
+    changes. The next pipe is looked up once per bird column instead of once
+    per bird, and each layer is drawn with a single blits call.
+
+    Only the rectangles drawn in the previous frame are restored from the
+    background, and only those and the ones drawn in this frame are sent to
+    the display, instead of the whole window. The birds and their lines count
+    as one rectangle, the box around all of them.
+    """
+
+    def __init__(self, win, background, font, tilt_step=1):
+        self.win = win
+        self.background = background
+        self.font = font
+        self.tilt_step = tilt_step
+        self.sprites = {}
+        self.labels = {}
+        self.dirty = [win.get_rect()]  # the first frame covers the whole window
+
+    def bird_sprite(self, img, tilt):
+        """The rotated image of a bird and the offset of its top left corner from the bird's position"""
+        angle = round(tilt * 180 / 3.1416 / self.tilt_step) * self.tilt_step
+        sprite = self.sprites.get((img, angle))
+        if sprite is None:
+            rotated = pygame.transform.rotate(img, angle)
+            sprite = (rotated, img.get_width() // 2 - rotated.get_width() // 2,
+                      img.get_height() // 2 - rotated.get_height() // 2)
+            self.sprites[(img, angle)] = sprite
+        return sprite
+
+    def label(self, slot, text):
+        """The rendered text of a HUD slot, rendered again only when the text changed"""
+        cached = self.labels.get(slot)
+        if cached is None or cached[0] != text:
+            cached = (text, self.font.render(text, 1, HUD_COLOR))
+            self.labels[slot] = cached
+        return cached[1]
+
+    def draw(self, birds, pipes, base, left_labels, right_labels):
+        """
+        Draw one frame: pipes, base, the lines from every bird to its next pipe,
+        the birds, then left_labels down the top left corner and right_labels
+        down the top right corner
+        """
+        win = self.win
+        win.blits([(self.background, rect, rect) for rect in self.dirty], doreturn=False)
+
+        sprites = []
+        for pipe in pipes:
+            sprites.append((pipe.PIPEHIGH, (pipe.x, pipe.top)))
+            sprites.append((pipe.PIPELOW, (pipe.x, pipe.bottom)))
+        sprites.append((base.IMG, (base.x1, base.y)))
+        sprites.append((base.IMG, (base.x2, base.y)))
+        drawn = win.blits(sprites)
+
+        # All birds usually share one column, and so one next pipe
+        flock = []
+        next_pipes = {}
+        for bird in birds:
+            if bird.x not in next_pipes:
+                next_pipes[bird.x] = next((pipe for pipe in pipes if pipe.x > bird.x), None)
+            next_pipe = next_pipes[bird.x]
+            if next_pipe is not None:
+                center = (bird.x + bird.img.get_width() / 2, bird.y + bird.img.get_height() / 2)
+                pipe_x = next_pipe.x + next_pipe.PIPELOW.get_width() / 2
+                flock.append(pygame.draw.line(win, LINE_COLOR, center,
+                                              (pipe_x, next_pipe.top + next_pipe.PIPEHIGH.get_height()), 2))
+                flock.append(pygame.draw.line(win, LINE_COLOR, center, (pipe_x, next_pipe.bottom), 2))
+
+        sprites = []
+        for bird in birds:
+            bird.animate()
+            rotated, dx, dy = self.bird_sprite(bird.img, bird.tilt)
+            sprites.append((rotated, (_round(bird.x) + dx, _round(bird.y) + dy)))
+        flock += win.blits(sprites)
+        # The lines and birds overlap heavily; one bounding box of them all is
+        # much cheaper to restore and update than hundreds of rectangles
+        if flock:
+            drawn.append(flock[0].unionall(flock[1:]))
+
+        labels = []
+        for row, text in enumerate(left_labels):
+            labels.append((self.label(('left', row), text), (HUD_MARGIN, HUD_MARGIN + row * HUD_LINE_HEIGHT)))
+        for row, text in enumerate(right_labels):
+            surface = self.label(('right', row), text)
+            labels.append((surface, (win.get_width() - surface.get_width() - HUD_RIGHT_MARGIN,
+                                     HUD_MARGIN + row * HUD_LINE_HEIGHT)))
+        drawn += win.blits(labels)
+
+        pygame.display.update(self.dirty + drawn)
+        self.dirty = drawn
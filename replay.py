@@ -0,0 +1,260 @@
+# Compact replays of evaluated birds, and a player for them.
+#
+#   python replay.py replays/<study>/W200_D400_R1.npz                 # the experiment's best bird
+#   python replay.py replays/<study>/W200_D400_R1.npz --list
+#   python replay.py replays/<study>/W200_D400_R1.npz --generation 12 --speed 4 --seek 1500
+#
+# A replay is the seed of the pipe course, one bit per frame telling whether
+# the bird flapped, and the frame it died at. The flight follows from those
+# with the simulator's arithmetic, so playback runs no networks.
+#
+# Playback keys: space pause, left/right seek one second, up/down double or
+# halve the speed, 0-9 jump to 0%-90% of the run, home/end, escape quit.
+import os
+import time
+import argparse
+import numpy as np
+import neat
+
+from course import COURSE_CACHE_DIR, course_length, get_course
+from storage import atomic_save
+from game_core import (WIN_WIDTH, BIRD_X, BIRD_START_Y, BASE_Y, GRAVITY, JUMP_VEL, MAX_FALL_VEL, BASE_VEL,
+                       FRAMERATE, BIRD_SIZE, PIPE_SIZE)
+
+# One value per replay in a replay file; the flaps of replay i are the packed
+# bits flaps[offset[i]:offset[i + 1]]
+REPLAY_COLUMNS = {
+    'generation': np.int32,
+    'genome': np.int64,
+    'fitness': np.float64,
+    'seed': np.int64,
+    'pipe_distance': np.int32,
+    'window': np.int32,
+    'death_frame': np.int32,    # -1 if the bird reached the frame limit
+    'frames': np.int32,
+}
+
+
+def replay_path(replay_dir, results_file, window_size, pipe_distance, run_number):
+    """Replay file of one experiment, grouped by the results file of its sweep"""
+    if replay_dir is None:
+        return None
+    study = os.path.splitext(os.path.basename(results_file))[0]
+    return os.path.join(replay_dir, study, 'W%d_D%d_R%d.npz' % (window_size, pipe_distance, run_number))
+
+
+class Replay:
+    """One bird's run: the course it flew, its flap in every frame and the frame it died at (-1 = survived)"""
+
+    def __init__(self, seed, pipe_distance, window, flaps, death_frame, generation=0, genome=-1, fitness=np.nan):
+        self.seed = seed
+        self.pipe_distance = pipe_distance
+        self.window = window
+        self.flaps = flaps
+        self.death_frame = death_frame
+        self.generation = generation
+        self.genome = genome
+        self.fitness = fitness
+
+    @property
+    def frames(self):
+        return len(self.flaps)
+
+    def flight(self):
+        """Height and velocity of the bird after each of frames 0..frames, computed like PopulationSimulator.step"""
+        y = np.empty(self.frames + 1)
+        y_vel = np.empty(self.frames + 1)
+        y[0] = height = float(BIRD_START_Y)
+        y_vel[0] = velocity = 0.0
+        for frame, flap in enumerate(self.flaps.tolist(), 1):
+            velocity = max(min(velocity + GRAVITY, MAX_FALL_VEL), JUMP_VEL)
+            height += velocity
+            if flap:
+                velocity = JUMP_VEL
+            y[frame] = height
+            y_vel[frame] = velocity
+        return y, y_vel
+
+    def course(self, cache_dir=COURSE_CACHE_DIR):
+        return get_course(self.seed, self.pipe_distance, course_length(self.pipe_distance, self.frames), cache_dir)
+
+    def pass_frames(self, course=None):
+        """Frames at which the bird passed a pipe; the score after frame f is the number at or before f"""
+        course = course or self.course()
+        frames = []
+        k = 0
+        while True:
+            frame = max(course.pass_frame(k, BIRD_X, PIPE_SIZE[0]), frames[-1] + 1 if frames else 1)
+            if frame > self.frames:
+                return np.array(frames, dtype=np.int64)
+            frames.append(frame)
+            k += 1
+
+    @property
+    def score(self):
+        return len(self.pass_frames())
+
+
+def save_replays(path, replays):
+    """Write replays to one .npz file at path, replacing it atomically"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    columns = dict((name, np.array([getattr(replay, name) for replay in replays], dtype=dtype))
+                   for name, dtype in REPLAY_COLUMNS.items())
+    packed = [np.packbits(replay.flaps) for replay in replays]
+    columns['offset'] = np.cumsum([0] + [len(bits) for bits in packed], dtype=np.int64)
+    columns['flaps'] = np.concatenate(packed) if packed else np.zeros(0, dtype=np.uint8)
+    with atomic_save(path) as f:
+        np.savez(f, **columns)
+
+
+def load_replays(path):
+    """The replays saved at path, in the order they were recorded"""
+    with np.load(path) as data:
+        columns = dict((name, data[name].tolist()) for name in REPLAY_COLUMNS)
+        offset = data['offset']
+        flaps = data['flaps']
+    replays = []
+    for i, frames in enumerate(columns['frames']):
+        bits = np.unpackbits(flaps[offset[i]:offset[i + 1]], count=frames).astype(bool)
+        values = dict((name, column[i]) for name, column in columns.items() if name != 'frames')
+        replays.append(Replay(flaps=bits, **values))
+    return replays
+
+
+class ReplayReporter(neat.reporting.BaseReporter):
+    """
+    Keeps a replay of the best genome of every generation, numbered from 1
+    like the progress output, and save() writes them all to `path`.
+
+    The flaps are read from `game` (the Game class), where a headless
+    evaluation that records flaps leaves a simulation.FlapRecord in
+    generation_flaps; generations evaluated with graphics get no replay.
+    """
+
+    def __init__(self, path, game, resume_generations=0):
+        self.path = path
+        self.game = game
+        self.generation = resume_generations
+        self.replays = []
+        if resume_generations and os.path.exists(path):
+            self.replays = [replay for replay in load_replays(path) if replay.generation <= resume_generations]
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.generation += 1
+        record = self.game.generation_flaps
+        if record is None:
+            return
+        bird = list(population).index(best_genome.key)
+        self.replays.append(Replay(record.seed, record.pipe_distance, record.window, record.flaps(bird),
+                                   int(record.death_frame[bird]), self.generation, best_genome.key,
+                                   best_genome.fitness))
+
+    def save(self):
+        save_replays(self.path, self.replays)
+
+
+def play(replay, speed=1.0, seek=0):
+    """Show a replay in the game window; returns when the window is closed"""
+    import research_study as rs
+    rs.init_graphics()
+    pygame = rs.pygame
+
+    # Replays come from the headless game, which uses the unscaled sprite sizes
+    rs.Pipes.PIPELOW = pygame.transform.scale(rs.Pipes.PIPELOW, PIPE_SIZE)
+    rs.Pipes.PIPEHIGH = pygame.transform.rotate(rs.Pipes.PIPELOW, 180)
+    rs.Bird.IMGS = [pygame.transform.scale(img, BIRD_SIZE) for img in rs.Bird.IMGS]
+    rs.Pipes.WINDOW = replay.window
+    rs.Pipes.PIPE_DISTANCE = replay.pipe_distance
+    rs.Game.max_score = 0
+
+    course = replay.course()
+    y, y_vel = replay.flight()
+    pass_frames = replay.pass_frames(course)
+    bird = rs.Bird(BIRD_X, y[0])
+    base = rs.Base(BASE_Y)
+    clock = pygame.time.Clock()
+
+    position = float(min(max(seek, 0), replay.frames))
+    paused = False
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return
+            if event.type != pygame.KEYDOWN:
+                continue
+            if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                return
+            elif event.key == pygame.K_SPACE:
+                paused = not paused
+            elif event.key == pygame.K_RIGHT:
+                position += FRAMERATE
+            elif event.key == pygame.K_LEFT:
+                position -= FRAMERATE
+            elif event.key == pygame.K_UP:
+                speed *= 2
+            elif event.key == pygame.K_DOWN:
+                speed /= 2
+            elif event.key == pygame.K_HOME:
+                position = 0
+            elif event.key == pygame.K_END:
+                position = replay.frames
+            elif pygame.K_0 <= event.key <= pygame.K_9:
+                position = replay.frames * (event.key - pygame.K_0) / 10
+        position = min(max(position, 0), replay.frames)
+        frame = int(position)
+
+        bird.y = y[frame]
+        bird.y_vel = y_vel[frame]
+        pipes = []
+        k = course.active_pipe(frame, 0, PIPE_SIZE[0])
+        while course.pipe_x(k, frame) < WIN_WIDTH:
+            pipes.append(rs.Pipes(course.pipe_x(k, frame), course.height(k)))
+            k += 1
+        base.x1 = -((BASE_VEL * frame) % base.WIDTH)
+        base.x2 = base.x1 + base.WIDTH
+
+        state = 'paused' if paused else '%gx' % speed
+        pygame.display.set_caption("Replay: generation %d, frame %d/%d, %s" % (replay.generation, frame,
+                                                                              replay.frames, state))
+        score = int(np.searchsorted(pass_frames, frame, side='right'))
+        rs.draw_window(rs.win, [bird], pipes, base, score, replay.generation)
+
+        if not paused:
+            position = min(position + speed, replay.frames)
+        clock.tick(FRAMERATE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play back the replays recorded during training")
+    parser.add_argument('path', help="replay file, e.g. replays/<results file>/W200_D400_R1.npz")
+    parser.add_argument('--generation', type=int, help="generation to play (default: the fittest bird in the file)")
+    parser.add_argument('--speed', type=float, default=1.0, help="frames played per displayed frame")
+    parser.add_argument('--seek', type=int, default=0, help="frame to start at")
+    parser.add_argument('--list', action='store_true', help="list the replays in the file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    replays = load_replays(args.path)
+    if not replays:
+        raise SystemExit(f"No replays in {args.path}")
+
+    if args.list:
+        print(f"{len(replays)} replays loaded in {1000 * (time.perf_counter() - start):.1f} ms")
+        for replay in replays:
+            end = 'survived' if replay.death_frame < 0 else 'died'
+            print(f"  gen {replay.generation:4d}  genome {replay.genome:6d}  fitness {replay.fitness:9.1f}  "
+                  f"score {replay.score:4d}  {replay.frames:6d} frames, {end}")
+        return
+
+    if args.generation is None:
+        replay = max(replays, key=lambda replay: replay.fitness)
+    else:
+        matching = [replay for replay in replays if replay.generation == args.generation]
+        if not matching:
+            raise SystemExit(f"No replay of generation {args.generation} in {args.path}")
+        replay = matching[0]
+    play(replay, args.speed, args.seek)
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,11 @@ TARGET_SCORES = [10, 20, 50, 100, 200]
 MAX_GENERATIONS = 50  # Maximum generations per experiment
 RUNS_PER_CONFIG = 1    # Number of runs per configuration (for statistical significance)
 
+# Sweep Mode
+SWEEP_MODE = 'grid'           # 'grid' runs every cell in full; 'halving' races cells and drops the weakest
+HALVING_ETA = 3               # Each halving round keeps about 1/ETA of the cells and gives them ETA times the generations
+HALVING_MIN_GENERATIONS = 5   # Generation budget of the first halving round
+
 # NEAT Parameters (you can also modify config-feedforward.txt)
 POPULATION_SIZE = 50   # Size of each generation
 
@@ -23,12 +28,50 @@ PRINT_PROGRESS = True  # Print progress updates during training
 # Multiprocessing Settings
 USE_MULTIPROCESSING = True    # Enable parallel processing (automatically disabled if SHOW_GRAPHICS=True)
 NUM_PROCESSES = None          # Number of processes (None = auto-detect CPU count - 1)
+EVAL_PROCESSES = 1            # Processes sharing each generation's evaluation (only used when USE_MULTIPROCESSING=False)
+BATCH_CELLS = False           # Evaluate every experiment's generation together in one simulation, in one process (overrides USE_MULTIPROCESSING)
+
+# Distributed Settings (see distributed.py)
+DISTRIBUTED = False           # Hand experiments to worker processes over TCP, on this and other machines (overrides the modes above)
+COORDINATOR_HOST = '127.0.0.1'  # Address the coordinator listens on ('0.0.0.0' to accept workers from other machines)
+COORDINATOR_PORT = 5757       # Port the coordinator listens on
+LOCAL_WORKERS = 0             # Worker processes the coordinator starts on this machine
+LEASE_SECONDS = 120           # An experiment whose worker is silent this long is handed to another worker
+# Workers write checkpoints, telemetry and replays to this machine's directories as absolute paths;
+# for workers on other machines, put those directories on shared storage mounted at the same path
+
+# Course Settings
+COURSE_SEED = None     # Seed of the pipe course used every generation (None = a new random course each generation)
 
 # Results Settings
 RESULTS_FILENAME = None  # If None, auto-generates filename with timestamp
+RESULTS_SYNC_EVERY = 10  # Rows are flushed as they finish and synced to disk every N rows
+RESULTS_DB = None                   # SQLite database every sweep's results are also added to, e.g. 'research_results.db' (None = off, see results_db.py)
+RESULTS_DB_TELEMETRY = False        # Also add each run's per-generation telemetry to RESULTS_DB (needs TELEMETRY_DIR)
+
+# Checkpoint Settings
+CHECKPOINT_DIR = None           # Where unfinished sweeps keep their progress, e.g. 'checkpoints' (None = no checkpoints)
+CHECKPOINT_INTERVAL = 5         # Save each running experiment's population every N generations
+
+# Telemetry Settings
+TELEMETRY_DIR = None  # Per-generation statistics of every experiment, as .npz files, e.g. 'telemetry' (None = off)
+
+# Replay Settings
+REPLAY_DIR = None  # Replays of every generation's best bird, played with replay.py, e.g. 'replays' (None = off)
+
+# Profiling Settings
+PROFILE_PHASES = False     # Time physics, network, collision, pipes and drawing in every generation
+PROFILE_GENERATIONS = []   # Generations to run under cProfile, e.g. [1, 10] (needs PROFILE_PHASES)
+PROFILE_DIR = 'profiles'   # Where the cProfile dumps go
 
 # Advanced Settings
 FRAME_LIMIT = 10000    # Max frames per generation (prevents infinite loops)
+FITNESS_CACHE_SIZE = 4096      # Birds whose results are reused when the same network flies the same course again (0 = off)
 FITNESS_REWARD_ALIVE = 0.1     # Reward for staying alive each frame
 FITNESS_REWARD_PIPE = 5        # Reward for passing through a pipe
-FITNESS_PENALTY_COLLISION = 1  # Penalty for collision
\ No newline at end of file
+FITNESS_PENALTY_COLLISION = 1  # Penalty for collision
+EVAL_COURSES = 1               # Courses every genome flies each generation, simulated together as lanes (1 = one course)
+FITNESS_AGGREGATE = 'mean'     # How fitness over EVAL_COURSES combines: 'mean', 'min' or a quantile such as 0.25
+DECISION_INTERVAL = 1          # Networks decide every N frames; physics still runs every frame
+DECISION_HOLD = False          # Between decisions, repeat the last flap (True) or do not flap (False)
+SIMULATION_ENGINE = 'frame'    # 'frame' steps every frame; 'event' skips to the next event (same results, faster when DECISION_INTERVAL > 1)
\ No newline at end of file
@@ -1,15 +1,33 @@
 import neat
-import pygame
 import os
+import functools
 import random
 import math
 import csv
 import time
-from collections import deque
 from datetime import datetime
 import copy
+import shutil
+import tempfile
 import multiprocessing as mp
 import sys
+import numpy as np
+from game_core import (WIN_WIDTH, WIN_HEIGHT, CONCURRENT_PIPES, BIRD_X, BIRD_SIZE, PIPE_SIZE,
+                       GRAVITY, JUMP_VEL, MAX_FALL_VEL, PIPE_VEL, BASE_VEL, PIPE_MIN_HEIGHT, PIPE_MAX_HEIGHT)
+from simulation import make_simulator, LaneSimulator
+from course import COURSE_CACHE_DIR, course_length, get_course
+from collision import CollisionGeometry
+from entities import Flock, PipeRing
+from batched_network import PopulationNetwork, NETWORK_CACHE
+from fitness_cache import FitnessCache
+from parallel_eval import ParallelEvaluator
+from distributed import Coordinator, start_local_workers
+from checkpoint import (SweepCheckpoint, experiment_path, population_state, restore_population,
+                        save_state, load_state)
+from telemetry import TelemetryReporter, telemetry_path, load_telemetry
+from results_db import ResultsDatabase, study_name
+from replay import ReplayReporter, replay_path
+from profiler import PhaseTimer, PhaseReporter, NULL_TIMER
 
 # Import research configuration
 try:
@@ -27,8 +45,35 @@ except ImportError:
     PRINT_PROGRESS = True
     USE_MULTIPROCESSING = True
     NUM_PROCESSES = None
+    EVAL_PROCESSES = 1
+    COURSE_SEED = None
     RESULTS_FILENAME = None
+    RESULTS_SYNC_EVERY = 10
+    RESULTS_DB = None
+    RESULTS_DB_TELEMETRY = False
+    CHECKPOINT_DIR = None
+    CHECKPOINT_INTERVAL = 5
+    TELEMETRY_DIR = None
+    REPLAY_DIR = None
+    PROFILE_PHASES = False
+    PROFILE_GENERATIONS = []
+    PROFILE_DIR = 'profiles'
+    DECISION_INTERVAL = 1
+    DECISION_HOLD = False
+    SIMULATION_ENGINE = 'frame'
+    BATCH_CELLS = False
+    DISTRIBUTED = False
+    COORDINATOR_HOST = '127.0.0.1'
+    COORDINATOR_PORT = 5757
+    LOCAL_WORKERS = 0
+    LEASE_SECONDS = 120
+    SWEEP_MODE = 'grid'
+    HALVING_ETA = 3
+    HALVING_MIN_GENERATIONS = 5
     FRAME_LIMIT = 10000
+    FITNESS_CACHE_SIZE = 4096
+    EVAL_COURSES = 1
+    FITNESS_AGGREGATE = 'mean'
     FITNESS_REWARD_ALIVE = 0.1
     FITNESS_REWARD_PIPE = 5
     FITNESS_PENALTY_COLLISION = 1
@@ -41,81 +86,129 @@ RESEARCH_CONFIG = {
     'max_generations': MAX_GENERATIONS,
     'runs_per_config': RUNS_PER_CONFIG,
     'results_file': RESULTS_FILENAME or f'research_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
+    'results_sync_every': RESULTS_SYNC_EVERY,
+    'results_db': RESULTS_DB,
+    'results_db_telemetry': RESULTS_DB_TELEMETRY,
     'show_graphics': SHOW_GRAPHICS,
     'print_progress': PRINT_PROGRESS,
     'frame_limit': FRAME_LIMIT,
+    'fitness_cache_size': FITNESS_CACHE_SIZE,
+    'eval_courses': EVAL_COURSES,
+    'fitness_aggregate': FITNESS_AGGREGATE,
     'fitness_reward_alive': FITNESS_REWARD_ALIVE,
     'fitness_reward_pipe': FITNESS_REWARD_PIPE,
     'fitness_penalty_collision': FITNESS_PENALTY_COLLISION,
-    'use_multiprocessing': False,  # Disabled due to pickling issues
-    'num_processes': NUM_PROCESSES or (mp.cpu_count() - 1),  # Leave one CPU free
+    'use_multiprocessing': USE_MULTIPROCESSING and not SHOW_GRAPHICS,  # Graphics need the main process
+    'num_processes': NUM_PROCESSES or max(1, mp.cpu_count() - 1),  # Leave one CPU free
+    # Pool workers cannot start pools of their own, so only split generations in a sequential sweep
+    'eval_processes': 1 if USE_MULTIPROCESSING or SHOW_GRAPHICS else EVAL_PROCESSES,
+    'batch_cells': BATCH_CELLS and not SHOW_GRAPHICS,
+    'distributed': DISTRIBUTED and not SHOW_GRAPHICS,
+    'coordinator_host': COORDINATOR_HOST,
+    'coordinator_port': COORDINATOR_PORT,
+    'local_workers': LOCAL_WORKERS,
+    'lease_seconds': LEASE_SECONDS,
+    'course_seed': COURSE_SEED,
+    'checkpoint_dir': CHECKPOINT_DIR,
+    'checkpoint_interval': CHECKPOINT_INTERVAL,
+    'study_dir': None,  # set by run_research_study once the sweep's checkpoint directory is known
+    'telemetry_dir': TELEMETRY_DIR,
+    'replay_dir': REPLAY_DIR,
+    'profile_phases': PROFILE_PHASES,
+    'profile_generations': PROFILE_GENERATIONS,
+    'profile_dir': PROFILE_DIR,
+    'decision_interval': DECISION_INTERVAL,
+    'decision_hold': DECISION_HOLD,
+    'simulation_engine': SIMULATION_ENGINE,
+    'sweep_mode': SWEEP_MODE,
+    'halving_eta': HALVING_ETA,
+    'halving_min_generations': HALVING_MIN_GENERATIONS,
+    'generation_budget': None,  # generations an experiment may run in the current halving round
 }
 
-# Game constants
-WIN_WIDTH = 600
-WIN_HEIGHT = 800
-CONCURRENT_PIPES = 3
+# pygame is only imported once graphics are requested (see init_graphics), so
+# headless training and sweep workers never load SDL
+pygame = None
+win = None
+STAT_FONT = None
+BG_IMG = None
+RENDERER = None
 
-# Initialize pygame (even if not showing graphics)
-pygame.init()
-pygame.font.init()
-if RESEARCH_CONFIG['show_graphics']:
+# Headless collisions use the fully opaque sprite rectangles
+COLLISION = CollisionGeometry.from_rects(BIRD_SIZE, PIPE_SIZE)
+
+def init_graphics():
+    """Import pygame, open the window and load the sprites; does nothing if already done"""
+    global pygame, win, STAT_FONT, BG_IMG, COLLISION, RENDERER
+    if win is not None:
+        return
+
+    import pygame
+    from rendering import Renderer
+    pygame.init()
+    pygame.font.init()
     win = pygame.display.set_mode((WIN_WIDTH, WIN_HEIGHT))
     STAT_FONT = pygame.font.SysFont("comicsans", 50)
-    
+
     # Load images
-    BIRD_IMGS = [pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "bird1.png"))),
-                pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "bird2.png"))),
-                pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "bird3.png")))]
-    PIPE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "pipe.png")))
-    BASE_IMG = pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "base.png")))
+    bird_imgs = [pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "bird1.png"))),
+                 pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "bird2.png"))),
+                 pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "bird3.png")))]
+    pipe_img = pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "pipe.png")))
+    base_img = pygame.transform.scale2x(pygame.image.load(os.path.join("assets", "base.png")))
     BG_IMG = pygame.transform.scale(pygame.image.load(os.path.join("assets", "bg.png")).convert_alpha(), (600, 900))
-else:
-    win = None
-    STAT_FONT = None
-    # Create dummy images for collision detection
-    BIRD_IMGS = [pygame.Surface((34, 24)) for _ in range(3)]
-    PIPE_IMG = pygame.Surface((52, 320))
-    BASE_IMG = pygame.Surface((336, 112))
-    BG_IMG = pygame.Surface((600, 900))
+
+    Pipes.PIPELOW = pipe_img
+    Pipes.PIPEHIGH = pygame.transform.rotate(pipe_img, 180)
+    Bird.IMGS = bird_imgs
+    Base.IMG = base_img
+    Base.WIDTH = base_img.get_width()
+    RENDERER = Renderer(win, BG_IMG, STAT_FONT)
+
+    # Pipe and bird-sprite masks never change, so build the collision tables once
+    COLLISION = CollisionGeometry.from_surfaces(Bird.IMGS, Pipes.PIPEHIGH, Pipes.PIPELOW)
 
 class Game:
     score = 0
     max_score = 0
     generation_scores = []  # Track scores achieved each generation
+    generation_death_frames = None  # Frame each bird of the last headless evaluation died at (-1 = survived)
+    phase_timer = NULL_TIMER  # A profiler.PhaseTimer while phase profiling is on
+    generation_flaps = None  # simulation.FlapRecord of the last headless evaluation while replays are recorded
+    generation_memo_hits = None  # Genomes of the last headless evaluation that were not simulated (None = no fitness cache)
+    fitness_cache = None  # The process's fitness_cache.FitnessCache, created by fitness_cache()
 
     @staticmethod
     def collision_detected(bird, pipe):
-        bird_mask = bird.get_mask()
-        top_mask = pygame.mask.from_surface(pipe.PIPEHIGH)
-        bottom_mask = pygame.mask.from_surface(pipe.PIPELOW)
-        top_offset = (pipe.x - bird.x, pipe.top - round(bird.y))
-        bottom_offset = (pipe.x - bird.x, pipe.bottom - round(bird.y))
-
-        b_point = bird_mask.overlap(bottom_mask, bottom_offset)
-        t_point = bird_mask.overlap(top_mask, top_offset)
+        return bool(COLLISION.hits(Bird.IMGS.index(bird.img), bird.y, pipe.x, pipe.top, pipe.bottom, bird.x))
 
-        return b_point or t_point
+    @staticmethod
+    def birds_hit(birds, pipe):
+        """Test every bird against one pipe in a single batch (all birds share the same x)"""
+        frames = [Bird.IMGS.index(bird.img) for bird in birds]
+        return COLLISION.hits(frames, [bird.y for bird in birds], pipe.x, pipe.top, pipe.bottom, birds[0].x)
 
 class Pipes:
-    PIPELOW = PIPE_IMG
-    PIPEHIGH = pygame.transform.rotate(PIPE_IMG, 180)
-    VEL = 450 / 60  # Match base game speed (450/FRAMERATE)
+    PIPELOW = None   # sprites are loaded by init_graphics
+    PIPEHIGH = None
+    VEL = PIPE_VEL
     
     # These will be set by research configuration
     WINDOW = 200
     PIPE_DISTANCE = 400
 
-    def __init__(self, x):
+    def __init__(self, x, height=None):
         self.x = x
         self.height = 0
         self.top = 0
         self.bottom = 0
         self.passed = False
-        self.set_height()
+        self.set_height(height)
 
-    def set_height(self):
-        self.height = random.randrange(50, 450)
+    def set_height(self, height=None):
+        if height is None:
+            height = random.randrange(PIPE_MIN_HEIGHT, PIPE_MAX_HEIGHT)
+        self.height = height
         self.top = self.height - self.PIPEHIGH.get_height()
         self.bottom = self.height + self.WINDOW
 
@@ -128,7 +221,7 @@ class Pipes:
             win.blit(self.PIPELOW, (self.x, self.bottom))
 
 class Bird:
-    IMGS = BIRD_IMGS
+    IMGS = None   # sprites are loaded by init_graphics
     MAX_ROTATION = 25
     ROT_VEL = 20
     ANIMATION_TIME = 5
@@ -139,32 +232,30 @@ class Bird:
         self.tilt = 0
         self.tick_count = 0
         self.y_vel = 0
-        self.x_vel = 450 / 60
+        self.x_vel = PIPE_VEL
         self.height = y
         self.img_count = 0
         self.img = self.IMGS[0]
     
     def jump(self):
-        self.y_vel = -960 / 60
+        self.y_vel = JUMP_VEL
         self.tick_count = 0
         self.height = self.y
 
     def move(self):
         self.tick_count += 1
-        self.y_vel += 4500 / 60**2
+        self.y_vel += GRAVITY
 
-        if self.y_vel >= 600 / 60:
-            self.y_vel = 600 / 60
+        if self.y_vel >= MAX_FALL_VEL:
+            self.y_vel = MAX_FALL_VEL
         
-        if self.y_vel < -960 / 60:
-            self.y_vel = -960 / 60
+        if self.y_vel < JUMP_VEL:
+            self.y_vel = JUMP_VEL
         
         self.y = self.y + self.y_vel
 
-    def draw(self, win):
-        if not win:
-            return
-            
+    def animate(self):
+        """Advance the wing animation and the tilt by one drawn frame"""
         self.img_count += 1
 
         if self.img_count <= self.ANIMATION_TIME:
@@ -184,7 +275,12 @@ class Bird:
             self.img_count = self.ANIMATION_TIME*2
 
         self.tilt = -math.atan(self.y_vel/self.x_vel)
-        
+
+    def draw(self, win):
+        if not win:
+            return
+            
+        self.animate()
         rotated_image = pygame.transform.rotate(self.img, self.tilt * 180 / 3.1416)
         new_rect = rotated_image.get_rect(center = self.img.get_rect(topleft = (self.x, self.y)).center)
         win.blit(rotated_image, new_rect.topleft)
@@ -193,9 +289,9 @@ class Bird:
         return pygame.mask.from_surface(self.img)
 
 class Base:
-    VEL = 450 / 60
-    WIDTH = BASE_IMG.get_width()
-    IMG = BASE_IMG
+    VEL = BASE_VEL
+    WIDTH = None   # sprites are loaded by init_graphics
+    IMG = None
 
     def __init__(self, y):
         self.y = y
@@ -218,45 +314,11 @@ class Base:
 def draw_window(win, birds, pipes, base, score, gen):
     if not win:
         return
-        
-    win.blit(BG_IMG, (0,0))
-
-    for pipe in pipes:
-        pipe.draw(win)
-
-    base.draw(win)
-    for bird in birds:
-        if len(pipes) > 0:
-            next_pipe = None
-            for pipe in pipes:
-                if pipe.x > bird.x:
-                    next_pipe = pipe
-                    break
-            if next_pipe:
-                pygame.draw.line(win, (255,0,0), 
-                    (bird.x + bird.img.get_width()/2, bird.y + bird.img.get_height()/2),
-                    (next_pipe.x + next_pipe.PIPELOW.get_width()/2, next_pipe.top + next_pipe.PIPEHIGH.get_height()),
-                    2)
-                pygame.draw.line(win, (255,0,0),
-                    (bird.x + bird.img.get_width()/2, bird.y + bird.img.get_height()/2),
-                    (next_pipe.x + next_pipe.PIPELOW.get_width()/2, next_pipe.bottom),
-                    2)
-        bird.draw(win)
-
-    score_label = STAT_FONT.render("Score: " + str(score),1,(255,255,255))
-    win.blit(score_label, (WIN_WIDTH - score_label.get_width() - 15, 10))
-    
-    Game.max_score = max(Game.max_score, score)
-    max_score_label = STAT_FONT.render("Max: " + str(Game.max_score),1,(255,255,255))
-    win.blit(max_score_label, (WIN_WIDTH - max_score_label.get_width() - 15, 50))
-    
-    gen_label = STAT_FONT.render("Gen: " + str(gen),1,(255,255,255))
-    win.blit(gen_label, (10, 10))
 
-    alive_label = STAT_FONT.render("Alive: " + str(len(birds)),1,(255,255,255))
-    win.blit(alive_label, (10, 50))
-
-    pygame.display.update()
+    Game.max_score = max(Game.max_score, score)
+    RENDERER.draw(birds, pipes, base,
+                  ["Gen: " + str(gen), "Alive: " + str(len(birds))],
+                  ["Score: " + str(score), "Max: " + str(Game.max_score)])
 
 class ResearchTracker:
     def __init__(self, target_scores, max_generations):
@@ -286,148 +348,281 @@ class ResearchTracker:
             'max_score_achieved': self.max_score_achieved,
             'generations_to_reach': self.generations_to_reach,
             'total_generations': self.current_generation,
-            'completed': all(g is not None for g in self.generations_to_reach.values())
+            'completed': all(g is not None for g in self.generations_to_reach.values()),
+            'stopped_early': False
         }
 
+def simulator_settings(config_dict):
+    """Simulator arguments for the current environment and fitness parameters"""
+    return {
+        'window': Pipes.WINDOW,
+        'pipe_distance': Pipes.PIPE_DISTANCE,
+        'reward_alive': config_dict.get('fitness_reward_alive', 0.1),
+        'reward_pipe': config_dict.get('fitness_reward_pipe', 5),
+        'penalty_collision': config_dict.get('fitness_penalty_collision', 1),
+        'geometry': COLLISION,
+        'decision_interval': config_dict.get('decision_interval', 1),
+        'decision_hold': config_dict.get('decision_hold', False),
+        'engine': config_dict.get('simulation_engine', 'frame'),
+        'record_flaps': config_dict.get('replay_dir') is not None,
+    }
+
+def generation_course(config_dict, pipe_distance=None, index=0):
+    """The next generation's pipe course: that of COURSE_SEED (+ index) when one is set, otherwise a fresh one"""
+    if pipe_distance is None:
+        pipe_distance = Pipes.PIPE_DISTANCE
+    seed = config_dict.get('course_seed')
+    cache_dir = COURSE_CACHE_DIR
+    if seed is None:
+        # One-off courses are not worth keeping on disk
+        seed = random.getrandbits(32)
+        cache_dir = None
+    else:
+        seed += index
+    length = course_length(pipe_distance, config_dict.get('frame_limit', 10000))
+    return get_course(seed, pipe_distance, length, cache_dir)
+
+def generation_courses(config_dict, pipe_distance=None):
+    """The EVAL_COURSES courses every genome of the next generation flies"""
+    return [generation_course(config_dict, pipe_distance, k) for k in range(config_dict.get('eval_courses', 1))]
+
+def aggregate_fitness(values, how):
+    """Combine results over courses, one row per course: 'mean', 'min' or a quantile between 0 and 1"""
+    if how == 'mean':
+        return values.mean(axis=0)
+    if how == 'min':
+        return values.min(axis=0)
+    if isinstance(how, (int, float)) and 0 <= how <= 1:
+        return np.quantile(values, how, axis=0)
+    raise ValueError("Unknown fitness aggregate %r, expected 'mean', 'min' or a quantile in [0, 1]" % (how,))
+
+def bird_passes(course, death_frame, frame_limit):
+    """Pipes each bird of a generation passed on `course`, from the generation's death frames"""
+    end_frame = frame_limit if (death_frame < 0).any() else int(death_frame.max(initial=0))
+    frames, bird = np.unique(np.where(death_frame < 0, end_frame, death_frame), return_inverse=True)
+    return np.array([course.passes(f, BIRD_X, COLLISION.pipe_width) for f in frames.tolist()])[bird]
+
+def fitness_cache(config_dict):
+    """The process's FitnessCache, or None when FITNESS_CACHE_SIZE is 0"""
+    size = config_dict.get('fitness_cache_size', 0)
+    if not size:
+        return None
+    if Game.fitness_cache is None or Game.fitness_cache.size != size:
+        Game.fitness_cache = FitnessCache(size)
+    return Game.fitness_cache
+
+def memoized_evaluation(genomes, config, course, config_dict, window=None):
+    """The generation's MemoizedEvaluation on course, or None without a fitness cache"""
+    cache = fitness_cache(config_dict)
+    if cache is None:
+        return None
+    settings = simulator_settings(config_dict)
+    if window is not None:
+        settings['window'] = window
+    return cache.evaluation(genomes, config, course, settings, config_dict.get('frame_limit', 10000))
+
+def eval_genomes_headless(genomes, config, config_dict):
+    """Evaluate a generation on the vectorized simulator, simulating each network the fitness cache lacks once"""
+    if config_dict.get('eval_courses', 1) > 1:
+        score, death_frame, record, memo_hits = evaluate_lanes(
+            [(genomes, Pipes.WINDOW, generation_courses(config_dict))], config, config_dict)[0]
+        publish_evaluation(score, death_frame, record, memo_hits, genomes, config)
+        return score
+
+    timer = Game.phase_timer
+    course = generation_course(config_dict)
+    memo = memoized_evaluation(genomes, config, course, config_dict)
+    todo = genomes if memo is None else memo.todo
+
+    fitness, death_frame, record = [], np.zeros(0, dtype=np.int64), None
+    score = 0
+    if todo:
+        network = PopulationNetwork.from_genomes([genome for genome_id, genome in todo], config)
+        sim = make_simulator(network.size, course=course, timer=timer, **simulator_settings(config_dict))
+        timer.lap('setup')
+
+        def policy(inputs, rows):
+            return network.activate(inputs, rows)[:, 0] > 0.5
+
+        score = sim.run(policy, config_dict.get('frame_limit', 10000))
+        fitness, death_frame = sim.fitness.tolist(), sim.death_frame
+        record = sim.record() if sim.decisions is not None else None
+
+    if memo is None:
+        for (genome_id, genome), value in zip(genomes, fitness):
+            genome.fitness = value
+    else:
+        score, death_frame, record = memo.complete(fitness, death_frame, record)
+        Game.generation_memo_hits = memo.hits + memo.clones
+    timer.lap('setup')
+
+    Game.generation_scores.append(score)
+    Game.generation_death_frames = death_frame
+    Game.generation_flaps = record
+    return score
+
 def eval_genomes(genomes, config, tracker, config_dict):
     global win
-    
+
+    if not config_dict.get('show_graphics', False):
+        return eval_genomes_headless(genomes, config, config_dict)
+
+    init_graphics()
+    Game.generation_death_frames = None
+    Game.generation_flaps = None
+    timer = Game.phase_timer
+
     nets = []
     birds = []
     ge = []
     for genome_id, genome in genomes:
         genome.fitness = 0
-        net = neat.nn.FeedForwardNetwork.create(genome, config)
+        net = NETWORK_CACHE.network(genome, config)
         nets.append(net)
         birds.append(Bird(50, 200))
         ge.append(genome)
+    flock = Flock(birds, nets, ge)
+
+    # Networks decide every decision_interval frames; in between the last
+    # decision is held (decision_hold) or released
+    decision_interval = config_dict.get('decision_interval', 1)
+    decision_hold = config_dict.get('decision_hold', False)
 
     base = Base(730)
-    pipes = deque()
-    for i in range(CONCURRENT_PIPES):
-        pipes.append(Pipes(700 + i * Pipes.PIPE_DISTANCE))
+    course = generation_course(config_dict)
+    pipes = PipeRing(Pipes(700 + i * Pipes.PIPE_DISTANCE, course.height(i)) for i in range(CONCURRENT_PIPES))
+    pipe_count = CONCURRENT_PIPES
     score = 0
 
-    if config_dict.get('show_graphics', False):
-        clock = pygame.time.Clock()
+    clock = pygame.time.Clock()
 
     run = True
-    frame_count = 0
-    while run and len(birds) > 0:
-        if config_dict.get('show_graphics', False):
-            clock.tick(60)
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    run = False
-                    pygame.quit()
-                    quit()
-                    break
-        else:
-            # Fast mode - no graphics, limited frames for efficiency
-            frame_count += 1
-            if frame_count > config_dict.get('frame_limit', 10000):  # Prevent infinite loops
+    frame = 0
+    timer.lap('setup')
+    while run and len(flock) > 0:
+        clock.tick(60)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                run = False
+                pygame.quit()
+                quit()
                 break
+        timer.lap('clock')
 
         base.move()
+        timer.lap('physics')
 
-        pipe_ind = 0
-        if len(birds) > 0:
-            closest_dist = float('inf')
-            for i, pipe in enumerate(pipes):
-                pipe_right_edge = pipe.x + pipe.PIPELOW.get_width()
-                if pipe_right_edge > birds[0].x:
-                    dist = pipe_right_edge - birds[0].x
-                    if dist < closest_dist:
-                        closest_dist = dist
-                        pipe_ind = i
-
-        for x, bird in enumerate(birds):
-            ge[x].fitness += config_dict.get('fitness_reward_alive', 0.1)
-            bird.move()
+        bird_x = flock.birds[0].x
+        pipe = pipes.next_pipe(bird_x)
+        timer.lap('pipes')
 
-            output = nets[x].activate((
-                bird.y,
-                abs(bird.y - pipes[pipe_ind].height),
-                abs(bird.y - pipes[pipe_ind].bottom),
-                pipes[pipe_ind].x - bird.x,
-                (pipes[pipe_ind].x + pipes[pipe_ind].PIPELOW.get_width()) - bird.x
-            ))
+        decide = frame % decision_interval == 0
+        jumps = flock.jumps
+        for x, bird in enumerate(flock.birds):
+            flock.ge[x].fitness += config_dict.get('fitness_reward_alive', 0.1)
+            bird.move()
+            timer.lap('physics')
 
-            if output[0] > 0.5:
+            if decide:
+                output = flock.nets[x].activate((
+                    bird.y,
+                    abs(bird.y - pipe.height),
+                    abs(bird.y - pipe.bottom),
+                    pipe.x - bird.x,
+                    (pipe.x + pipes.width) - bird.x
+                ))
+                jumps[x] = output[0] > 0.5
+                if jumps[x]:
+                    bird.jump()
+                timer.lap('network')
+            elif decision_hold and jumps[x]:
                 bird.jump()
 
-        rem_pipes = []
         add_pipe = False
         for pipe in pipes:
             pipe.move()
+            timer.lap('pipes')
 
-            for x, bird in enumerate(birds):
-                if Game.collision_detected(bird, pipe):
-                    ge[x].fitness -= config_dict.get('fitness_penalty_collision', 1)
-                    birds.pop(x)
-                    nets.pop(x)
-                    ge.pop(x)
-                    continue
-
-                pipe_right_edge = pipe.x + pipe.PIPELOW.get_width()
-                if not pipe.passed and pipe_right_edge < bird.x:
-                    pipe.passed = True
-                    add_pipe = True
+            # Broadphase: only a pipe over the bird column can be hit
+            if COLLISION.in_column(pipe.x, bird_x):
+                for x in np.flatnonzero(Game.birds_hit(flock.birds, pipe) & flock.alive).tolist():
+                    flock.ge[x].fitness -= config_dict.get('fitness_penalty_collision', 1)
+                    flock.kill(x)
+            timer.lap('collision')
 
-            if pipe.x + pipe.PIPELOW.get_width() < 0:
-                rem_pipes.append(pipe)
+            if len(flock) and not pipe.passed and pipe.x + pipes.width < bird_x:
+                pipe.passed = True
+                add_pipe = True
+            timer.lap('pipes')
+        flock.compact()
+        timer.lap('collision')
 
         if add_pipe:
             score += 1
-            for g in ge:
+            for g in flock.ge:
                 g.fitness += config_dict.get('fitness_reward_pipe', 5)
 
-        for r in rem_pipes:
-            pipes.remove(r)
-            new_x = pipes[-1].x + Pipes.PIPE_DISTANCE
-            pipes.append(Pipes(new_x))
+        while pipes.offscreen():
+            pipes.recycle(course.height(pipe_count))
+            pipe_count += 1
+        timer.lap('pipes')
 
-        for x, bird in enumerate(birds):
+        for x, bird in enumerate(flock.birds):
             if bird.y + bird.img.get_height() >= 730 or bird.y < 0:
-                birds.pop(x)
-                nets.pop(x)
-                ge.pop(x)
+                flock.kill(x)
+        flock.compact()
+        timer.lap('collision')
 
-        if config_dict.get('show_graphics', False):
-            draw_window(win, birds, pipes, base, score, tracker.current_generation)
+        draw_window(win, flock.birds, pipes, base, score, tracker.current_generation)
+        timer.lap('draw')
+        frame += 1
 
     Game.generation_scores.append(score)
     return score
 
+class CustomReporter(neat.reporting.BaseReporter):
+    """Feeds each generation's best score into the ResearchTracker"""
+
+    def __init__(self, tracker, config_dict, window_size, pipe_distance):
+        self.tracker = tracker
+        self.config_dict = config_dict
+        self.window_size = window_size
+        self.pipe_distance = pipe_distance
+        self.generation_counter = 0
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self.generation_counter += 1
+        max_score = max(Game.generation_scores) if Game.generation_scores else 0
+        self.tracker.update(self.generation_counter, max_score)
+
+        # Only print if not in multiprocessing mode to avoid output chaos
+        if self.config_dict.get('print_progress', True) and not self.config_dict.get('use_multiprocessing', False):
+            memo = ''
+            if Game.generation_memo_hits is not None:
+                runs = len(population) * self.config_dict.get('eval_courses', 1)
+                memo = f", Cached = {100 * Game.generation_memo_hits / runs:.0f}%"
+            print(f"Gen {self.generation_counter:3d}: Max Score = {max_score:3d}, "
+                  f"Window = {self.window_size}, Pipe Distance = {self.pipe_distance}{memo}")
+
+        Game.generation_scores = []
+        return self.tracker.finished
+
 def run_single_experiment_mp(args):
     """Wrapper function for multiprocessing - runs a single experiment"""
     window_size, pipe_distance, run_number, config_dict = args
     
     try:
-        # Initialize pygame for this process (required for each worker)
-        import pygame
-        pygame.init()
-        pygame.font.init()
-        
-        # Create dummy surfaces for headless operation
-        global BIRD_IMGS, PIPE_IMG, BASE_IMG, BG_IMG
-        BIRD_IMGS = [pygame.Surface((34, 24)) for _ in range(3)]
-        PIPE_IMG = pygame.Surface((52, 320))
-        BASE_IMG = pygame.Surface((336, 112))
-        BG_IMG = pygame.Surface((600, 900))
-        
-        # Update class variables
-        Pipes.PIPELOW = PIPE_IMG
-        Pipes.PIPEHIGH = pygame.transform.rotate(PIPE_IMG, 180)
-        Bird.IMGS = BIRD_IMGS
-        Base.IMG = BASE_IMG
-        Base.WIDTH = BASE_IMG.get_width()
-        
-        # Run the experiment
+        # Headless evaluation runs on the simulator, so workers need no pygame setup
         local_dir = os.path.dirname(__file__)
         config_path = os.path.join(local_dir, 'config-feedforward.txt')
+        checkpoint_path = experiment_path(config_dict['study_dir'], window_size, pipe_distance, run_number)
+        telemetry_file = telemetry_path(config_dict['telemetry_dir'], config_dict['results_file'],
+                                        window_size, pipe_distance, run_number)
+        replay_file = replay_path(config_dict['replay_dir'], config_dict['results_file'],
+                                  window_size, pipe_distance, run_number)
         
-        result = run_experiment_core(window_size, pipe_distance, config_path, config_dict)
+        result = run_experiment_core(window_size, pipe_distance, config_path, config_dict,
+                                     checkpoint_path, telemetry_file, replay_file)
         return {
             'window_size': window_size,
             'pipe_distance': pipe_distance,
@@ -446,12 +641,26 @@ def run_single_experiment_mp(args):
             'error': str(e)
         }
 
-def run_experiment_core(window_size, pipe_distance, config_file, config_dict):
+def run_experiment_core(window_size, pipe_distance, config_file, config_dict, checkpoint_path=None,
+                        telemetry_file=None, replay_file=None):
     """Core experiment logic separated for multiprocessing"""
+    generations = experiment_generations(window_size, pipe_distance, config_file, config_dict, checkpoint_path,
+                                         telemetry_file, replay_file)
+    try:
+        while True:
+            next(generations)
+    except StopIteration as stop:
+        return stop.value
+
+def experiment_generations(window_size, pipe_distance, config_file, config_dict, checkpoint_path=None,
+                           telemetry_file=None, replay_file=None):
+    """run_experiment_core as a generator yielding each population before it is evaluated"""
     
     # Set environment parameters
     Pipes.WINDOW = window_size
     Pipes.PIPE_DISTANCE = pipe_distance
+    if config_dict.get('show_graphics', False):
+        init_graphics()
     
     # Load NEAT config
     config = neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction,
@@ -465,46 +674,124 @@ def run_experiment_core(window_size, pipe_distance, config_file, config_dict):
     Game.score = 0
     Game.max_score = 0
     Game.generation_scores = []
+    Game.generation_death_frames = None
+    Game.generation_flaps = None
+    Game.generation_memo_hits = None
     
-    # Create population
-    p = neat.Population(config)
+    # Create population, or pick up where a previous run of this experiment stopped
+    state = load_state(checkpoint_path)
+    generation = 0
+    if state is None:
+        p = neat.Population(config)
+    else:
+        p = restore_population(config, state['population'])
+        tracker.__dict__.update(state['tracker'])
+        generation = state['generation']
+        random.setstate(state['random'])
     
-    class CustomReporter(neat.reporting.BaseReporter):
-        def __init__(self, tracker, config_dict, window_size, pipe_distance):
-            self.tracker = tracker
-            self.config_dict = config_dict
-            self.window_size = window_size
-            self.pipe_distance = pipe_distance
-            self.generation_counter = 0
-            
-        def post_evaluate(self, config, population, species, best_genome):
-            self.generation_counter += 1
-            max_score = max(Game.generation_scores) if Game.generation_scores else 0
-            self.tracker.update(self.generation_counter, max_score)
-            
-            # Only print if not in multiprocessing mode to avoid output chaos
-            if self.config_dict.get('print_progress', True) and not self.config_dict.get('use_multiprocessing', False):
-                print(f"Gen {self.generation_counter:3d}: Max Score = {max_score:3d}, "
-                      f"Window = {self.window_size}, Pipe Distance = {self.pipe_distance}")
-            
-            Game.generation_scores = []
-            return self.tracker.finished
+    # Telemetry reads the generation's scores, so it reports before CustomReporter clears them.
+    # A resumed experiment's telemetry and replays continue the files saved with its last checkpoint.
+    telemetry = None
+    if telemetry_file is not None:
+        telemetry = TelemetryReporter(telemetry_file, Game, config_dict['max_generations'], config.pop_size,
+                                      config_dict.get('frame_limit', 10000), resume_generations=generation)
+        p.add_reporter(telemetry)
+    replays = None
+    if replay_file is not None:
+        replays = ReplayReporter(replay_file, Game, resume_generations=generation)
+        p.add_reporter(replays)
     
     # Add custom reporter
     custom_reporter = CustomReporter(tracker, config_dict, window_size, pipe_distance)
+    custom_reporter.generation_counter = generation
     p.add_reporter(custom_reporter)
+
+    # Time the phases of every generation (printed after the generation's progress line)
+    phase_reporter = None
+    if config_dict.get('profile_phases', False):
+        Game.phase_timer = PhaseTimer()
+        label = f"W{window_size}_D{pipe_distance}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        print_phases = config_dict.get('print_progress', True) and not config_dict.get('use_multiprocessing', False)
+        phase_reporter = PhaseReporter(Game.phase_timer, label, print_phases,
+                                       config_dict.get('profile_generations', []),
+                                       config_dict.get('profile_dir', 'profiles'))
+        p.add_reporter(phase_reporter)
     
-    # Run evolution with custom evaluation
-    def eval_wrapper(genomes, config):
-        return eval_genomes(genomes, config, tracker, config_dict)
+    # Run evolution with custom evaluation, splitting each generation across
+    # processes when configured
+    evaluator = None
+    # Several courses per genome are simulated as lanes in this process instead
+    if (config_dict.get('eval_processes', 1) > 1 and config_dict.get('eval_courses', 1) == 1
+            and not config_dict.get('show_graphics', False)):
+        evaluator = ParallelEvaluator(config_dict['eval_processes'], simulator_settings(config_dict),
+                                      config_dict.get('frame_limit', 10000))
+
+        def eval_wrapper(genomes, config):
+            course = generation_course(config_dict)
+            memo = memoized_evaluation(genomes, config, course, config_dict)
+            if memo is None:
+                Game.generation_scores.append(evaluator(genomes, config, course))
+                Game.generation_death_frames = evaluator.death_frame
+                Game.generation_flaps = evaluator.record
+            else:
+                fitness, death_frame, record = [], np.zeros(0, dtype=np.int64), None
+                if memo.todo:
+                    evaluator(memo.todo, config, course)
+                    fitness = [genome.fitness for genome_id, genome in memo.todo]
+                    death_frame, record = evaluator.death_frame, evaluator.record
+                score, Game.generation_death_frames, Game.generation_flaps = memo.complete(fitness, death_frame,
+                                                                                           record)
+                Game.generation_scores.append(score)
+                Game.generation_memo_hits = memo.hits + memo.clones
+            Game.phase_timer.lap('workers')
+    else:
+        def eval_wrapper(genomes, config):
+            return eval_genomes(genomes, config, tracker, config_dict)
     
-    # Run until targets reached or max generations
-    generation = 0
-    while not tracker.finished and generation < config_dict['max_generations']:
-        p.run(eval_wrapper, 1)
-        generation += 1
-        if tracker.finished:
-            break
+    def save_checkpoint():
+        if telemetry is not None:
+            telemetry.save()
+        if replays is not None:
+            replays.save()
+        save_state(checkpoint_path, {
+            'population': population_state(p),
+            'tracker': dict(tracker.__dict__),
+            'generation': generation,
+            'random': random.getstate(),
+        })
+    
+    # Run until targets reached or max generations, or only up to the round's
+    # generation_budget in a successive-halving sweep
+    interval = config_dict.get('checkpoint_interval', 5)
+    budget = min(config_dict['max_generations'], config_dict.get('generation_budget') or config_dict['max_generations'])
+    checkpointed = generation
+    try:
+        while not tracker.finished and generation < budget:
+            # A fitness function sent back replaces the usual evaluation (see run_experiments_batched)
+            evaluation = yield p
+            p.run(eval_wrapper if evaluation is None else evaluation, 1)
+            generation += 1
+            if tracker.finished:
+                break
+            if checkpoint_path is not None and generation % interval == 0:
+                save_checkpoint()
+                checkpointed = generation
+        # An experiment stopped by its budget continues from here in the next round
+        if checkpoint_path is not None and not tracker.finished and generation != checkpointed:
+            save_checkpoint()
+    finally:
+        if evaluator is not None:
+            evaluator.close()
+        if telemetry is not None:
+            telemetry.save()
+        if replays is not None:
+            replays.save()
+        if phase_reporter is not None:
+            Game.phase_timer = NULL_TIMER
+            # Pool and distributed workers run quietly, like the per-generation lines
+            if phase_reporter.print_progress:
+                print(f"Phases W={window_size}, D={pipe_distance}: {phase_reporter.summary()}")
+                print(f"Network cache: {NETWORK_CACHE.summary()}")
     
     # Final update to ensure we have correct total_generations count
     if hasattr(custom_reporter, 'generation_counter'):
@@ -512,44 +799,452 @@ def run_experiment_core(window_size, pipe_distance, config_file, config_dict):
     
     return tracker.get_results()
 
-def run_experiment(window_size, pipe_distance, config_file):
+def estimate_experiment_cost(window_size, pipe_distance, config_dict):
+    """Rough relative cost of an experiment: frames a bird needs to reach the highest target"""
+    return max(config_dict['target_scores']) * pipe_distance / Pipes.VEL
+
+def order_by_cost(experiments, config_dict):
+    """Experiments sorted most expensive first, so the longest ones do not start last"""
+    return sorted(experiments, reverse=True, key=lambda e: estimate_experiment_cost(e[0], e[1], config_dict))
+
+def init_worker():
+    """Set up per-process state in a sweep worker"""
+    random.seed()
+    Game.score = 0
+    Game.max_score = 0
+    Game.generation_scores = []
+
+def run_experiments_parallel(experiments, config_dict):
+    """Run experiments on a process pool, most expensive first, yielding results as they finish"""
+    ordered = order_by_cost(experiments, config_dict)
+    args = [(window_size, pipe_distance, run_num, config_dict)
+            for window_size, pipe_distance, run_num in ordered]
+
+    # Spawned workers start from a clean interpreter instead of a copy of ours
+    ctx = mp.get_context('spawn')
+    processes = min(config_dict['num_processes'], len(args))
+    with ctx.Pool(processes, initializer=init_worker) as pool:
+        for result in pool.imap_unordered(run_single_experiment_mp, args, chunksize=1):
+            yield result
+
+# Config paths workers write to, sent to them as absolute paths
+DISTRIBUTED_PATHS = ('study_dir', 'checkpoint_dir', 'telemetry_dir', 'replay_dir', 'profile_dir', 'results_file')
+
+def run_experiments_distributed(experiments, config_dict):
+    """Run experiments on TCP workers (see distributed.py), most expensive first, yielding results as they come"""
+    ordered = order_by_cost(experiments, config_dict)
+    # Workers run one experiment at a time each, quietly
+    worker_config = dict(config_dict, use_multiprocessing=False, print_progress=False, batch_cells=False,
+                         distributed=False, show_graphics=False)
+    for key in DISTRIBUTED_PATHS:
+        if worker_config.get(key) is not None:
+            worker_config[key] = os.path.abspath(worker_config[key])
+    coordinator = Coordinator(ordered, worker_config, config_dict['coordinator_host'],
+                              config_dict['coordinator_port'], config_dict['lease_seconds'])
+    host, port = coordinator.address
+    print(f"Coordinator listening on {host}:{port}; start workers with: python distributed.py HOST {port}")
+    if host not in ('127.0.0.1', 'localhost'):
+        shared = ', '.join(str(worker_config[key]) for key in DISTRIBUTED_PATHS if worker_config.get(key) is not None)
+        print(f"Workers on other machines write to these paths, which should be shared storage: {shared}")
+    workers = start_local_workers(config_dict['local_workers'], '127.0.0.1' if host == '0.0.0.0' else host, port)
+    try:
+        for result in coordinator:
+            yield result
+    finally:
+        coordinator.close()
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        if coordinator.reassigned:
+            print(f"Reassigned {coordinator.reassigned} experiments from lost workers, "
+                  f"dropped {coordinator.duplicates} duplicate results")
+
+def publish_evaluation(score, death_frame, record, memo_hits, genomes, config):
+    """Fitness function for a generation whose genomes already have their fitness; sets the Game statistics"""
+    Game.generation_scores.append(score)
+    Game.generation_death_frames = death_frame
+    Game.generation_flaps = record
+    Game.generation_memo_hits = memo_hits
+
+def evaluate_lanes(groups, config, config_dict):
+    """Simulate (genomes, window_size, courses) groups on one LaneSimulator; returns results per group"""
+    frame_limit = config_dict.get('frame_limit', 10000)
+    lanes = []  # (group, window_size, course, memo, genomes to simulate)
+    for g, (genomes, window_size, courses) in enumerate(groups):
+        for course in courses:
+            memo = memoized_evaluation(genomes, config, course, config_dict, window_size)
+            lanes.append((g, window_size, course, memo, genomes if memo is None else memo.todo))
+
+    settings = simulator_settings(config_dict)
+    for key in ('window', 'pipe_distance', 'engine'):
+        del settings[key]
+    sim = LaneSimulator([len(todo) for g, window_size, course, memo, todo in lanes],
+                        [window_size for g, window_size, course, memo, todo in lanes],
+                        [course for g, window_size, course, memo, todo in lanes], timer=Game.phase_timer, **settings)
+    scores = np.zeros(len(lanes), dtype=np.int64)
+    if sim.size:
+        network = PopulationNetwork.from_genomes(
+            [genome for g, window_size, course, memo, todo in lanes for genome_id, genome in todo], config)
+
+        def policy(inputs, rows):
+            return network.activate(inputs, rows)[:, 0] > 0.5
+
+        scores = sim.run(policy, frame_limit)
+
+    results = [None] * len(groups)
+    fitness = [[] for group in groups]
+    passes = [[] for group in groups]
+    for lane, (g, window_size, course, memo, todo) in enumerate(lanes):
+        genomes = groups[g][0]
+        birds = sim.lane_slice(lane)
+        lane_fitness, death_frame = sim.fitness[birds].tolist(), sim.death_frame[birds].copy()
+        record = sim.record(lane) if sim.decisions is not None and sim.sizes[lane] else None
+        score = int(scores[lane])
+        memo_hits = None
+        if memo is not None:
+            score, death_frame, record = memo.complete(lane_fitness, death_frame, record)
+            lane_fitness = [genome.fitness for genome_id, genome in genomes]
+            memo_hits = memo.hits + memo.clones
+        if results[g] is None:
+            results[g] = [score, death_frame, record, memo_hits]
+        elif memo_hits is not None:
+            results[g][3] += memo_hits
+        fitness[g].append(lane_fitness)
+        if len(groups[g][2]) > 1:
+            passes[g].append(bird_passes(course, death_frame, frame_limit))
+
+    # Fitness and the best bird's pipes passed combine over a group's courses by FITNESS_AGGREGATE;
+    # death frames and flaps are those of its first course
+    how = config_dict.get('fitness_aggregate', 'mean')
+    for g, (genomes, window_size, courses) in enumerate(groups):
+        values = fitness[g][0]
+        if len(courses) > 1:
+            values = aggregate_fitness(np.array(fitness[g]), how).tolist()
+            results[g][0] = int(aggregate_fitness(np.array(passes[g]), how).max(initial=0))
+        for (genome_id, genome), value in zip(genomes, values):
+            genome.fitness = value
+    return [tuple(result) for result in results]
+
+def evaluate_cells(cells, config_dict):
+    """Evaluate the next generation of several experiments together; returns a fitness function per cell"""
+    groups = [(list(p.population.items()), experiment[0], generation_courses(config_dict, experiment[1]))
+              for experiment, p in cells]
+    return [functools.partial(publish_evaluation, *result)
+            for result in evaluate_lanes(groups, cells[0][1].config, config_dict)]
+
+def run_experiments_batched(experiments, config_dict):
+    """Run experiments in this process, simulating their generations together on one LaneSimulator"""
+    local_dir = os.path.dirname(__file__)
+    config_path = os.path.join(local_dir, 'config-feedforward.txt')
+    # The lanes replace per-experiment evaluation processes and phase timing
+    cell_config = dict(config_dict, eval_processes=1, profile_phases=False, show_graphics=False)
+
+    generations = {}
+    populations = {}
+
+    def advance(experiment, evaluation=None):
+        """Run an experiment up to its next evaluation; returns its result once it is over"""
+        window_size, pipe_distance, run_number = experiment
+        result = {'window_size': window_size, 'pipe_distance': pipe_distance, 'run_number': run_number,
+                  'results': None, 'success': True, 'error': None}
+        try:
+            populations[experiment] = generations[experiment].send(evaluation)
+            return None
+        except StopIteration as stop:
+            result['results'] = stop.value
+        except Exception as e:
+            result['success'] = False
+            result['error'] = str(e)
+        populations.pop(experiment, None)
+        return result
+
+    for experiment in experiments:
+        window_size, pipe_distance, run_number = experiment
+        generations[experiment] = experiment_generations(
+            window_size, pipe_distance, config_path, cell_config,
+            experiment_path(config_dict['study_dir'], window_size, pipe_distance, run_number),
+            telemetry_path(config_dict['telemetry_dir'], config_dict['results_file'],
+                           window_size, pipe_distance, run_number),
+            replay_path(config_dict['replay_dir'], config_dict['results_file'], window_size, pipe_distance,
+                        run_number))
+        result = advance(experiment)
+        if result is not None:
+            yield result
+
+    # Each round simulates the next generation of every unfinished experiment together, before
+    # those generations start, so their telemetry eval_time leaves it out. Each still evolves on its own.
+    while populations:
+        cells = list(populations.items())
+        try:
+            evaluations = evaluate_cells(cells, cell_config)
+        except Exception as e:
+            for experiment, p in cells:
+                generations[experiment].close()
+                yield {'window_size': experiment[0], 'pipe_distance': experiment[1], 'run_number': experiment[2],
+                       'results': None, 'success': False, 'error': str(e)}
+            return
+        for (experiment, p), evaluation in zip(cells, evaluations):
+            result = advance(experiment, evaluation)
+            if result is not None:
+                yield result
+
+def run_experiment(window_size, pipe_distance, config_file, checkpoint_path=None, telemetry_file=None,
+                   replay_file=None):
     """Original run_experiment function for non-multiprocessing mode"""
-    return run_experiment_core(window_size, pipe_distance, config_file, RESEARCH_CONFIG)
+    return run_experiment_core(window_size, pipe_distance, config_file, RESEARCH_CONFIG,
+                               checkpoint_path, telemetry_file, replay_file)
 
-def save_results_to_csv(all_results, filename):
-    """Save experimental results to CSV file"""
-    
+def results_fieldnames(target_scores):
+    """CSV columns of the research results files"""
     fieldnames = ['window_size', 'pipe_distance', 'run_number', 'max_score_achieved', 
-                  'total_generations', 'completed']
+                  'total_generations', 'completed', 'stopped_early']
     
     # Add columns for each target score
-    for score in RESEARCH_CONFIG['target_scores']:
+    for score in target_scores:
         fieldnames.append(f'generations_to_{score}')
+    return fieldnames
+
+def result_row(result, target_scores):
+    """One CSV row for a finished experiment"""
+    row = {
+        'window_size': result['window_size'],
+        'pipe_distance': result['pipe_distance'],
+        'run_number': result['run_number'],
+        'max_score_achieved': result['results']['max_score_achieved'],
+        'total_generations': result['results']['total_generations'],
+        'completed': result['results']['completed'],
+        # Stopped by successive halving before max_generations, so not a failure
+        'stopped_early': result['results'].get('stopped_early', False)
+    }
     
-    with open(filename, 'w', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        
+    # Add target score columns
+    for score in target_scores:
+        gens = result['results']['generations_to_reach'].get(score)
+        row[f'generations_to_{score}'] = gens if gens is not None else 'N/A'
+    return row
+
+class ResultsWriter:
+    """Streams experiment results into a CSV file, and optionally a ResultsDatabase, as they finish"""
+
+    def __init__(self, filename, target_scores, sync_every=10, append=False, database=None, telemetry_dir=None):
+        # Rows are flushed as they are written and synced every sync_every rows, never kept in memory.
+        # append=True continues an existing file, and `key in writer` tells which experiments it holds.
+        self.filename = filename
+        self.target_scores = target_scores
+        self.sync_every = sync_every
+        self.written = set()
+        self.pending = 0
+        self.telemetry_dir = telemetry_dir
+        if append and os.path.exists(filename):
+            self._trim()
+            with open(filename, newline='') as csvfile:
+                for row in csv.DictReader(csvfile):
+                    self.written.add((int(row['window_size']), int(row['pipe_distance']), int(row['run_number'])))
+        else:
+            append = False
+
+        # A resumed sweep keeps adding to its study, a fresh one replaces it along with the CSV
+        self.database = None
+        if database is not None:
+            self.database = ResultsDatabase(database)
+            self.study_id = self.database.study(filename, fresh=not append)
+
+        self.file = open(filename, 'a' if append else 'w', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=results_fieldnames(target_scores))
+        if not append or self.file.tell() == 0:
+            self.writer.writeheader()
+            self.sync()
+
+    def _trim(self):
+        """Drop a last row left unfinished by a crash"""
+        with open(self.filename, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def __contains__(self, key):
+        return key in self.written
+
+    def write(self, result):
+        self.writer.writerow(result_row(result, self.target_scores))
+        self.file.flush()
+        self.pending += 1
+        if self.pending >= self.sync_every:
+            self.sync()
+        if self.database is not None:
+            run_id = self.database.add_run(self.study_id, result)
+            path = telemetry_path(self.telemetry_dir, self.filename, result['window_size'], result['pipe_distance'],
+                                  result['run_number'])
+            if run_id is not None and path is not None and os.path.exists(path):
+                self.database.add_telemetry(run_id, load_telemetry(path))
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def save_results_to_csv(all_results, filename):
+    """Save experimental results to CSV file"""
+    with ResultsWriter(filename, RESEARCH_CONFIG['target_scores']) as writer:
         for result in all_results:
-            row = {
-                'window_size': result['window_size'],
-                'pipe_distance': result['pipe_distance'],
-                'run_number': result['run_number'],
-                'max_score_achieved': result['results']['max_score_achieved'],
-                'total_generations': result['results']['total_generations'],
-                'completed': result['results']['completed']
-            }
-            
-            # Add target score columns
-            for score in RESEARCH_CONFIG['target_scores']:
-                gens = result['results']['generations_to_reach'].get(score)
-                row[f'generations_to_{score}'] = gens if gens is not None else 'N/A'
-            
-            writer.writerow(row)
+            writer.write(result)
+
+def experiment_progress(results):
+    """Sort key of an experiment's progress: targets reached, then how quickly, then best score"""
+    reached = [gens for gens in results['generations_to_reach'].values() if gens is not None]
+    speed = -sum(reached) / len(reached) if reached else 0
+    return (len(reached), speed, results['max_score_achieved'])
+
+def experiment_finished(results, config_dict):
+    return results['completed'] or results['total_generations'] >= config_dict['max_generations']
+
+def promote_cells(cell_results, eta):
+    """The best 1/eta of the cells by mean progress, plus cells with a run as good as the weakest of those"""
+    def mean_progress(results):
+        keys = [experiment_progress(r) for r in results]
+        return tuple(sum(column) / len(keys) for column in zip(*keys))
+
+    progress = {cell: mean_progress(results) for cell, results in cell_results.items()}
+    ranked = sorted(progress, key=progress.get, reverse=True)
+    keep = max(1, math.ceil(len(ranked) / eta))
+    cutoff = progress[ranked[keep - 1]]
+    promoted = set(ranked[:keep])
+    for cell in ranked[keep:]:
+        if max(experiment_progress(r) for r in cell_results[cell]) >= cutoff:
+            promoted.add(cell)
+    return promoted
+
+def run_successive_halving(experiments, checkpoint, writer, parallel, start_time):
+    """Race the sweep's cells in rounds of growing generation budgets"""
+    config_dict = RESEARCH_CONFIG
+    eta = config_dict['halving_eta']
+    max_generations = config_dict['max_generations']
+    total_experiments = len(experiments)
+
+    # Every round, unfinished experiments run up to the round's budget, continuing from their checkpoints,
+    # so a promoted one evolves as it would have without the stops. Those that reach all targets or
+    # max_generations are final; the unfinished runs of cells not promoted are recorded as stopped_early.
+
+    # Finished experiments of a resumed sweep still count towards their cell's rank
+    all_results = {}
+    recorded = list(checkpoint.results())
+    for result in recorded:
+        all_results[(result['window_size'], result['pipe_distance'], result['run_number'])] = result['results']
+    live = [e for e in experiments if e not in all_results]
+    generations_used = sum(results['total_generations'] for results in all_results.values())
+
+    def record(experiment, results, note):
+        nonlocal generations_used
+        window_size, pipe_distance, run_num = experiment
+        result = {'window_size': window_size, 'pipe_distance': pipe_distance, 'run_number': run_num,
+                  'results': results}
+        checkpoint.record(result)
+        writer.write(result)
+        recorded.append(result)
+        generations_used += results['total_generations']
+        percent = (len(recorded) / total_experiments) * 100
+        print(f"[{len(recorded):3d}/{total_experiments}] ({percent:5.1f}%) "
+              f"W={window_size}, D={pipe_distance}, R={run_num} "
+              f"→ Score: {results['max_score_achieved']}, "
+              f"Gen: {results['total_generations']}, "
+              f"Done: {results['completed']} {note}[{time.time() - start_time:.0f}s]")
+
+    budget = min(config_dict['halving_min_generations'], max_generations)
+    round_number = 1
+    while live:
+        print(f"\nRound {round_number}: {len(live)} experiments, up to {budget} generations\n")
+        round_config = dict(config_dict, generation_budget=budget)
+        if config_dict['distributed']:
+            round_results = run_experiments_distributed(live, round_config)
+        elif config_dict['batch_cells']:
+            round_results = run_experiments_batched(live, round_config)
+        elif parallel:
+            round_results = run_experiments_parallel(live, round_config)
+        else:
+            round_results = map(run_single_experiment_mp, [e + (round_config,) for e in live])
+
+        still_live = []
+        for result in round_results:
+            experiment = (result['window_size'], result['pipe_distance'], result['run_number'])
+            if not result['success']:
+                print(f"W={result['window_size']}, D={result['pipe_distance']}, R={result['run_number']} "
+                      f"→ FAILED: {result['error']}")
+                continue
+            all_results[experiment] = result['results']
+            if experiment_finished(result['results'], config_dict):
+                record(experiment, result['results'], '')
+            else:
+                still_live.append(experiment)
+        if not still_live:
+            break
+        if budget >= max_generations:
+            # Only happens if an experiment could not continue; keep what it reached
+            for experiment in still_live:
+                record(experiment, all_results[experiment], '')
+            break
+
+        # Rank every cell that still has running experiments, using all its runs
+        cell_results = {}
+        for window_size, pipe_distance, run_num in experiments:
+            cell_results.setdefault((window_size, pipe_distance), []).append(
+                all_results.get((window_size, pipe_distance, run_num)))
+        racing = set((e[0], e[1]) for e in still_live)
+        promoted = promote_cells(dict((cell, [r for r in results if r is not None])
+                                      for cell, results in cell_results.items() if cell in racing), eta)
+
+        live = []
+        for experiment in still_live:
+            if (experiment[0], experiment[1]) in promoted:
+                live.append(experiment)
+            else:
+                record(experiment, dict(all_results[experiment], stopped_early=True),
+                       f"(stopped after round {round_number}) ")
+        budget = min(budget * eta, max_generations)
+        round_number += 1
+
+    return recorded, generations_used
 
 def run_research_study():
-    """Run the complete research study in sequential mode"""
-    
+    """Run the complete research study, in parallel when multiprocessing is enabled"""
+    distributed = RESEARCH_CONFIG['distributed']
+    batched = RESEARCH_CONFIG['batch_cells'] and not distributed
+    parallel = (RESEARCH_CONFIG['use_multiprocessing'] and RESEARCH_CONFIG['num_processes'] > 1
+                and not batched and not distributed)
+    halving = RESEARCH_CONFIG['sweep_mode'] == 'halving'
+
+    local_dir = os.path.dirname(__file__)
+    config_path = os.path.join(local_dir, 'config-feedforward.txt')
+
+    # Finished experiments and in-flight populations are checkpointed, so a
+    # rerun of the same sweep resumes it (and keeps writing the same results file)
+    checkpoint = None
+    completed = set()
+    checkpoint_dir = RESEARCH_CONFIG['checkpoint_dir']
+    scratch_dir = None
+    if halving and not checkpoint_dir:
+        # Successive halving continues experiments through their checkpoints
+        checkpoint_dir = scratch_dir = tempfile.mkdtemp(prefix='halving_')
+    if checkpoint_dir:
+        checkpoint = SweepCheckpoint(checkpoint_dir, RESEARCH_CONFIG, config_path)
+        RESEARCH_CONFIG['study_dir'] = checkpoint.path
+        RESEARCH_CONFIG['results_file'] = checkpoint.results_file
+        completed = checkpoint.completed()
+
     print("=" * 60)
     print("FLAPPY BIRD GENETIC LEARNING RESEARCH STUDY")
     print("=" * 60)
@@ -559,8 +1254,21 @@ def run_research_study():
     print(f"Runs per configuration: {RESEARCH_CONFIG['runs_per_config']}")
     print(f"Max generations per run: {RESEARCH_CONFIG['max_generations']}")
     print(f"Show graphics: {RESEARCH_CONFIG['show_graphics']}")
-    print(f"Running in SEQUENTIAL mode (multiprocessing disabled)")
+    if distributed:
+        print(f"Running in DISTRIBUTED mode ({RESEARCH_CONFIG['local_workers']} local workers, "
+              f"more can connect to port {RESEARCH_CONFIG['coordinator_port']})")
+    elif batched:
+        print("Running in BATCHED mode (all experiments in one simulation)")
+    elif parallel:
+        print(f"Running in PARALLEL mode ({RESEARCH_CONFIG['num_processes']} processes)")
+    else:
+        print(f"Running in SEQUENTIAL mode (multiprocessing disabled)")
+    if halving:
+        print(f"Successive halving: rounds from {RESEARCH_CONFIG['halving_min_generations']} generations, "
+              f"keeping 1/{RESEARCH_CONFIG['halving_eta']} of the cells each round")
     print(f"Results will be saved to: {RESEARCH_CONFIG['results_file']}")
+    if checkpoint is not None:
+        print(f"Checkpoints: {checkpoint.path}")
     print("=" * 60)
     
     # Prepare experiment list
@@ -572,48 +1280,123 @@ def run_research_study():
     
     total_experiments = len(experiments)
     print(f"Total experiments to run: {total_experiments}")
+    if completed:
+        print(f"Resuming sweep: {len(completed)} experiments already finished")
     
     start_time = time.time()
     all_results = []
-    
-    # Sequential mode only
-    print("\nRunning experiments sequentially...\n")
-    
-    local_dir = os.path.dirname(__file__)
-    config_path = os.path.join(local_dir, 'config-feedforward.txt')
-    
-    for i, (window_size, pipe_distance, run_num) in enumerate(experiments):
-        experiment_count = i + 1
-        percent = (experiment_count / total_experiments) * 100
-        
-        print(f"[{experiment_count:3d}/{total_experiments}] ({percent:5.1f}%) "
-              f"Testing W={window_size}, D={pipe_distance}, R={run_num}")
-        
-        results = run_experiment(window_size, pipe_distance, config_path)
-        
-        all_results.append({
-            'window_size': window_size,
-            'pipe_distance': pipe_distance,
-            'run_number': run_num,
-            'results': results
-        })
+
+    # Results go to the CSV as each experiment finishes
+    writer = ResultsWriter(RESEARCH_CONFIG['results_file'], RESEARCH_CONFIG['target_scores'],
+                           RESEARCH_CONFIG['results_sync_every'], append=checkpoint is not None and checkpoint.resumed,
+                           database=RESEARCH_CONFIG['results_db'],
+                           telemetry_dir=RESEARCH_CONFIG['telemetry_dir'] if RESEARCH_CONFIG['results_db_telemetry']
+                           else None)
+    try:
+        if checkpoint is not None:
+            # Experiments journaled just before a crash may not have reached the CSV
+            for result in checkpoint.results():
+                if (result['window_size'], result['pipe_distance'], result['run_number']) not in writer:
+                    writer.write(result)
+                if not halving:
+                    all_results.append(result)
+
+        if halving:
+            all_results, generations_used = run_successive_halving(experiments, checkpoint, writer, parallel,
+                                                                   start_time)
+        elif parallel or batched or distributed:
+            pending = [e for e in experiments if e not in completed]
+            if distributed:
+                print("\nRunning experiments on distributed workers, longest first...\n")
+                finished = run_experiments_distributed(pending, RESEARCH_CONFIG)
+            elif batched:
+                print("\nRunning experiments batched, one generation of each at a time...\n")
+                finished = run_experiments_batched(pending, RESEARCH_CONFIG)
+            else:
+                print("\nRunning experiments in parallel, longest first...\n")
+                finished = run_experiments_parallel(pending, RESEARCH_CONFIG)
+
+            # Only the main process prints, one line per finished experiment
+            for i, result in enumerate(finished):
+                experiment_count = len(completed) + i + 1
+                percent = (experiment_count / total_experiments) * 100
+                elapsed = time.time() - start_time
+
+                if not result['success']:
+                    print(f"[{experiment_count:3d}/{total_experiments}] ({percent:5.1f}%) "
+                          f"W={result['window_size']}, D={result['pipe_distance']}, R={result['run_number']} "
+                          f"→ FAILED: {result['error']}")
+                    continue
+
+                # Journal first: a result in the CSV is then always in the journal too
+                if checkpoint is not None:
+                    checkpoint.record(result)
+                writer.write(result)
+                all_results.append(result)
+                results = result['results']
+                print(f"[{experiment_count:3d}/{total_experiments}] ({percent:5.1f}%) "
+                      f"W={result['window_size']}, D={result['pipe_distance']}, R={result['run_number']} "
+                      f"→ Score: {results['max_score_achieved']}, "
+                      f"Gen: {results['total_generations']}, "
+                      f"Done: {results['completed']} [{elapsed:.0f}s]")
+        else:
+            print("\nRunning experiments sequentially...\n")
         
-        print(f"    → Score: {results['max_score_achieved']}, "
-              f"Gen: {results['total_generations']}, "
-              f"Done: {results['completed']}")
-    
-    # Save results
-    if all_results:
-        save_results_to_csv(all_results, RESEARCH_CONFIG['results_file'])
+            for i, (window_size, pipe_distance, run_num) in enumerate(experiments):
+                experiment_count = i + 1
+                percent = (experiment_count / total_experiments) * 100
+                if (window_size, pipe_distance, run_num) in completed:
+                    continue
+            
+                print(f"[{experiment_count:3d}/{total_experiments}] ({percent:5.1f}%) "
+                      f"Testing W={window_size}, D={pipe_distance}, R={run_num}")
+            
+                checkpoint_path = experiment_path(RESEARCH_CONFIG['study_dir'], window_size, pipe_distance, run_num)
+                telemetry_file = telemetry_path(RESEARCH_CONFIG['telemetry_dir'], RESEARCH_CONFIG['results_file'],
+                                                window_size, pipe_distance, run_num)
+                replay_file = replay_path(RESEARCH_CONFIG['replay_dir'], RESEARCH_CONFIG['results_file'],
+                                          window_size, pipe_distance, run_num)
+                results = run_experiment(window_size, pipe_distance, config_path, checkpoint_path, telemetry_file,
+                                         replay_file)
+            
+                result = {
+                    'window_size': window_size,
+                    'pipe_distance': pipe_distance,
+                    'run_number': run_num,
+                    'results': results
+                }
+                if checkpoint is not None:
+                    checkpoint.record(result)
+                writer.write(result)
+                all_results.append(result)
+            
+                print(f"    → Score: {results['max_score_achieved']}, "
+                      f"Gen: {results['total_generations']}, "
+                      f"Done: {results['completed']}")
+    finally:
+        writer.close()
+
+    # Keep the checkpoints while any experiment failed, so a rerun retries just those
+    successful = len(all_results)
+    if checkpoint is not None and successful == total_experiments:
+        checkpoint.finish()
+    if scratch_dir is not None:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
     
     end_time = time.time()
     total_time = end_time - start_time
     
     print("\n" + "=" * 60)
     print("RESEARCH STUDY COMPLETED!")
-    print(f"Successful experiments: {len(all_results)}/{total_experiments}")
+    print(f"Successful experiments: {successful}/{total_experiments}")
+    if halving:
+        grid_generations = total_experiments * RESEARCH_CONFIG['max_generations']
+        print(f"Generations used: {generations_used}/{grid_generations} of a full grid "
+              f"({100 * generations_used / grid_generations:.0f}%)")
     print(f"Total time: {total_time:.2f} seconds ({total_time/60:.2f} minutes)")
     print(f"Results saved to: {RESEARCH_CONFIG['results_file']}")
+    if RESEARCH_CONFIG['results_db']:
+        print(f"Results database: {RESEARCH_CONFIG['results_db']} (study {study_name(RESEARCH_CONFIG['results_file'])})")
     print("=" * 60)
     
     return all_results
@@ -0,0 +1,263 @@
+# An SQLite database of research results across studies, for comparing
+# configurations without re-parsing every results CSV.
+#
+#   python results_db.py import research_results_*.csv                   # add existing results files
+#   python results_db.py median 100                                      # median generations_to_100 by pipe distance
+#   python results_db.py median 50 --by window_size --study research_results_20251120_173300
+#
+# Sweeps also write their results here as they finish when RESULTS_DB is set
+# in research_config.py, and optionally their per-generation telemetry.
+# A study is a results file, named after it and told apart by its full path,
+# so importing that file later adds nothing twice. A sweep that starts afresh
+# (not resumed from a checkpoint) overwrites its results file and replaces
+# that study's runs the same way.
+import os
+import csv
+import sqlite3
+import argparse
+from collections import Counter
+import numpy as np
+
+DEFAULT_DB = 'research_results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS studies (
+    study_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    study_id INTEGER NOT NULL REFERENCES studies(study_id),
+    window_size INTEGER NOT NULL,
+    pipe_distance INTEGER NOT NULL,
+    run_number INTEGER NOT NULL,
+    max_score_achieved INTEGER,
+    total_generations INTEGER,
+    completed INTEGER,
+    stopped_early INTEGER,
+    UNIQUE (study_id, window_size, pipe_distance, run_number)
+);
+CREATE INDEX IF NOT EXISTS runs_window_size ON runs (window_size);
+CREATE INDEX IF NOT EXISTS runs_pipe_distance ON runs (pipe_distance);
+-- generations is NULL when the run never reached the target. A run stopped
+-- early by successive halving has no rows for the targets it had not reached
+-- yet, so it does not count as failing them. The run's study
+-- and cell are repeated here so the indexes below answer median queries
+-- without touching runs.
+CREATE TABLE IF NOT EXISTS milestones (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    target_score INTEGER NOT NULL,
+    generations INTEGER,
+    study_id INTEGER NOT NULL,
+    window_size INTEGER NOT NULL,
+    pipe_distance INTEGER NOT NULL,
+    PRIMARY KEY (run_id, target_score)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS milestones_study ON milestones (target_score, study_id, generations, window_size,
+                                                           pipe_distance);
+CREATE INDEX IF NOT EXISTS milestones_window_size ON milestones (target_score, window_size, generations);
+CREATE INDEX IF NOT EXISTS milestones_pipe_distance ON milestones (target_score, pipe_distance, generations);
+CREATE TABLE IF NOT EXISTS generations (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    generation INTEGER NOT NULL,
+    best_score INTEGER,
+    population INTEGER,
+    species INTEGER,
+    frames INTEGER,
+    bird_frames INTEGER,
+    memo_hits INTEGER,
+    best_fitness REAL,
+    mean_fitness REAL,
+    eval_time REAL,
+    generation_time REAL,
+    PRIMARY KEY (run_id, generation)
+) WITHOUT ROWID;
+"""
+
+# Columns of milestones that median_generations can group by
+GROUPS = {
+    'window_size': 'window_size',
+    'pipe_distance': 'pipe_distance',
+    'study': 'study_id',
+}
+
+# Runs and runs that reached the target per group, then each group's middle
+# one or two rows, read off the (target_score, group, generations) index, or
+# off milestones_study for the few rows of one study
+COUNT_QUERY = ("SELECT {group}, COUNT(generations), COUNT(*) FROM {table} WHERE target_score = ? {where} "
+               "GROUP BY {group}")
+MIDDLE_QUERY = ("SELECT generations FROM {table} WHERE target_score = ? {where} AND {group} = ? "
+                "AND generations IS NOT NULL ORDER BY generations LIMIT ? OFFSET ?")
+
+
+def study_name(results_file):
+    """The study a results file belongs to: its file name without the extension"""
+    return os.path.splitext(os.path.basename(results_file))[0]
+
+
+def _int_or_none(value):
+    return None if value in (None, '', 'N/A', 'None') else int(value)
+
+
+class ResultsDatabase:
+    """
+    Runs of every study in one SQLite file: a row per run, its generations to
+    each target score as rows of milestones, and optionally per-generation
+    telemetry. Runs are unique per study, so writing a run again is a no-op.
+    """
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        self.connection.executescript(SCHEMA)
+
+    def study(self, results_file, fresh=False):
+        """
+        The id of the study of results_file, added if it is new; a fresh study
+        loses the runs it had, as the file it mirrors is being rewritten
+        """
+        path = os.path.realpath(results_file)
+        with self.connection:
+            self.connection.execute('INSERT OR IGNORE INTO studies (name, path) VALUES (?, ?)',
+                                    (study_name(path), path))
+            study_id = self.connection.execute('SELECT study_id FROM studies WHERE path = ?', (path,)).fetchone()[0]
+            if fresh:
+                runs = 'SELECT run_id FROM runs WHERE study_id = ?'
+                self.connection.execute(f'DELETE FROM generations WHERE run_id IN ({runs})', (study_id,))
+                self.connection.execute('DELETE FROM milestones WHERE study_id = ?', (study_id,))
+                self.connection.execute('DELETE FROM runs WHERE study_id = ?', (study_id,))
+        return study_id
+
+    def _add_run(self, study_id, window_size, pipe_distance, run_number, max_score, total_generations, completed,
+                 stopped_early, generations_to_reach):
+        cursor = self.connection.execute(
+            'INSERT OR IGNORE INTO runs (study_id, window_size, pipe_distance, run_number, max_score_achieved, '
+            'total_generations, completed, stopped_early) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (study_id, window_size, pipe_distance, run_number, max_score, total_generations, int(completed),
+             int(stopped_early)))
+        if not cursor.rowcount:
+            return None
+        run_id = cursor.lastrowid
+        self.connection.executemany(
+            'INSERT INTO milestones (run_id, target_score, generations, study_id, window_size, pipe_distance) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(run_id, int(score), gens, study_id, window_size, pipe_distance)
+             for score, gens in generations_to_reach.items() if gens is not None or not stopped_early])
+        return run_id
+
+    def add_run(self, study_id, result):
+        """
+        Store a finished experiment, in the form run_single_experiment_mp
+        returns; returns its run_id, or None if the study already had it
+        """
+        results = result['results']
+        with self.connection:
+            return self._add_run(study_id, result['window_size'], result['pipe_distance'], result['run_number'],
+                                 results['max_score_achieved'], results['total_generations'], results['completed'],
+                                 results.get('stopped_early', False), results['generations_to_reach'])
+
+    def add_telemetry(self, run_id, columns):
+        """Store a run's per-generation telemetry, the columns of telemetry.load_telemetry"""
+        population = columns['population']
+        memo_hits = columns.get('memo_hits', np.zeros(len(population), dtype=np.int64))
+        rows = []
+        for g, size in enumerate(population.tolist()):
+            fitness = columns['fitness'][g, :size]  # the rest of the row is padding
+            rows.append((run_id, g + 1, int(columns['best_score'][g]), size, int(columns['species'][g]),
+                         int(columns['frames'][g]), int(columns['bird_frames'][g]), int(memo_hits[g]),
+                         float(fitness.max()) if size else None, float(fitness.mean()) if size else None,
+                         float(columns['eval_time'][g]), float(columns['generation_time'][g])))
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO generations (run_id, generation, best_score, population, species, frames, '
+                'bird_frames, memo_hits, best_fitness, mean_fitness, eval_time, generation_time) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def import_csv(self, path):
+        """Add the runs of a research results CSV to its study; returns the runs added"""
+        study_id = self.study(path)
+        added = 0
+        with open(path, newline='') as csvfile, self.connection:
+            reader = csv.DictReader(csvfile)
+            targets = [(name, int(name[len('generations_to_'):])) for name in reader.fieldnames
+                       if name.startswith('generations_to_')]
+            for row in reader:
+                run_id = self._add_run(study_id, int(row['window_size']), int(row['pipe_distance']),
+                                       int(row['run_number']), _int_or_none(row['max_score_achieved']),
+                                       _int_or_none(row['total_generations']), row['completed'] == 'True',
+                                       row.get('stopped_early') == 'True',
+                                       dict((score, _int_or_none(row[name])) for name, score in targets))
+                added += run_id is not None
+        return added
+
+    def median_generations(self, target_score, by='pipe_distance', study=None):
+        """
+        Median generations to reach target_score per value of `by`
+        ('window_size', 'pipe_distance' or 'study'), over the runs that reached
+        it, optionally of one study only, given by name or results file path.
+        Returns (value, median or None, runs that reached the target, runs)
+        rows, where runs leaves out runs stopped early before reaching it;
+        studies are shown by name, or by path where names repeat.
+        """
+        if by not in GROUPS:
+            raise ValueError("Unknown grouping %r, expected one of %s" % (by, ', '.join(GROUPS)))
+        studies = self.connection.execute('SELECT study_id, name, path FROM studies').fetchall()
+        counts = Counter(name for study_id, name, path in studies)
+        names = dict((study_id, path if counts[name] > 1 else name) for study_id, name, path in studies)
+        parts = {'table': 'milestones', 'where': '', 'group': GROUPS[by]}
+        args = [target_score]
+        if study is not None:
+            ids = [study_id for study_id, name, path in studies
+                   if study == name or os.path.realpath(study) == path]
+            parts.update(table='milestones INDEXED BY milestones_study',
+                         where='AND study_id IN (%s)' % ', '.join(['?'] * len(ids) or ['NULL']))
+            args.extend(ids)
+        rows = []
+        for value, reached, runs in self.connection.execute(COUNT_QUERY.format(**parts), args):
+            median = None
+            if reached:
+                middle = [gens for gens, in self.connection.execute(
+                    MIDDLE_QUERY.format(**parts), args + [value, 2 - reached % 2, (reached - 1) // 2])]
+                median = sum(middle) / len(middle)
+            rows.append((names[value] if by == 'study' else value, median, reached, runs))
+        return sorted(rows)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite store of research results across studies')
+    parser.add_argument('--db', default=DEFAULT_DB, help='database file (default %(default)s)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    importer = commands.add_parser('import', help='add research results CSVs, one study per file')
+    importer.add_argument('files', nargs='+')
+    median = commands.add_parser('median', help='median generations to a target score')
+    median.add_argument('target_score', type=int)
+    median.add_argument('--by', choices=sorted(GROUPS), default='pipe_distance')
+    median.add_argument('--study', help='only this study (a results file name without .csv, or its path)')
+    args = parser.parse_args()
+
+    with ResultsDatabase(args.db) as db:
+        if args.command == 'import':
+            for path in args.files:
+                print(f"{path}: {db.import_csv(path)} runs added")
+        else:
+            rows = db.median_generations(args.target_score, args.by, args.study)
+            header = f"median generations_to_{args.target_score}"
+            width = max([len(args.by)] + [len(str(value)) for value, median_value, reached, runs in rows])
+            print(f"{args.by:>{width}}  {header}  reached")
+            for value, median_value, reached, runs in rows:
+                shown = 'N/A' if median_value is None else f"{median_value:g}"
+                print(f"{value!s:>{width}}  {shown:>{len(header)}}  {reached}/{runs}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,626 @@
+import random
+import functools
+import numpy as np
+from collision import CollisionGeometry
+from course import get_course
+from profiler import NULL_TIMER
+from game_core import (BIRD_X, BIRD_START_Y, BASE_Y, CONCURRENT_PIPES, FIRST_PIPE_X,
+                       GRAVITY, JUMP_VEL, MAX_FALL_VEL, PIPE_VEL, BIRD_SIZE, PIPE_SIZE)
+
+
+class PopulationSimulator:
+    """
+    Struct-of-arrays simulation of a whole population flying the same pipe course.
+
+    Bird positions, velocities, fitness and alive flags live in NumPy arrays and
+    the whole population is advanced with one batched step per frame. A frame
+    follows the same order as eval_genomes: birds move and decide, pipes move,
+    pipe collisions are penalized, passed pipes are rewarded, then birds that
+    left the screen vertically are removed.
+
+    Pipes come from `course` (see course.get_course); without one, a course is
+    seeded from `rng`. A profiler.PhaseTimer passed as `timer` gets the time
+    of each phase of a step.
+
+    Birds decide every `decision_interval` frames; in between they repeat their
+    last decision when `decision_hold` is set and do not flap otherwise. With
+    `record_flaps`, every decision is kept as one row of packed bits, for
+    replays (see record).
+    """
+
+    def __init__(self, size, window=200, pipe_distance=400,
+                 reward_alive=0.1, reward_pipe=5, penalty_collision=1,
+                 geometry=None, course=None, rng=random, timer=NULL_TIMER,
+                 decision_interval=1, decision_hold=False, record_flaps=False):
+        self.size = size
+        self.window = window
+        self.pipe_distance = pipe_distance
+        self.reward_alive = reward_alive
+        self.reward_pipe = reward_pipe
+        self.penalty_collision = penalty_collision
+        self.geometry = geometry or CollisionGeometry.from_rects(BIRD_SIZE, PIPE_SIZE)
+        self.bird_height = self.geometry.bird_height
+        self.pipe_width = self.geometry.pipe_width
+        self.pipe_height = self.geometry.pipe_height
+        self.course = course or get_course(rng.getrandbits(32), pipe_distance, CONCURRENT_PIPES)
+        self.timer = timer
+        self.decision_interval = decision_interval
+        self.decision_hold = decision_hold
+
+        self.y = np.full(size, float(BIRD_START_Y))
+        self.y_vel = np.zeros(size)
+        self.alive = np.ones(size, dtype=bool)
+        self.fitness = np.zeros(size)
+        self.death_frame = np.full(size, -1, dtype=np.int64)
+        self.jump = np.zeros(size, dtype=bool)  # last decision of every bird
+        self.decisions = [] if record_flaps else None
+        self.alive_idx = np.arange(size)
+
+        self.frame = 0
+        self.score = 0
+
+        self.first_pipe = 0   # leftmost pipe still on screen
+        self.next_pipe = 0    # first pipe whose right edge is ahead of the birds
+        self.next_pass = 0    # first pipe not yet passed
+
+    def pipe_x(self, k, frame=None):
+        """x position of pipe k after `frame` moves (defaults to the current frame)"""
+        if frame is None:
+            frame = self.frame
+        return self.course.pipe_x(k, frame)
+
+    def observe(self):
+        """Network inputs for every living bird, one row per bird"""
+        y = self.y[self.alive_idx]
+        k = self.next_pipe
+        pipe_x = self.pipe_x(k)
+        height = self.course.height(k)
+        inputs = np.empty((len(y), 5))
+        inputs[:, 0] = y
+        inputs[:, 1] = np.abs(y - height)
+        inputs[:, 2] = np.abs(y - (height + self.window))
+        inputs[:, 3] = pipe_x - BIRD_X
+        inputs[:, 4] = pipe_x + self.pipe_width - BIRD_X
+        return inputs
+
+    def pipe_hits(self, k, y):
+        """Which birds at heights `y` hit pipe k; headless birds always show image 0"""
+        height = self.course.height(k)
+        return self.geometry.hits(0, y, self.pipe_x(k), height - self.pipe_height,
+                                  height + self.window, BIRD_X)
+
+    def _kill(self, rows):
+        self.alive[rows] = False
+        self.death_frame[rows] = self.frame
+
+    def step(self, policy):
+        """
+        Advance every living bird by one frame.
+        policy(inputs, rows) returns a boolean jump decision per row of inputs.
+        """
+        timer = self.timer
+
+        # Pick the input pipe before the pipes move, like eval_genomes does
+        self.next_pipe = self.course.active_pipe(self.frame, BIRD_X, self.pipe_width)
+        timer.lap('pipes')
+
+        idx = self.alive_idx
+        self.fitness[idx] += self.reward_alive
+
+        y_vel = self.y_vel[idx] + GRAVITY
+        y_vel = np.maximum(np.minimum(y_vel, MAX_FALL_VEL), JUMP_VEL)
+        y = self.y[idx] + y_vel
+        self.y[idx] = y
+        timer.lap('physics')
+
+        if self.frame % self.decision_interval == 0:
+            jump = np.asarray(policy(self.observe(), idx), dtype=bool)
+            self.jump[idx] = jump
+            if self.decisions is not None:
+                self.decisions.append(np.packbits(self.jump))
+            timer.lap('network')
+        elif self.decision_hold:
+            jump = self.jump[idx]
+        else:
+            jump = False
+        self.y_vel[idx] = np.where(jump, JUMP_VEL, y_vel)
+
+        self.frame += 1
+        timer.lap('physics')
+
+        # Pipe collisions; only pipes over the bird column can be hit
+        hit = np.zeros(len(idx), dtype=bool)
+        for k in range(self.first_pipe, self.first_pipe + CONCURRENT_PIPES):
+            if self.geometry.in_column(self.pipe_x(k), BIRD_X):
+                hit |= self.pipe_hits(k, y)
+        if hit.any():
+            self.fitness[idx[hit]] -= self.penalty_collision
+            self._kill(idx[hit])
+        timer.lap('collision')
+
+        if self.pipe_x(self.next_pass) + self.pipe_width < BIRD_X:
+            self.next_pass += 1
+            self.score += 1
+            self.fitness[idx[~hit]] += self.reward_pipe
+
+        while self.pipe_x(self.first_pipe) + self.pipe_width < 0:
+            self.first_pipe += 1
+        timer.lap('pipes')
+
+        out = (y + self.bird_height >= BASE_Y) | (y < 0)
+        out &= ~hit
+        if out.any():
+            self._kill(idx[out])
+
+        if hit.any() or out.any():
+            self.alive_idx = np.flatnonzero(self.alive)
+        timer.lap('collision')
+
+    def run(self, policy, frame_limit=None):
+        """Step until every bird is dead or frame_limit frames have run; returns the score"""
+        while len(self.alive_idx) > 0:
+            if frame_limit is not None and self.frame >= frame_limit:
+                break
+            self.step(policy)
+        return self.score
+
+    def record(self):
+        """The FlapRecord of the run so far; needs record_flaps"""
+        decisions = np.array(self.decisions, dtype=np.uint8).reshape(len(self.decisions), -(-self.size // 8))
+        return FlapRecord(decisions, self.death_frame.copy(), self.frame, self.decision_interval, self.decision_hold,
+                          self.course.seed, self.pipe_distance, self.window)
+
+
+class FlapRecord:
+    """
+    Every decision of a population in one evaluation: row d of `decisions`
+    holds the decisions of frame d * decision_interval as packed bits, one bit
+    per bird. Birds that did not die (death_frame -1) flew until end_frame.
+    """
+
+    def __init__(self, decisions, death_frame, end_frame, decision_interval, decision_hold, seed, pipe_distance,
+                 window):
+        self.decisions = decisions
+        self.death_frame = death_frame
+        self.end_frame = end_frame
+        self.decision_interval = decision_interval
+        self.decision_hold = decision_hold
+        self.seed = seed
+        self.pipe_distance = pipe_distance
+        self.window = window
+
+    @classmethod
+    def from_decided(cls, decided, death_frame, end_frame, decision_interval, decision_hold, seed, pipe_distance,
+                     window):
+        """A FlapRecord from the decided() arrays of every bird"""
+        rows = -(-end_frame // decision_interval)
+        decisions = np.zeros((rows, len(decided)), dtype=bool)
+        for bird, column in enumerate(decided):
+            decisions[:len(column), bird] = column
+        return cls(np.packbits(decisions, axis=1), death_frame, end_frame, decision_interval, decision_hold, seed,
+                   pipe_distance, window)
+
+    def frames(self, bird):
+        """Frames the bird flew"""
+        return int(self.death_frame[bird]) if self.death_frame[bird] >= 0 else self.end_frame
+
+    def decided(self, bird):
+        """The bird's decision at every decision frame it flew"""
+        rows = -(-self.frames(bird) // self.decision_interval)
+        return ((self.decisions[:rows, bird // 8] >> (7 - bird % 8)) & 1).astype(bool)
+
+    def flaps(self, bird):
+        """Whether the bird flapped, for each frame it flew"""
+        frames = self.frames(bird)
+        flaps = np.repeat(self.decided(bird), self.decision_interval)[:frames]
+        if not self.decision_hold:
+            flaps[np.arange(frames) % self.decision_interval != 0] = False
+        return flaps
+
+
+# Heights and velocities stay whole numbers of quarter pixels (GRAVITY is 1.25
+# pixels per frame squared), so the event engine computes them exactly as integers
+QUARTER = 4
+
+
+def _quarters(value):
+    quarters = value * QUARTER
+    if quarters != int(quarters):
+        raise ValueError("%r is not a whole number of quarter pixels" % value)
+    return int(quarters)
+
+
+@functools.lru_cache(maxsize=8)
+def flight_tables(frames):
+    """
+    Flight over 0..frames frames without a decision, in quarter pixels.
+
+    Row v - JUMP_VEL is a bird falling freely from velocity v (for every v from
+    JUMP_VEL to MAX_FALL_VEL), the last row a bird that holds a flap and so
+    flaps again every frame. Returns, indexed [row, n]: the displacement after
+    n frames, its running minimum and maximum, and the velocity after n frames.
+    """
+    gravity, jump_vel, max_fall_vel = _quarters(GRAVITY), _quarters(JUMP_VEL), _quarters(MAX_FALL_VEL)
+    n = np.arange(frames + 1)
+    # The per-frame clamp of step; starting inside the limits only the upper one can apply
+    falling = np.minimum(np.arange(jump_vel, max_fall_vel + 1)[:, None] + gravity * n, max_fall_vel)
+    held = min(max(jump_vel + gravity, jump_vel), max_fall_vel)
+    moves = np.vstack([falling, np.full(frames + 1, held)])
+    moves[:, 0] = 0
+    displacement = np.cumsum(moves, axis=1)
+    velocity = np.vstack([falling, np.full(frames + 1, jump_vel)])
+    tables = (displacement, np.minimum.accumulate(displacement, axis=1),
+              np.maximum.accumulate(displacement, axis=1), velocity)
+    for table in tables:
+        table.setflags(write=False)
+    return tables
+
+
+def _first_frame(table, start, rows, frames, test):
+    """
+    Per bird, the first n in 1..frames at which test(start + table[rows, n])
+    holds, or frames + 1 if it never does. Along a table row the test must
+    stay true once it is true, so it is found by bisection.
+    """
+    first = np.full(len(rows), frames + 1)
+    found = np.flatnonzero(test(start + table[rows, frames]))
+    if len(found):
+        start, rows = start[found], rows[found]
+        lo = np.ones(len(found), dtype=np.int64)
+        hi = np.full(len(found), frames)
+        while (lo < hi).any():
+            mid = (lo + hi) // 2
+            true = test(start + table[rows, mid])
+            hi = np.where(true, mid, hi)
+            lo = np.where(true, lo, mid + 1)
+        first[found] = lo
+    return first
+
+
+class EventSimulator(PopulationSimulator):
+    """
+    PopulationSimulator that jumps over the frames between two decisions
+    instead of stepping through them.
+
+    Without a decision a bird either falls freely (its velocity grows by
+    GRAVITY up to MAX_FALL_VEL) or, holding a flap, rises at a constant speed,
+    so its flight from any starting velocity can be tabulated once (see
+    flight_tables). Only the events are looked at: the first ground or ceiling
+    hit, found by bisection on the running extremes of the flight, the frames
+    with a pipe over the bird column, and pipe passes.
+
+    Alive birds always share one fitness value, since they all get the same
+    rewards in the same order; the rewards are accumulated once in frame order
+    and every bird that dies takes the value of its death frame. Death frames,
+    scores and fitness come out bit for bit the same as PopulationSimulator's.
+    Decision frames are ordinary steps, so the engine only pays off when
+    decision_interval is above 1.
+    """
+
+    # Gaps between decisions shorter than this are cheaper to step through
+    MIN_ADVANCE = 3
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.q_jump_vel = _quarters(JUMP_VEL)
+        self.q_ground = QUARTER * (BASE_Y - self.bird_height)
+        self.held_row = _quarters(MAX_FALL_VEL) - self.q_jump_vel + 1
+        self.tables = flight_tables(self.decision_interval)
+
+    def column_pipes(self, start, frames):
+        """
+        (n, pipe) pairs, in frame order, for the pipes the collision loop of
+        step would test in each of the next `frames` frames
+        """
+        pairs = []
+        k = self.first_pipe
+        while True:
+            first, last = self.course.column_frames(k, BIRD_X, self.geometry.bird_width, self.pipe_width)
+            if first > start + frames:
+                break
+            pairs.extend((frame, k) for frame in range(max(first, start + 1), min(last, start + frames) + 1))
+            k += 1
+        pairs.sort()
+
+        # step only looks at CONCURRENT_PIPES pipes from the first one still on screen
+        tested = []
+        first_pipe = self.first_pipe
+        for frame, k in pairs:
+            while self.pipe_x(first_pipe, frame - 1) + self.pipe_width < 0:
+                first_pipe += 1
+            if k < first_pipe + CONCURRENT_PIPES:
+                tested.append((frame - start, k))
+        return tested
+
+    def advance(self, frames):
+        """
+        Advance every living bird by `frames` frames in which no decision is
+        due; the same as calling step that many times
+        """
+        timer = self.timer
+        idx = self.alive_idx
+        start = self.frame
+        if frames >= self.tables[0].shape[1]:
+            self.tables = flight_tables(frames)
+        displacement, lowest, highest, velocity = self.tables
+
+        y0 = np.rint(self.y[idx] * QUARTER).astype(np.int64)
+        rows = np.rint(self.y_vel[idx] * QUARTER).astype(np.int64) - self.q_jump_vel
+        if self.decision_hold:
+            rows[self.jump[idx]] = self.held_row
+
+        out = np.minimum(_first_frame(lowest, y0, rows, frames, lambda y: y < 0),
+                         _first_frame(highest, y0, rows, frames, lambda y: y >= self.q_ground))
+        timer.lap('physics')
+
+        crash = np.full(len(idx), frames + 1)
+        tested = self.column_pipes(start, frames)
+        if tested:
+            steps = np.array([n for n, k in tested])
+            heights = np.array([self.course.height(k) for n, k in tested])
+            y = (y0[:, None] + displacement[rows[:, None], steps]) / QUARTER
+            hit = self.geometry.hits_columns(0, y, [self.pipe_x(k, start + n) for n, k in tested],
+                                             heights - self.pipe_height, heights + self.window, BIRD_X)
+            crashed = hit.any(axis=1)
+            crash[crashed] = steps[hit.argmax(axis=1)[crashed]]
+        timer.lap('collision')
+
+        # A bird that hits a pipe and leaves the screen in the same frame counts as hitting the pipe
+        death = np.minimum(crash, out)
+        dead = death <= frames
+        crashed = dead & (crash <= out)
+        end = int(death.max()) if dead.all() else frames
+
+        # One pipe at most is passed per frame
+        passes = []
+        passed = start
+        while True:
+            passed = max(self.course.pass_frame(self.next_pass, BIRD_X, self.pipe_width), passed + 1)
+            if passed > start + end:
+                break
+            passes.append(passed - start)
+            self.next_pass += 1
+            self.score += 1
+
+        # Fitness of the alive birds after each reward: history[2n - 1] after the
+        # alive reward of step n, history[2n] after its pipe reward
+        rewards = np.zeros(2 * end + 1)
+        rewards[0] = self.fitness[idx[0]]
+        rewards[1::2] = self.reward_alive
+        rewards[2 * np.array(passes, dtype=np.int64)] = self.reward_pipe
+        history = np.add.accumulate(rewards)
+
+        n = np.minimum(death, end)
+        self.fitness[idx] = np.where(crashed, history[2 * n - 1] - self.penalty_collision, history[2 * n])
+        self.y[idx] = (y0 + displacement[rows, n]) / QUARTER
+        self.y_vel[idx] = velocity[rows, n] / QUARTER
+
+        self.frame = start + end
+        self.next_pipe = self.course.active_pipe(self.frame - 1, BIRD_X, self.pipe_width)
+        while self.pipe_x(self.first_pipe) + self.pipe_width < 0:
+            self.first_pipe += 1
+        if dead.any():
+            rows = idx[dead]
+            self.alive[rows] = False
+            self.death_frame[rows] = start + death[dead]
+            self.alive_idx = np.flatnonzero(self.alive)
+        timer.lap('pipes')
+
+    def run(self, policy, frame_limit=None):
+        """Run until every bird is dead or frame_limit frames have run; returns the score"""
+        while len(self.alive_idx) > 0:
+            if frame_limit is not None and self.frame >= frame_limit:
+                break
+            next_decision = -(-self.frame // self.decision_interval) * self.decision_interval
+            if frame_limit is not None:
+                next_decision = min(next_decision, frame_limit)
+            if next_decision - self.frame < self.MIN_ADVANCE:
+                self.step(policy)
+            else:
+                self.advance(next_decision - self.frame)
+        return self.score
+
+
+class LaneSimulator:
+    """
+    The populations of several sweep cells ("lanes") stepped together in one
+    set of arrays.
+
+    Lane l holds sizes[l] birds flying courses[l] with windows[l]; its pipe
+    distance is the course's. Birds of all lanes are stored back to back, so
+    physics, network inputs, collisions and rewards are one batched operation
+    per frame for the whole sweep instead of one per cell, and a single policy
+    call decides for every living bird. Each lane gets exactly the fitness,
+    death frames and score a PopulationSimulator would give it on its own;
+    lanes only differ in how long they keep running.
+
+    Fitness rewards and the decision interval are shared by all lanes. The
+    frames are always stepped one by one (there is no event engine here).
+    """
+
+    def __init__(self, sizes, windows, courses, reward_alive=0.1, reward_pipe=5, penalty_collision=1,
+                 geometry=None, timer=NULL_TIMER, decision_interval=1, decision_hold=False, record_flaps=False):
+        self.sizes = list(sizes)
+        self.lanes = len(self.sizes)
+        self.bounds = np.concatenate([[0], np.cumsum(self.sizes)]).astype(np.int64)
+        self.size = int(self.bounds[-1])
+        self.lane = np.repeat(np.arange(self.lanes), self.sizes)  # lane of every bird
+        self.windows = np.asarray(windows, dtype=np.int64)
+        self.courses = list(courses)
+        self.pipe_distances = np.array([course.pipe_distance for course in self.courses], dtype=np.int64)
+        self.reward_alive = reward_alive
+        self.reward_pipe = reward_pipe
+        self.penalty_collision = penalty_collision
+        self.geometry = geometry or CollisionGeometry.from_rects(BIRD_SIZE, PIPE_SIZE)
+        self.bird_height = self.geometry.bird_height
+        self.pipe_width = self.geometry.pipe_width
+        self.pipe_height = self.geometry.pipe_height
+        self.timer = timer
+        self.decision_interval = decision_interval
+        self.decision_hold = decision_hold
+        self.heights = np.zeros((self.lanes, 0), dtype=np.int64)
+
+        self.y = np.full(self.size, float(BIRD_START_Y))
+        self.y_vel = np.zeros(self.size)
+        self.alive = np.ones(self.size, dtype=bool)
+        self.fitness = np.zeros(self.size)
+        self.death_frame = np.full(self.size, -1, dtype=np.int64)
+        self.jump = np.zeros(self.size, dtype=bool)
+        self.decisions = [] if record_flaps else None  # self.jump after every decision, all lanes
+        self.alive_idx = np.arange(self.size)
+        self.alive_lanes = np.array(self.sizes) > 0
+
+        self.frame = 0
+        self.scores = np.zeros(self.lanes, dtype=np.int64)
+        self.end_frame = np.zeros(self.lanes, dtype=np.int64)  # frame each lane stopped at
+        self.first_pipe = np.zeros(self.lanes, dtype=np.int64)
+        self.next_pipe = np.zeros(self.lanes, dtype=np.int64)
+        self.next_pass = np.zeros(self.lanes, dtype=np.int64)
+
+    def pipe_x(self, k, frame=None):
+        """x position of pipe k[l] of every lane l, computed like Course.pipe_x"""
+        if frame is None:
+            frame = self.frame
+        return FIRST_PIPE_X + k * self.pipe_distances - PIPE_VEL * frame
+
+    def height(self, k, lanes):
+        """Height of pipe k[i] of lane lanes[i]; the table grows with the courses"""
+        if k.max() >= self.heights.shape[1]:
+            length = max(int(k.max()) + 1, 2 * self.heights.shape[1])
+            for course in self.courses:
+                course.height(length - 1)
+            self.heights = np.array([course.heights[:length] for course in self.courses], dtype=np.int64)
+        return self.heights[lanes, k]
+
+    def active_pipes(self):
+        """Course.active_pipe for every lane at the current frame"""
+        behind = 2 * (BIRD_X - self.pipe_width - FIRST_PIPE_X) + int(2 * PIPE_VEL) * self.frame
+        return np.where(behind < 0, 0, behind // (2 * self.pipe_distances) + 1)
+
+    def observe(self, idx, lanes):
+        """Network inputs for the birds at idx, whose lanes are `lanes`"""
+        y = self.y[idx]
+        k = self.next_pipe[lanes]
+        pipe_x = self.pipe_x(self.next_pipe)[lanes]
+        height = self.height(k, lanes)
+        inputs = np.empty((len(y), 5))
+        inputs[:, 0] = y
+        inputs[:, 1] = np.abs(y - height)
+        inputs[:, 2] = np.abs(y - (height + self.windows[lanes]))
+        inputs[:, 3] = pipe_x - BIRD_X
+        inputs[:, 4] = pipe_x + self.pipe_width - BIRD_X
+        return inputs
+
+    def _kill(self, rows):
+        self.alive[rows] = False
+        self.death_frame[rows] = self.frame
+
+    def step(self, policy):
+        """
+        Advance every living bird of every lane by one frame, in the order of
+        PopulationSimulator.step. policy(inputs, rows) returns a boolean jump
+        decision per row of inputs; rows index the birds of all lanes.
+        """
+        timer = self.timer
+        running = self.alive_lanes
+        self.next_pipe = self.active_pipes()
+        timer.lap('pipes')
+
+        idx = self.alive_idx
+        lanes = self.lane[idx]
+        self.fitness[idx] += self.reward_alive
+
+        y_vel = self.y_vel[idx] + GRAVITY
+        y_vel = np.maximum(np.minimum(y_vel, MAX_FALL_VEL), JUMP_VEL)
+        y = self.y[idx] + y_vel
+        self.y[idx] = y
+        timer.lap('physics')
+
+        if self.frame % self.decision_interval == 0:
+            jump = np.asarray(policy(self.observe(idx, lanes), idx), dtype=bool)
+            self.jump[idx] = jump
+            if self.decisions is not None:
+                self.decisions.append(self.jump.copy())
+            timer.lap('network')
+        elif self.decision_hold:
+            jump = self.jump[idx]
+        else:
+            jump = False
+        self.y_vel[idx] = np.where(jump, JUMP_VEL, y_vel)
+
+        self.frame += 1
+        timer.lap('physics')
+
+        # Pipe collisions; per lane only the pipes over the bird column can be hit
+        hit = np.zeros(len(idx), dtype=bool)
+        for j in range(CONCURRENT_PIPES):
+            k = self.first_pipe + j
+            pipe_x = self.pipe_x(k)
+            dx = (pipe_x - BIRD_X).astype(np.int64)  # truncated like CollisionGeometry.pipe_offset
+            in_column = running & (-self.pipe_width < dx) & (dx < self.geometry.bird_width)
+            if not in_column.any():
+                continue
+            tested = np.flatnonzero(in_column[lanes])
+            tested_lanes = lanes[tested]
+            height = self.height(k[tested_lanes], tested_lanes)
+            hit[tested] |= self.geometry.hits_columns(0, y[tested], pipe_x[tested_lanes], height - self.pipe_height,
+                                                      height + self.windows[tested_lanes], BIRD_X)
+        if hit.any():
+            self.fitness[idx[hit]] -= self.penalty_collision
+            self._kill(idx[hit])
+        timer.lap('collision')
+
+        passing = running & (self.pipe_x(self.next_pass) + self.pipe_width < BIRD_X)
+        if passing.any():
+            self.next_pass += passing
+            self.scores += passing
+            self.fitness[idx[passing[lanes] & ~hit]] += self.reward_pipe
+
+        while True:
+            gone = self.pipe_x(self.first_pipe) + self.pipe_width < 0
+            if not gone.any():
+                break
+            self.first_pipe += gone
+        timer.lap('pipes')
+
+        out = (y + self.bird_height >= BASE_Y) | (y < 0)
+        out &= ~hit
+        if out.any():
+            self._kill(idx[out])
+
+        if hit.any() or out.any():
+            self.alive_idx = np.flatnonzero(self.alive)
+            self.alive_lanes = np.bincount(self.lane[self.alive_idx], minlength=self.lanes) > 0
+        self.end_frame[running] = self.frame
+        timer.lap('collision')
+
+    def run(self, policy, frame_limit=None):
+        """Step until every bird is dead or frame_limit frames have run; returns the score of every lane"""
+        while len(self.alive_idx) > 0:
+            if frame_limit is not None and self.frame >= frame_limit:
+                break
+            self.step(policy)
+        return self.scores
+
+    def lane_slice(self, lane):
+        return slice(int(self.bounds[lane]), int(self.bounds[lane + 1]))
+
+    def record(self, lane):
+        """The FlapRecord of one lane's run so far; needs record_flaps"""
+        rows = -(-int(self.end_frame[lane]) // self.decision_interval)
+        birds = self.lane_slice(lane)
+        decisions = np.array([jump[birds] for jump in self.decisions[:rows]], dtype=bool).reshape(rows, -1)
+        course = self.courses[lane]
+        return FlapRecord(np.packbits(decisions, axis=1), self.death_frame[birds].copy(), int(self.end_frame[lane]),
+                          self.decision_interval, self.decision_hold, course.seed, course.pipe_distance,
+                          int(self.windows[lane]))
+
+
+ENGINES = {'frame': PopulationSimulator, 'event': EventSimulator}
+
+
+def make_simulator(size, engine='frame', **settings):
+    """A simulator of the named engine ('frame' or 'event'); both give the same results"""
+    if engine not in ENGINES:
+        raise ValueError("Unknown simulation engine %r, expected one of %s" % (engine, ', '.join(ENGINES)))
+    return ENGINES[engine](size, **settings)
@@ -0,0 +1,20 @@
+import os
+import contextlib
+
+
+@contextlib.contextmanager
+def atomic_save(path, mode='wb'):
+    """
+    Open a temporary file for the new contents of path, which replaces path
+    once it is written and synced: a crash leaves either the old or the new file
+    """
+    tmp_path = '%s.%d.tmp' % (path, os.getpid())
+    try:
+        with open(tmp_path, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
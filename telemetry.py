@@ -0,0 +1,131 @@
+import os
+import time
+import numpy as np
+import neat
+
+from storage import atomic_save
+
+# Per-generation columns, and the per-genome columns padded out to the widest generation
+GENERATION_COLUMNS = {
+    'best_score': np.int32,
+    'population': np.int32,     # genomes evaluated; the valid width of the per-genome rows
+    'species': np.int32,
+    'frames': np.int32,         # frames the generation lasted
+    'bird_frames': np.int64,    # frames simulated summed over all birds
+    'memo_hits': np.int32,      # genome-course runs whose results came from the fitness cache instead of a simulation
+    'eval_time': np.float64,    # seconds from start of generation to the end of evaluation
+    'generation_time': np.float64,
+}
+GENOME_COLUMNS = {
+    'fitness': (np.float64, np.nan),
+    'death_frame': (np.int32, -1),  # frame a bird died at; -1 if it survived or was not recorded
+}
+
+
+def telemetry_path(telemetry_dir, results_file, window_size, pipe_distance, run_number):
+    """Telemetry file of one experiment, grouped by the results file of its sweep"""
+    if telemetry_dir is None:
+        return None
+    study = os.path.splitext(os.path.basename(results_file))[0]
+    return os.path.join(telemetry_dir, study, 'W%d_D%d_R%d.npz' % (window_size, pipe_distance, run_number))
+
+
+def load_telemetry(path):
+    """All columns of a telemetry file as a dict of arrays"""
+    with np.load(path) as data:
+        return dict((name, data[name]) for name in data.files)
+
+
+def alive_curve(death_frame, frames):
+    """Birds alive after each of frames 0..frames, from one generation's death frames"""
+    deaths = np.bincount(death_frame[death_frame >= 0], minlength=frames + 1)[:frames + 1]
+    return len(death_frame) - np.cumsum(deaths)
+
+
+class TelemetryReporter(neat.reporting.BaseReporter):
+    """
+    Records per-generation statistics into preallocated NumPy columns.
+
+    Per-genome fitness and death frames, species counts, simulated frames and
+    timings are copied into row `generation` of fixed-size arrays, so recording
+    costs one small copy per generation. save() writes the filled rows to an
+    uncompressed .npz that loads in milliseconds.
+
+    Scores and death frames are read from `game` (the Game class), where the
+    evaluation leaves them in generation_scores and generation_death_frames.
+    Add the reporter before CustomReporter, which clears the scores.
+    """
+
+    def __init__(self, path, game, max_generations, pop_size, frame_limit, resume_generations=0):
+        self.path = path
+        self.game = game
+        self.frame_limit = frame_limit
+        self.columns = dict((name, np.zeros(max_generations, dtype=dtype))
+                            for name, dtype in GENERATION_COLUMNS.items())
+        self.columns.update((name, np.full((max_generations, pop_size), pad, dtype=dtype))
+                            for name, (dtype, pad) in GENOME_COLUMNS.items())
+        self.generation = 0
+        self.generation_start = None
+
+        if resume_generations and os.path.exists(path):
+            saved = load_telemetry(path)
+            rows = min(resume_generations, len(saved['population']), max_generations)
+            self._fit_width(saved['fitness'].shape[1])
+            for name, column in saved.items():
+                if column.ndim == 2:
+                    self.columns[name][:rows, :column.shape[1]] = column[:rows]
+                else:
+                    self.columns[name][:rows] = column[:rows]
+            self.generation = rows
+
+    def _fit_width(self, width):
+        """Widen the per-genome columns when a generation has more genomes than expected"""
+        for name, (dtype, pad) in GENOME_COLUMNS.items():
+            column = self.columns[name]
+            if column.shape[1] < width:
+                wider = np.full((column.shape[0], width), pad, dtype=dtype)
+                wider[:, :column.shape[1]] = column
+                self.columns[name] = wider
+
+    def start_generation(self, generation):
+        self.generation_start = time.perf_counter()
+
+    def post_evaluate(self, config, population, species, best_genome):
+        row = self.generation
+        if row >= len(self.columns['population']):
+            return
+        columns = self.columns
+        size = len(population)
+        self._fit_width(size)
+
+        columns['fitness'][row, :size] = [genome.fitness for genome in population.values()]
+        death_frame = self.game.generation_death_frames
+        if death_frame is not None and len(death_frame) == size:
+            columns['death_frame'][row, :size] = death_frame
+            # Survivors flew until the frame limit
+            frames = self.frame_limit if (death_frame < 0).any() else int(death_frame.max())
+            columns['frames'][row] = frames
+            columns['bird_frames'][row] = np.where(death_frame < 0, frames, death_frame).sum()
+
+        memo_hits = self.game.generation_memo_hits
+        if memo_hits is not None:
+            columns['memo_hits'][row] = memo_hits
+        scores = self.game.generation_scores
+        columns['best_score'][row] = max(scores) if scores else 0
+        columns['population'][row] = size
+        columns['species'][row] = len(species.species)
+        columns['eval_time'][row] = time.perf_counter() - self.generation_start
+        columns['generation_time'][row] = columns['eval_time'][row]
+        self.generation += 1
+
+    def end_generation(self, config, population, species_set):
+        # Reproduction and speciation happened after post_evaluate; count them too
+        if 0 < self.generation <= len(self.columns['population']) and self.generation_start is not None:
+            self.columns['generation_time'][self.generation - 1] = time.perf_counter() - self.generation_start
+
+    def save(self):
+        """Write the recorded generations to self.path, replacing it atomically"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        rows = self.generation
+        with atomic_save(self.path) as f:
+            np.savez(f, **dict((name, column[:rows]) for name, column in self.columns.items()))
@@ -0,0 +1,52 @@
+import os
+import sys
+import random
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+import neat
+import research_study as rs
+
+FRAME_LIMIT = 3000
+
+
+def headless_config_dict(**overrides):
+    """RESEARCH_CONFIG without graphics, output files or caches"""
+    config_dict = dict(rs.RESEARCH_CONFIG, frame_limit=FRAME_LIMIT, show_graphics=False, print_progress=False,
+                       use_multiprocessing=False, eval_processes=1, fitness_cache_size=0, course_seed=None,
+                       checkpoint_dir=None, study_dir=None, telemetry_dir=None, replay_dir=None, results_db=None,
+                       profile_phases=False)
+    config_dict.update(overrides)
+    return config_dict
+
+
+@pytest.fixture(scope='session')
+def neat_config():
+    return neat.config.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                              neat.DefaultStagnation, os.path.join(REPO_DIR, 'config-feedforward.txt'))
+
+
+@pytest.fixture(scope='session')
+def genomes(neat_config):
+    """A population evolved for a few generations, so its birds fly for a while and die in different ways"""
+    random.seed(1234)
+    config_dict = headless_config_dict(course_seed=7)
+    p = neat.Population(neat_config)
+    p.run(lambda genomes, config: rs.eval_genomes(genomes, config, None, config_dict), 4)
+    rs.Game.generation_scores = []
+    return list(p.population.items())
+
+
+@pytest.fixture(scope='session')
+def sprites():
+    """The game's sprites as init_graphics loads them, without opening a window"""
+    import pygame
+    load = lambda name: pygame.transform.scale2x(pygame.image.load(os.path.join(REPO_DIR, 'assets', name)))
+    pipe = load('pipe.png')
+    return {'birds': [load('bird1.png'), load('bird2.png'), load('bird3.png')],
+            'pipe_top': pygame.transform.rotate(pipe, 180), 'pipe_bottom': pipe}
@@ -0,0 +1,42 @@
+import copy
+import random
+import numpy as np
+import neat
+
+from batched_network import PopulationNetwork
+
+
+def mutated(genomes, config, rounds=30):
+    """Copies of genomes grown by repeated mutation, so they have hidden nodes several layers deep"""
+    random.seed(99)
+    grown = []
+    for genome_id, genome in genomes:
+        genome = copy.deepcopy(genome)
+        for _ in range(rounds):
+            genome.mutate(config.genome_config)
+        grown.append(genome)
+    return grown
+
+
+def reference_outputs(genomes, config, inputs):
+    nets = [neat.nn.FeedForwardNetwork.create(genome, config) for genome in genomes]
+    return np.array([net.activate(row) for net, row in zip(nets, inputs.tolist())])
+
+
+def test_activate_matches_feed_forward_network(genomes, neat_config):
+    grown = mutated(genomes, neat_config)
+    assert any(len(genome.nodes) > len(neat_config.genome_config.output_keys) for genome in grown)
+    inputs = np.random.default_rng(0).uniform(-700, 700, (len(grown), 5))
+    network = PopulationNetwork.from_genomes(grown, neat_config)
+    np.testing.assert_allclose(network.activate(inputs), reference_outputs(grown, neat_config, inputs),
+                               rtol=1e-9, atol=1e-12)
+
+
+def test_activate_on_a_subset_of_rows(genomes, neat_config):
+    grown = mutated(genomes, neat_config)
+    rows = np.arange(0, len(grown), 3)
+    inputs = np.random.default_rng(1).uniform(-700, 700, (len(rows), 5))
+    network = PopulationNetwork.from_genomes(grown, neat_config)
+    np.testing.assert_allclose(network.activate(inputs, rows),
+                               reference_outputs([grown[i] for i in rows], neat_config, inputs),
+                               rtol=1e-9, atol=1e-12)
@@ -0,0 +1,34 @@
+import os
+import random
+import numpy as np
+
+import research_study as rs
+from telemetry import load_telemetry
+
+from conftest import REPO_DIR, headless_config_dict
+
+CONFIG_FILE = os.path.join(REPO_DIR, 'config-feedforward.txt')
+
+
+def run(config_dict, checkpoint_path, telemetry_file):
+    rs.Game.fitness_cache = None
+    return rs.run_experiment_core(150, 400, CONFIG_FILE, config_dict, checkpoint_path, telemetry_file)
+
+
+def test_resumed_experiment_evolves_as_an_uninterrupted_one(tmp_path):
+    config_dict = headless_config_dict(max_generations=6, target_scores=[5, 10 ** 9], checkpoint_interval=1)
+
+    random.seed(5)
+    expected = run(config_dict, None, str(tmp_path / 'whole.npz'))
+
+    random.seed(5)
+    checkpoint_path = str(tmp_path / 'experiment.pkl')
+    stopped = run(dict(config_dict, generation_budget=3), checkpoint_path, str(tmp_path / 'resumed.npz'))
+    assert stopped['total_generations'] == 3
+    random.seed(6)  # the checkpoint restores the random state
+    resumed = run(config_dict, checkpoint_path, str(tmp_path / 'resumed.npz'))
+
+    assert resumed == expected
+    whole, parts = load_telemetry(str(tmp_path / 'whole.npz')), load_telemetry(str(tmp_path / 'resumed.npz'))
+    for name in ('best_score', 'population', 'species', 'fitness', 'death_frame'):
+        np.testing.assert_array_equal(parts[name], whole[name])
@@ -0,0 +1,26 @@
+import numpy as np
+import pygame
+
+from collision import CollisionGeometry
+
+
+def test_hits_match_pygame_masks(sprites):
+    geometry = CollisionGeometry.from_surfaces(sprites['birds'], sprites['pipe_top'], sprites['pipe_bottom'])
+    top_mask = pygame.mask.from_surface(sprites['pipe_top'])
+    bottom_mask = pygame.mask.from_surface(sprites['pipe_bottom'])
+    bird_x = 50
+    rng = np.random.default_rng(0)
+    hits = 0
+    for _ in range(400):
+        frame = int(rng.integers(len(sprites['birds'])))
+        y = rng.uniform(-20, 700, 8)
+        pipe_x = bird_x + rng.uniform(-geometry.pipe_width - 5, geometry.bird_width + 5)
+        height = int(rng.integers(50, 450))
+        top, bottom = height - sprites['pipe_top'].get_height(), height + 200
+
+        bird_mask = pygame.mask.from_surface(sprites['birds'][frame])
+        expected = [bool(bird_mask.overlap(bottom_mask, (int(pipe_x - bird_x), bottom - round(v))) or
+                         bird_mask.overlap(top_mask, (int(pipe_x - bird_x), top - round(v)))) for v in y.tolist()]
+        np.testing.assert_array_equal(geometry.hits(frame, y, pipe_x, top, bottom, bird_x), expected)
+        hits += sum(expected)
+    assert hits  # the positions above include collisions, not only misses
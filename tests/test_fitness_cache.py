@@ -0,0 +1,31 @@
+import os
+import random
+import pytest
+import numpy as np
+
+import research_study as rs
+from telemetry import load_telemetry
+
+from conftest import REPO_DIR, headless_config_dict
+
+CONFIG_FILE = os.path.join(REPO_DIR, 'config-feedforward.txt')
+
+
+@pytest.mark.parametrize('eval_courses', [1, 2])
+def test_fitness_cache_does_not_change_evolution(tmp_path, eval_courses):
+    runs = []
+    for size in (0, 4096):
+        # A fixed course, so elites and clones fly it again and hit the cache
+        config_dict = headless_config_dict(max_generations=6, target_scores=[5, 10 ** 9], course_seed=3,
+                                           eval_courses=eval_courses, fitness_cache_size=size)
+        telemetry_file = str(tmp_path / ('cache_%d.npz' % size))
+        random.seed(8)
+        rs.Game.fitness_cache = None
+        results = rs.run_experiment_core(150, 400, CONFIG_FILE, config_dict, None, telemetry_file)
+        runs.append((results, load_telemetry(telemetry_file)))
+    (plain, plain_columns), (cached, cached_columns) = runs
+
+    assert rs.Game.fitness_cache.hits > 0
+    assert cached == plain
+    for name in ('best_score', 'population', 'fitness', 'death_frame'):
+        np.testing.assert_array_equal(cached_columns[name], plain_columns[name])
@@ -0,0 +1,153 @@
+import numpy as np
+import pytest
+import pygame
+import neat
+
+import research_study as rs
+from batched_network import PopulationNetwork
+from collision import CollisionGeometry
+from course import course_length, get_course
+from simulation import PopulationSimulator, EventSimulator, LaneSimulator, make_simulator
+from game_core import BIRD_X, BIRD_START_Y, BASE_Y, CONCURRENT_PIPES, FIRST_PIPE_X
+
+from conftest import FRAME_LIMIT
+
+SETTINGS = {'reward_alive': 0.1, 'reward_pipe': 5, 'penalty_collision': 1}
+
+
+@pytest.fixture
+def geometry(sprites):
+    return CollisionGeometry.from_surfaces(sprites['birds'], sprites['pipe_top'], sprites['pipe_bottom'])
+
+
+@pytest.fixture
+def game_sprites(monkeypatch, sprites):
+    monkeypatch.setattr(rs.Bird, 'IMGS', sprites['birds'])
+    monkeypatch.setattr(rs.Pipes, 'PIPEHIGH', sprites['pipe_top'])
+    monkeypatch.setattr(rs.Pipes, 'PIPELOW', sprites['pipe_bottom'])
+    # reference_run sets the window and pipe distance
+    monkeypatch.setattr(rs.Pipes, 'WINDOW', rs.Pipes.WINDOW)
+    monkeypatch.setattr(rs.Pipes, 'PIPE_DISTANCE', rs.Pipes.PIPE_DISTANCE)
+
+
+def collides(bird, pipe):
+    """Game.collision_detected of the original game, on pygame masks"""
+    bird_mask = pygame.mask.from_surface(bird.img)
+    top_offset = (int(pipe.x - bird.x), pipe.top - round(bird.y))
+    bottom_offset = (int(pipe.x - bird.x), pipe.bottom - round(bird.y))
+    return bool(bird_mask.overlap(pygame.mask.from_surface(pipe.PIPELOW), bottom_offset) or
+                bird_mask.overlap(pygame.mask.from_surface(pipe.PIPEHIGH), top_offset))
+
+
+def reference_run(nets, window, course, frame_limit, decision_interval=1, decision_hold=False):
+    """
+    The frame loop of eval_genomes on Bird and Pipes objects, one bird and one
+    network at a time; returns (fitness, death_frame, score)
+    """
+    rs.Pipes.WINDOW = window
+    rs.Pipes.PIPE_DISTANCE = course.pipe_distance
+    birds = [rs.Bird(BIRD_X, BIRD_START_Y) for net in nets]
+    alive = list(range(len(nets)))
+    jumps = [False] * len(nets)
+    fitness = [0.0] * len(nets)
+    death_frame = [-1] * len(nets)
+    pipes = [rs.Pipes(FIRST_PIPE_X + i * course.pipe_distance, course.height(i)) for i in range(CONCURRENT_PIPES)]
+    pipe_count = CONCURRENT_PIPES
+    width = rs.Pipes.PIPELOW.get_width()
+    score = 0
+    frame = 0
+    while alive and frame < frame_limit:
+        pipe = next((p for p in pipes if p.x + width > BIRD_X), pipes[0])
+        decide = frame % decision_interval == 0
+        for x in alive:
+            bird = birds[x]
+            fitness[x] += SETTINGS['reward_alive']
+            bird.move()
+            if decide:
+                output = nets[x].activate((bird.y, abs(bird.y - pipe.height), abs(bird.y - pipe.bottom),
+                                           pipe.x - bird.x, pipe.x + width - bird.x))
+                jumps[x] = output[0] > 0.5
+                if jumps[x]:
+                    bird.jump()
+            elif decision_hold and jumps[x]:
+                bird.jump()
+        frame += 1
+
+        passed = False
+        for pipe in pipes:
+            pipe.move()
+            for x in [x for x in alive if collides(birds[x], pipe)]:
+                fitness[x] -= SETTINGS['penalty_collision']
+                death_frame[x] = frame
+                alive.remove(x)
+            if alive and not pipe.passed and pipe.x + width < BIRD_X:
+                pipe.passed = passed = True
+        if passed:
+            score += 1
+            for x in alive:
+                fitness[x] += SETTINGS['reward_pipe']
+        while pipes[0].x + width < 0:
+            pipes.pop(0)
+            pipes.append(rs.Pipes(pipes[-1].x + course.pipe_distance, course.height(pipe_count)))
+            pipe_count += 1
+
+        for x in list(alive):
+            if birds[x].y + birds[x].img.get_height() >= BASE_Y or birds[x].y < 0:
+                death_frame[x] = frame
+                alive.remove(x)
+    return np.array(fitness), np.array(death_frame), score
+
+
+def policy_of(genomes, config):
+    network = PopulationNetwork.from_genomes([genome for genome_id, genome in genomes], config)
+    return lambda inputs, rows: network.activate(inputs, rows)[:, 0] > 0.5
+
+
+def simulate(genomes, config, cls=PopulationSimulator, window=150, pipe_distance=400, seed=11, **settings):
+    course = get_course(seed, pipe_distance, course_length(pipe_distance, FRAME_LIMIT))
+    sim = cls(len(genomes), window=window, pipe_distance=pipe_distance, course=course, **dict(SETTINGS, **settings))
+    score = sim.run(policy_of(genomes, config), FRAME_LIMIT)
+    return sim, score
+
+
+@pytest.mark.parametrize('decision_interval, decision_hold', [(1, False), (3, False), (3, True)])
+def test_population_simulator_matches_reference_loop(genomes, neat_config, game_sprites, geometry,
+                                                     decision_interval, decision_hold):
+    sim, score = simulate(genomes, neat_config, geometry=geometry, decision_interval=decision_interval,
+                          decision_hold=decision_hold)
+    nets = [neat.nn.FeedForwardNetwork.create(genome, neat_config) for genome_id, genome in genomes]
+    fitness, death_frame, reference_score = reference_run(nets, 150, sim.course, FRAME_LIMIT, decision_interval,
+                                                          decision_hold)
+    assert score == reference_score
+    np.testing.assert_array_equal(sim.death_frame, death_frame)
+    np.testing.assert_allclose(sim.fitness, fitness)
+
+
+@pytest.mark.parametrize('decision_interval, decision_hold', [(1, False), (4, False), (4, True), (7, True)])
+def test_event_simulator_matches_population_simulator(genomes, neat_config, decision_interval, decision_hold):
+    settings = dict(decision_interval=decision_interval, decision_hold=decision_hold, record_flaps=True)
+    frame_sim, frame_score = simulate(genomes, neat_config, **settings)
+    event_sim, event_score = simulate(genomes, neat_config, EventSimulator, **settings)
+    assert event_score == frame_score
+    np.testing.assert_array_equal(event_sim.death_frame, frame_sim.death_frame)
+    np.testing.assert_array_equal(event_sim.fitness, frame_sim.fitness)
+    np.testing.assert_array_equal(event_sim.record().decisions, frame_sim.record().decisions)
+
+
+def test_lane_simulator_matches_one_simulator_per_lane(genomes, neat_config):
+    cells = [(150, 300, 1), (200, 400, 2), (250, 600, 3)]
+    groups = [genomes[:15], genomes[15:40], genomes[40:]]
+    courses = [get_course(seed, distance, course_length(distance, FRAME_LIMIT)) for window, distance, seed in cells]
+    lanes = LaneSimulator([len(group) for group in groups], [window for window, distance, seed in cells], courses,
+                          **SETTINGS)
+    scores = lanes.run(policy_of([genome for group in groups for genome in group], neat_config), FRAME_LIMIT)
+    for lane, (group, (window, distance, seed)) in enumerate(zip(groups, cells)):
+        sim, score = simulate(group, neat_config, window=window, pipe_distance=distance, seed=seed)
+        assert scores[lane] == score
+        np.testing.assert_array_equal(lanes.death_frame[lanes.lane_slice(lane)], sim.death_frame)
+        np.testing.assert_array_equal(lanes.fitness[lanes.lane_slice(lane)], sim.fitness)
+
+
+def test_make_simulator_rejects_unknown_engine():
+    with pytest.raises(ValueError):
+        make_simulator(1, engine='warp')